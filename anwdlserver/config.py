@@ -12,7 +12,36 @@ import cerberus
 import yaml
 
 # Intern importation
-from .core.utilities import isValidIP
+from .core.utilities import isValidIP, DEFAULT_MAX_WORKERS
+from .core.server import (
+    DEFAULT_ENABLE_ASYNCIO_ENGINE,
+    DEFAULT_MAX_PENDING_CLIENTS,
+    DEFAULT_SERVER_LISTEN_BACKLOG,
+    DEFAULT_ACCEPTOR_WORKERS,
+    DEFAULT_KEEP_ALIVE_TIMEOUT,
+    DEFAULT_MAX_KEEP_ALIVE_REQUESTS,
+    DEFAULT_RSA_OPERATION_WORKERS,
+    DEFAULT_MAX_PENDING_RSA_OPERATIONS,
+    DEFAULT_ENABLE_BINARY_ENCODING,
+    DEFAULT_MAX_BATCH_CREATE_AMOUNT,
+    DEFAULT_BATCH_CREATE_STAGE_WORKERS,
+)
+from .core.virtualization import (
+    DEFAULT_BASE_IMAGE_FILE_PATH,
+    DEFAULT_OVERLAY_DIRECTORY_PATH,
+    DEFAULT_SPARE_OVERLAYS,
+    DEFAULT_GOLDEN_SNAPSHOT_DIRECTORY_PATH,
+    DEFAULT_SPARE_SNAPSHOT_IMAGES,
+    DEFAULT_TRANSIENT_DOMAIN,
+    DEFAULT_HYPERVISOR_CONNECTIONS,
+    IMAGE_MODE_ISO,
+    IMAGE_MODE_OVERLAY,
+)
+from .core.port_forwarding import (
+    FORWARDING_BACKEND_SOCAT,
+    FORWARDING_BACKEND_SELECTOR,
+    FORWARDING_BACKEND_NFTABLES,
+)
 
 
 def loadConfigurationFileContent(config_file_path):
@@ -49,6 +78,28 @@ def loadConfigurationFileContent(config_file_path):
             "require_all": True,
             "schema": {
                 "container_iso_file_path": {"type": "string"},
+                "image_mode": {
+                    "type": "string",
+                    "allowed": [IMAGE_MODE_ISO, IMAGE_MODE_OVERLAY],
+                    "required": False,
+                    "default": IMAGE_MODE_ISO,
+                },
+                "base_image_file_path": {
+                    "type": "string",
+                    "required": False,
+                    "default": DEFAULT_BASE_IMAGE_FILE_PATH,
+                },
+                "overlay_directory_path": {
+                    "type": "string",
+                    "required": False,
+                    "default": DEFAULT_OVERLAY_DIRECTORY_PATH,
+                },
+                "spare_overlays": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": DEFAULT_SPARE_OVERLAYS,
+                },
                 "max_allowed_running_container_domains": {
                     "type": "integer",
                     "nullable": True,
@@ -65,6 +116,49 @@ def loadConfigurationFileContent(config_file_path):
                     "type": "integer",
                     "min": -1,
                 },
+                "warm_pool_size": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": 0,
+                },
+                "enable_golden_snapshot": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": False,
+                },
+                "golden_snapshot_directory_path": {
+                    "type": "string",
+                    "required": False,
+                    "default": DEFAULT_GOLDEN_SNAPSHOT_DIRECTORY_PATH,
+                },
+                "spare_golden_snapshot_images": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": DEFAULT_SPARE_SNAPSHOT_IMAGES,
+                },
+                "enable_domain_event_monitor": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": False,
+                },
+                "enable_transient_domains": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": DEFAULT_TRANSIENT_DOMAIN,
+                },
+                "undefine_leftover_domains": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": False,
+                },
+                "max_hypervisor_connections": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_HYPERVISOR_CONNECTIONS,
+                },
                 "endpoint_username": {"type": "string"},
                 "endpoint_password": {"type": "string"},
                 "endpoint_listen_port": {
@@ -95,6 +189,76 @@ def loadConfigurationFileContent(config_file_path):
                 },
                 "timeout": {"type": "integer", "nullable": True, "min": 1},
                 "enable_onetime_rsa_keys": {"type": "boolean"},
+                "enable_asyncio_engine": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": DEFAULT_ENABLE_ASYNCIO_ENGINE,
+                },
+                "max_workers": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_MAX_WORKERS,
+                },
+                "max_pending_clients": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_MAX_PENDING_CLIENTS,
+                },
+                "listen_backlog": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_SERVER_LISTEN_BACKLOG,
+                },
+                "acceptor_workers": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": DEFAULT_ACCEPTOR_WORKERS,
+                },
+                "keep_alive_timeout": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": DEFAULT_KEEP_ALIVE_TIMEOUT,
+                },
+                "max_keep_alive_requests": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_MAX_KEEP_ALIVE_REQUESTS,
+                },
+                "rsa_operation_workers": {
+                    "type": "integer",
+                    "min": 0,
+                    "required": False,
+                    "default": DEFAULT_RSA_OPERATION_WORKERS,
+                },
+                "max_pending_rsa_operations": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_MAX_PENDING_RSA_OPERATIONS,
+                },
+                "enable_binary_encoding": {
+                    "type": "boolean",
+                    "required": False,
+                    "default": DEFAULT_ENABLE_BINARY_ENCODING,
+                },
+                "max_batch_create_amount": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_MAX_BATCH_CREATE_AMOUNT,
+                },
+                "batch_create_stage_workers": {
+                    "type": "integer",
+                    "min": 1,
+                    "required": False,
+                    "default": DEFAULT_BATCH_CREATE_STAGE_WORKERS,
+                },
             },
         },
         "web_server": {
@@ -119,6 +283,16 @@ def loadConfigurationFileContent(config_file_path):
             "require_all": True,
             "schema": {
                 "port_range": {"type": "list", "check_with": _check_port_range},
+                "forwarding_backend": {
+                    "type": "string",
+                    "allowed": [
+                        FORWARDING_BACKEND_SOCAT,
+                        FORWARDING_BACKEND_SELECTOR,
+                        FORWARDING_BACKEND_NFTABLES,
+                    ],
+                    "required": False,
+                    "default": FORWARDING_BACKEND_SOCAT,
+                },
             },
         },
         "log_rotation": {
@@ -8,30 +8,76 @@ representation and management features. It includes :
 
  - RSA / AES key exchange ;
  - Request / response processing ;
+ - Protocol version negotiation ;
 
 """
 
 from typing import Union
 import hashlib
+import asyncio
+import base64
 import socket
 import json
 import time
 import os
 
 # Intern importation
-from .crypto import RSAWrapper, AESWrapper
+from .crypto import (
+    RSAWrapper,
+    RSAKeyPool,
+    AESWrapper,
+    AESGCMWrapper,
+    ECDHWrapper,
+    ECDHKeyProvider,
+    SessionTicketManager,
+    makeDerivedKey,
+    X25519_PUBLIC_KEY_SIZE,
+)
 from .sanitization import makeResponse, verifyRequestContent
+from .encoding import encodePayload, decodePayload
 from .utilities import isSocketClosed
 
 # Default parameters
 DEFAULT_STORE_REQUEST = True
 DEFAULT_EXCHANGE_KEYS = True
 DEFAULT_RECEIVE_FIRST = True
+DEFAULT_PROTOCOL_VERSION = 2
+DEFAULT_ACCEPTED_PROTOCOL_VERSION = 3
+DEFAULT_KEEP_ALIVE = False
+DEFAULT_BINARY_ENCODING = False
 
 # Constants definition
 MESSAGE_OK = "1"
 MESSAGE_NOK = "0"
 
+ROUTINE_RECV_INTO = 0
+ROUTINE_SEND = 1
+
+PROTOCOL_VERSION_1 = 1
+PROTOCOL_VERSION_2 = 2
+PROTOCOL_VERSION_3 = 3
+
+# A version 1 peer starts with its ASCII public key length,
+# which can never begin with a null byte
+PROTOCOL_PREAMBLE_MAGIC = b"\x00ANWDL"
+PROTOCOL_PREAMBLE_SIZE = 8
+PROTOCOL_FRAME_HEADER_SIZE = 4
+PROTOCOL_MAX_FRAME_SIZE = 65536
+AES_GCM_TAG_SIZE = 16
+RECV_BUFFER_INITIAL_SIZE = 4096
+ECDH_KEY_DERIVATION_INFO = b"anweddol protocol v3"
+
+# Flags set in the last preamble byte
+PROTOCOL_FLAG_REQUEST_TICKET = 0x01
+PROTOCOL_FLAG_RESUME = 0x02
+PROTOCOL_FLAG_TICKET = 0x04
+PROTOCOL_FLAG_KEEP_ALIVE = 0x08
+PROTOCOL_FLAG_BINARY_ENCODING = 0x10
+
+RESUMPTION_NONCE_SIZE = 16
+RESUMPTION_SECRET_DERIVATION_INFO = b"anweddol resumption secret"
+RESUMPTION_KEY_DERIVATION_INFO = b"anweddol resumption"
+
 
 # Class representing a established client connexion
 class ClientInstance:
@@ -42,10 +88,48 @@ class ClientInstance:
         rsa_wrapper: RSAWrapper = None,
         aes_wrapper: AESWrapper = None,
         exchange_keys: bool = DEFAULT_EXCHANGE_KEYS,
+        rsa_key_pool: RSAKeyPool = None,
+        protocol_version: Union[None, int] = None,
+        ecdh_key_provider: ECDHKeyProvider = None,
+        session_ticket_manager: SessionTicketManager = None,
+        keep_alive: bool = DEFAULT_KEEP_ALIVE,
+        binary_encoding: bool = DEFAULT_BINARY_ENCODING,
     ):
-        self.rsa_wrapper = rsa_wrapper if rsa_wrapper else RSAWrapper()
+        self.rsa_wrapper = (
+            rsa_wrapper
+            if rsa_wrapper
+            else (rsa_key_pool.getRSAWrapper() if rsa_key_pool else RSAWrapper())
+        )
         self.aes_wrapper = aes_wrapper if aes_wrapper else AESWrapper()
         self.stored_request = None
+
+        # Before the key exchange, this is the version offered when initiating
+        # it or the highest one accepted when responding to it, None meaning
+        # the default one of each role. It is then replaced by the negotiated one
+        self.protocol_version = protocol_version
+        self.aes_gcm_wrapper = None
+
+        # Optional, a signed ephemeral key is made for the session without it
+        self.ecdh_key_provider = ecdh_key_provider
+
+        # Optional, session tickets are neither issued nor accepted without it
+        self.session_ticket_manager = session_ticket_manager
+        self.session_ticket = None
+        self.resumption_secret = None
+
+        # Before the key exchange, this is whether the connection should stay
+        # open for several requests. It is then replaced by the peer decision
+        self.keep_alive = keep_alive
+        self.received_requests_amount = 0
+
+        # Before the key exchange, this is whether the payloads should be sent
+        # in the binary encoding instead of JSON. It is then replaced by the
+        # peer decision, JSON being always used with the protocol version 1
+        self.binary_encoding = binary_encoding
+
+        # Packets are received in place in this buffer, which is only
+        # replaced when a packet larger than the previous ones is received
+        self.recv_buffer_view = memoryview(bytearray(RECV_BUFFER_INITIAL_SIZE))
         self.socket = socket
 
         self.id = hashlib.sha256(
@@ -94,13 +178,166 @@ class ClientInstance:
     def getAESWrapper(self) -> AESWrapper:
         return self.aes_wrapper
 
+    def getAESGCMWrapper(self) -> Union[None, AESGCMWrapper]:
+        return self.aes_gcm_wrapper
+
+    def getProtocolVersion(self) -> Union[None, int]:
+        return self.protocol_version
+
+    def isKeepAlive(self) -> bool:
+        return self.keep_alive
+
+    def getReceivedRequestsAmount(self) -> int:
+        return self.received_requests_amount
+
+    def isBinaryEncoding(self) -> bool:
+        return self.binary_encoding
+
+    # Returns the ticket received from the peer and its resumption
+    # secret, which must both be kept to resume the session later
+    def getSessionTicket(self) -> Union[None, tuple]:
+        return (
+            (self.session_ticket, self.resumption_secret)
+            if self.session_ticket
+            else None
+        )
+
+    def setSessionTicket(self, session_ticket: bytes, resumption_secret: bytes) -> None:
+        self.session_ticket = session_ticket
+        self.resumption_secret = resumption_secret
+
     def setRSAWrapper(self, rsa_wrapper: RSAWrapper) -> None:
         self.rsa_wrapper = rsa_wrapper
 
     def setAESWrapper(self, aes_wrapper: AESWrapper) -> None:
         self.aes_wrapper = aes_wrapper
 
-    def sendPublicRSAKey(self) -> None:
+    # The session state allows another process to continue the
+    # session on the same connection without a new key exchange
+    def getSessionState(self) -> dict:
+        if self.protocol_version >= PROTOCOL_VERSION_2:
+            send_counter, recv_counter = self.aes_gcm_wrapper.getCounters()
+
+            return {
+                "protocol_version": self.protocol_version,
+                "aes_key": base64.b64encode(self.aes_gcm_wrapper.getKey()).decode(),
+                "aes_gcm_is_initiator": self.aes_gcm_wrapper.isInitiator(),
+                "aes_gcm_send_counter": send_counter,
+                "aes_gcm_recv_counter": recv_counter,
+                "keep_alive": self.keep_alive,
+                "received_requests_amount": self.received_requests_amount,
+                "binary_encoding": self.binary_encoding,
+                "stored_request": self.stored_request,
+            }
+
+        aes_key, aes_iv = self.aes_wrapper.getKey()
+
+        return {
+            "protocol_version": self.protocol_version,
+            "aes_key": base64.b64encode(aes_key).decode(),
+            "aes_iv": base64.b64encode(aes_iv).decode(),
+            "stored_request": self.stored_request,
+        }
+
+    def setSessionState(self, session_state: dict) -> None:
+        self.protocol_version = session_state.get(
+            "protocol_version", PROTOCOL_VERSION_1
+        )
+        self.stored_request = session_state.get("stored_request")
+        self.keep_alive = session_state.get("keep_alive", False)
+        self.received_requests_amount = session_state.get("received_requests_amount", 0)
+        self.binary_encoding = session_state.get("binary_encoding", False)
+
+        if self.protocol_version >= PROTOCOL_VERSION_2:
+            self.aes_gcm_wrapper = AESGCMWrapper(
+                is_initiator=session_state["aes_gcm_is_initiator"]
+            )
+            self.aes_gcm_wrapper.setKey(base64.b64decode(session_state["aes_key"]))
+            self.aes_gcm_wrapper.setCounters(
+                session_state["aes_gcm_send_counter"],
+                session_state["aes_gcm_recv_counter"],
+            )
+
+            return
+
+        self.aes_wrapper.setKey(
+            base64.b64decode(session_state["aes_key"]),
+            base64.b64decode(session_state["aes_iv"]),
+        )
+
+    # Protocol routines are generators yielding (ROUTINE_RECV_INTO, view) or
+    # (ROUTINE_SEND, data) steps, so that the same key exchange and request
+    # framing logic can be driven either on a blocking socket or in asyncio
+    def _execute_routine(self, routine):
+        step = routine.send(None)
+
+        while True:
+            step_kind, step_value = step
+
+            try:
+                result = (
+                    self.socket.recv_into(step_value)
+                    if step_kind == ROUTINE_RECV_INTO
+                    else self.socket.sendall(step_value)
+                )
+
+            except Exception as E:
+                try:
+                    step = routine.throw(E)
+
+                except StopIteration as routine_end:
+                    return routine_end.value
+
+                continue
+
+            try:
+                step = routine.send(result)
+
+            except StopIteration as routine_end:
+                return routine_end.value
+
+    async def _async_execute_routine(self, routine):
+        event_loop = asyncio.get_running_loop()
+        timeout = self.socket.gettimeout()
+
+        # The event loop requires a non-blocking socket, the timeout is
+        # applied on each step instead and restored once the routine is done
+        self.socket.setblocking(False)
+
+        try:
+            step = routine.send(None)
+
+            while True:
+                step_kind, step_value = step
+
+                try:
+                    result = await asyncio.wait_for(
+                        event_loop.sock_recv_into(self.socket, step_value)
+                        if step_kind == ROUTINE_RECV_INTO
+                        else event_loop.sock_sendall(self.socket, step_value),
+                        timeout,
+                    )
+
+                except Exception as E:
+                    try:
+                        step = routine.throw(E)
+
+                    except StopIteration as routine_end:
+                        return routine_end.value
+
+                    continue
+
+                try:
+                    step = routine.send(result)
+
+                except StopIteration as routine_end:
+                    return routine_end.value
+
+        finally:
+            if not self.isClosed():
+                self.socket.settimeout(timeout)
+
+    def _send_public_rsa_key_routine(self):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
@@ -108,88 +345,529 @@ class ClientInstance:
         rsa_public_key_length = str(len(rsa_public_key))
 
         # Send the key size
-        self.socket.sendall(
-            (rsa_public_key_length + ("=" * (8 - len(rsa_public_key_length)))).encode()
+        yield (
+            ROUTINE_SEND,
+            (rsa_public_key_length + ("=" * (8 - len(rsa_public_key_length)))).encode(),
         )
 
-        if self.socket.recv(1).decode() is not MESSAGE_OK:
+        if (yield from self._recv_exact_routine(1)).decode() is not MESSAGE_OK:
             raise RuntimeError("Peer refused the packet")
 
-        self.socket.sendall(rsa_public_key)
+        yield (ROUTINE_SEND, rsa_public_key)
 
-        if self.socket.recv(1).decode() is not MESSAGE_OK:
+        if (yield from self._recv_exact_routine(1)).decode() is not MESSAGE_OK:
             raise RuntimeError("Peer refused the RSA key")
 
-    def recvPublicRSAKey(self) -> None:
+    def _recv_public_rsa_key_routine(self, recv_key_length_packet=None):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
         try:
-            recv_key_length = int(self.socket.recv(8).decode().split("=")[0])
+            if not recv_key_length_packet:
+                recv_key_length_packet = yield from self._recv_exact_routine(8)
+
+            recv_key_length = int(recv_key_length_packet.decode().split("=")[0])
 
-            if recv_key_length <= 0:
-                self.socket.sendall(MESSAGE_NOK.encode())
+            if recv_key_length <= 0 or recv_key_length > PROTOCOL_MAX_FRAME_SIZE:
+                yield (ROUTINE_SEND, MESSAGE_NOK.encode())
                 raise ValueError(f"Received bad key length : {recv_key_length}")
 
-            self.socket.sendall(MESSAGE_OK.encode())
-            recv_packet = self.socket.recv(recv_key_length)
+            yield (ROUTINE_SEND, MESSAGE_OK.encode())
+            recv_packet = yield from self._recv_exact_routine(recv_key_length)
 
             self.rsa_wrapper.setRemotePublicKey(recv_packet)
-            self.socket.sendall(MESSAGE_OK.encode())
+            yield (ROUTINE_SEND, MESSAGE_OK.encode())
 
         except Exception as E:
-            self.socket.sendall(MESSAGE_NOK.encode())
+            yield (ROUTINE_SEND, MESSAGE_NOK.encode())
             raise E
 
-    def sendAESKey(self) -> None:
+    def _send_aes_key_routine(self):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
         aes_key = self.aes_wrapper.getKey()
 
-        self.socket.sendall(self.rsa_wrapper.encryptData(aes_key[0] + aes_key[1]))
+        yield (ROUTINE_SEND, self.rsa_wrapper.encryptData(aes_key[0] + aes_key[1]))
 
-        if self.socket.recv(1).decode() is not MESSAGE_OK:
+        if (yield from self._recv_exact_routine(1)).decode() is not MESSAGE_OK:
             raise RuntimeError("Peer refused the AES key")
 
-    def recvAESKey(self) -> None:
+    def _recv_aes_key_routine(self):
         try:
             if self.isClosed():
                 raise RuntimeError("Client must be connected to the server")
 
             # Key size is divided by 8 to get the maximum supported block size
             recv_packet = self.rsa_wrapper.decryptData(
-                self.socket.recv(int(self.rsa_wrapper.getKeySize() / 8)),
+                (
+                    yield from self._recv_exact_routine(
+                        int(self.rsa_wrapper.getKeySize() / 8)
+                    )
+                ),
                 decode=False,
             )
 
             self.aes_wrapper.setKey(recv_packet[:-16], recv_packet[-16:])
 
-            self.socket.sendall(MESSAGE_OK.encode())
+            yield (ROUTINE_SEND, MESSAGE_OK.encode())
 
         except Exception as E:
-            self.socket.sendall(MESSAGE_NOK.encode())
+            yield (ROUTINE_SEND, MESSAGE_NOK.encode())
             raise E
 
-    def exchangeKeys(self, receive_first: bool = DEFAULT_RECEIVE_FIRST) -> None:
+    # Returns a view on exactly 'size' bytes received at 'offset' in the
+    # receive buffer, which is only valid until the next reception
+    def _recv_into_buffer_routine(self, size, offset=0):
+        if offset + size > len(self.recv_buffer_view):
+            # Views on the previous buffer may still be in use,
+            # so it is replaced instead of being resized
+            self.recv_buffer_view = memoryview(bytearray(offset + size))
+
+        recv_size = 0
+
+        while recv_size < size:
+            recv_packet_size = yield (
+                ROUTINE_RECV_INTO,
+                self.recv_buffer_view[offset + recv_size : offset + size],
+            )
+
+            if not recv_packet_size:
+                raise ConnectionError("Peer closed the connection")
+
+            recv_size += recv_packet_size
+
+        return self.recv_buffer_view[offset : offset + size]
+
+    def _recv_exact_routine(self, size):
+        return bytes((yield from self._recv_into_buffer_routine(size)))
+
+    def _make_preamble(self, protocol_version, flags=0):
+        return PROTOCOL_PREAMBLE_MAGIC + bytes((protocol_version, flags))
+
+    def _make_frame(self, payload):
+        return len(payload).to_bytes(PROTOCOL_FRAME_HEADER_SIZE, "big") + payload
+
+    # The frame header is authenticated along with the payload
+    def _make_encrypted_frame(self, data):
+        encoded_data = data.encode() if type(data) is str else data
+        frame_header = (len(encoded_data) + AES_GCM_TAG_SIZE).to_bytes(
+            PROTOCOL_FRAME_HEADER_SIZE, "big"
+        )
+
+        return frame_header + self.aes_gcm_wrapper.encryptData(
+            encoded_data, associated_data=frame_header
+        )
+
+    # Returns views on the frame header and payload, which are
+    # only valid until the next reception
+    def _recv_frame_view_routine(self):
+        frame_header = yield from self._recv_into_buffer_routine(
+            PROTOCOL_FRAME_HEADER_SIZE
+        )
+        frame_size = int.from_bytes(frame_header, "big")
+
+        if frame_size <= 0 or frame_size > PROTOCOL_MAX_FRAME_SIZE:
+            raise ValueError(f"Received bad frame size : {frame_size}")
+
+        frame_payload = yield from self._recv_into_buffer_routine(
+            frame_size, offset=PROTOCOL_FRAME_HEADER_SIZE
+        )
+
+        return (frame_header, frame_payload)
+
+    def _recv_frame_routine(self):
+        frame_header, frame_payload = yield from self._recv_frame_view_routine()
+
+        return (bytes(frame_header), bytes(frame_payload))
+
+    def _send_encrypted_frame_routine(self, data):
+        yield (ROUTINE_SEND, self._make_encrypted_frame(data))
+
+    # The cipher is decrypted in place, without being copied out of the buffer
+    def _recv_encrypted_frame_routine(self, decode=True):
+        frame_header, cipher = yield from self._recv_frame_view_routine()
+
+        return self.aes_gcm_wrapper.decryptData(
+            cipher, decode=decode, associated_data=frame_header
+        )
+
+    def _check_recv_preamble(self, recv_preamble):
+        if not recv_preamble.startswith(PROTOCOL_PREAMBLE_MAGIC):
+            raise RuntimeError(
+                f"Peer does not support the protocol version {self.protocol_version}"
+            )
+
+        if recv_preamble[6] != self.protocol_version:
+            raise ValueError(f"Peer chose a bad protocol version : {recv_preamble[6]}")
+
+        self.keep_alive = bool(recv_preamble[7] & PROTOCOL_FLAG_KEEP_ALIVE)
+        self.binary_encoding = bool(recv_preamble[7] & PROTOCOL_FLAG_BINARY_ENCODING)
+
+    def _get_initiator_flags(self):
+        return (
+            PROTOCOL_FLAG_REQUEST_TICKET
+            | (PROTOCOL_FLAG_KEEP_ALIVE if self.keep_alive else 0)
+            | (PROTOCOL_FLAG_BINARY_ENCODING if self.binary_encoding else 0)
+        )
+
+    # The resumption secret is derived from the session key, so that
+    # a session ticket never contains the key of an actual session
+    def _set_session_key(self, session_key, is_initiator):
+        self.aes_gcm_wrapper = AESGCMWrapper(is_initiator=is_initiator)
+        self.aes_gcm_wrapper.setKey(session_key)
+
+        self.resumption_secret = makeDerivedKey(
+            session_key, info=RESUMPTION_SECRET_DERIVATION_INFO
+        )
+
+    def _make_session_ticket_frame(self):
+        return self._make_encrypted_frame(
+            self.session_ticket_manager.makeTicket(
+                self.resumption_secret, self.protocol_version
+            )
+        )
+
+    # Version 2 handshake : the initiator sends its preamble and public key,
+    # the responder answers with its own, then the initiator sends the
+    # session key which can be directly followed by the first request.
+    # If the preamble was already exchanged, only the frames are sent
+    def _initiate_v2_handshake_routine(self, recv_preamble=None):
+        public_key_frame = self._make_frame(self.rsa_wrapper.getPublicKey())
+
+        if recv_preamble:
+            yield (ROUTINE_SEND, public_key_frame)
+
+        else:
+            yield (
+                ROUTINE_SEND,
+                self._make_preamble(self.protocol_version, self._get_initiator_flags())
+                + public_key_frame,
+            )
+
+            recv_preamble = yield from self._recv_exact_routine(PROTOCOL_PREAMBLE_SIZE)
+            self._check_recv_preamble(recv_preamble)
+
+        _, recv_public_key = yield from self._recv_frame_routine()
+        self.rsa_wrapper.setRemotePublicKey(recv_public_key)
+
+        session_key = os.urandom(32)
+
+        yield (
+            ROUTINE_SEND,
+            self._make_frame(self.rsa_wrapper.encryptData(session_key)),
+        )
+
+        self._set_session_key(session_key, True)
+
+        return recv_preamble
+
+    def _respond_v2_handshake_routine(self, response_flags, send_preamble):
+        _, recv_public_key = yield from self._recv_frame_routine()
+        self.rsa_wrapper.setRemotePublicKey(recv_public_key)
+
+        yield (
+            ROUTINE_SEND,
+            (
+                self._make_preamble(self.protocol_version, response_flags)
+                if send_preamble
+                else b""
+            )
+            + self._make_frame(self.rsa_wrapper.getPublicKey()),
+        )
+
+        _, recv_packet = yield from self._recv_frame_routine()
+
+        self._set_session_key(
+            self.rsa_wrapper.decryptData(recv_packet, decode=False), False
+        )
+
+        if response_flags & PROTOCOL_FLAG_TICKET:
+            yield (ROUTINE_SEND, self._make_session_ticket_frame())
+
+    # Version 3 handshake : the initiator sends its preamble and ephemeral
+    # X25519 key, the responder answers with its RSA public key and its
+    # ephemeral key signed with it. The session key is derived from both
+    # ephemeral keys on each end, so no RSA decryption is involved
+    def _initiate_v3_handshake_routine(self, recv_preamble=None):
+        ecdh_wrapper = ECDHWrapper()
+        ecdh_public_key_frame = self._make_frame(ecdh_wrapper.getPublicKey())
+
+        if recv_preamble:
+            yield (ROUTINE_SEND, ecdh_public_key_frame)
+
+        else:
+            yield (
+                ROUTINE_SEND,
+                self._make_preamble(self.protocol_version, self._get_initiator_flags())
+                + ecdh_public_key_frame,
+            )
+
+            recv_preamble = yield from self._recv_exact_routine(PROTOCOL_PREAMBLE_SIZE)
+            self._check_recv_preamble(recv_preamble)
+
+        _, recv_public_key = yield from self._recv_frame_routine()
+        _, recv_signed_data = yield from self._recv_frame_routine()
+        _, recv_signature = yield from self._recv_frame_routine()
+
+        self.rsa_wrapper.setRemotePublicKey(recv_public_key)
+
+        remote_rsa_wrapper = RSAWrapper(generate_key_pair=False)
+        remote_rsa_wrapper.setPublicKey(recv_public_key)
+
+        if len(
+            recv_signed_data
+        ) != X25519_PUBLIC_KEY_SIZE + 8 or not remote_rsa_wrapper.verifyDataSignature(
+            recv_signature, recv_signed_data
+        ):
+            raise RuntimeError("Peer ephemeral key signature is invalid")
+
+        remote_ecdh_public_key = recv_signed_data[:X25519_PUBLIC_KEY_SIZE]
+
+        if int.from_bytes(recv_signed_data[X25519_PUBLIC_KEY_SIZE:], "big") < int(
+            time.time()
+        ):
+            raise RuntimeError("Peer ephemeral key is expired")
+
+        self._set_session_key(
+            ecdh_wrapper.deriveKey(
+                remote_ecdh_public_key,
+                info=ECDH_KEY_DERIVATION_INFO
+                + ecdh_wrapper.getPublicKey()
+                + remote_ecdh_public_key,
+            ),
+            True,
+        )
+
+        return recv_preamble
+
+    def _respond_v3_handshake_routine(self, response_flags, send_preamble):
+        _, recv_ecdh_public_key = yield from self._recv_frame_routine()
+
+        if len(recv_ecdh_public_key) != X25519_PUBLIC_KEY_SIZE:
+            raise ValueError(
+                f"Received bad ephemeral key length : {len(recv_ecdh_public_key)}"
+            )
+
+        ecdh_wrapper, signed_data, signature = (
+            self.ecdh_key_provider
+            if self.ecdh_key_provider
+            else ECDHKeyProvider(self.rsa_wrapper)
+        ).getSignedKey()
+
+        self._set_session_key(
+            ecdh_wrapper.deriveKey(
+                recv_ecdh_public_key,
+                info=ECDH_KEY_DERIVATION_INFO
+                + recv_ecdh_public_key
+                + ecdh_wrapper.getPublicKey(),
+            ),
+            False,
+        )
+
+        yield (
+            ROUTINE_SEND,
+            (
+                self._make_preamble(self.protocol_version, response_flags)
+                if send_preamble
+                else b""
+            )
+            + self._make_frame(self.rsa_wrapper.getPublicKey())
+            + self._make_frame(signed_data)
+            + self._make_frame(signature)
+            + (
+                self._make_session_ticket_frame()
+                if response_flags & PROTOCOL_FLAG_TICKET
+                else b""
+            ),
+        )
+
+    # A resuming initiator sends its session ticket and a nonce instead of
+    # its first handshake frame. If the responder accepts the ticket, it
+    # answers with its own nonce and both ends derive the session key
+    # from the ticket resumption secret and the two nonces. Otherwise the
+    # full handshake goes on, right after the exchanged preambles
+    def _initiate_handshake_routine(self):
+        recv_preamble = None
+
+        if self.session_ticket:
+            client_nonce = os.urandom(RESUMPTION_NONCE_SIZE)
+
+            yield (
+                ROUTINE_SEND,
+                self._make_preamble(
+                    self.protocol_version,
+                    self._get_initiator_flags() | PROTOCOL_FLAG_RESUME,
+                )
+                + self._make_frame(self.session_ticket)
+                + self._make_frame(client_nonce),
+            )
+
+            # Tickets can only be redeemed once
+            self.session_ticket = None
+
+            recv_preamble = yield from self._recv_exact_routine(PROTOCOL_PREAMBLE_SIZE)
+            self._check_recv_preamble(recv_preamble)
+
+            if recv_preamble[7] & PROTOCOL_FLAG_RESUME:
+                _, server_nonce = yield from self._recv_frame_routine()
+
+                self._set_session_key(
+                    makeDerivedKey(
+                        self.resumption_secret,
+                        info=RESUMPTION_KEY_DERIVATION_INFO
+                        + client_nonce
+                        + server_nonce,
+                    ),
+                    True,
+                )
+
+        if not recv_preamble or not recv_preamble[7] & PROTOCOL_FLAG_RESUME:
+            recv_preamble = yield from (
+                self._initiate_v3_handshake_routine(recv_preamble)
+                if self.protocol_version >= PROTOCOL_VERSION_3
+                else self._initiate_v2_handshake_routine(recv_preamble)
+            )
+
+        if recv_preamble[7] & PROTOCOL_FLAG_TICKET:
+            self.session_ticket = yield from self._recv_encrypted_frame_routine(
+                decode=False
+            )
+
+    def _respond_handshake_routine(self, recv_preamble):
+        self.keep_alive = bool(
+            recv_preamble[7] & PROTOCOL_FLAG_KEEP_ALIVE and self.keep_alive
+        )
+        self.binary_encoding = bool(
+            recv_preamble[7] & PROTOCOL_FLAG_BINARY_ENCODING and self.binary_encoding
+        )
+
+        response_flags = (
+            (
+                PROTOCOL_FLAG_TICKET
+                if recv_preamble[7] & PROTOCOL_FLAG_REQUEST_TICKET
+                and self.session_ticket_manager
+                else 0
+            )
+            | (PROTOCOL_FLAG_KEEP_ALIVE if self.keep_alive else 0)
+            | (PROTOCOL_FLAG_BINARY_ENCODING if self.binary_encoding else 0)
+        )
+
+        if recv_preamble[7] & PROTOCOL_FLAG_RESUME:
+            _, recv_session_ticket = yield from self._recv_frame_routine()
+            _, client_nonce = yield from self._recv_frame_routine()
+
+            if len(client_nonce) != RESUMPTION_NONCE_SIZE:
+                raise ValueError(f"Received bad nonce length : {len(client_nonce)}")
+
+            resumption_secret = (
+                self.session_ticket_manager.redeemTicket(
+                    recv_session_ticket, self.protocol_version
+                )
+                if self.session_ticket_manager
+                else None
+            )
+
+            if resumption_secret:
+                server_nonce = os.urandom(RESUMPTION_NONCE_SIZE)
+
+                self._set_session_key(
+                    makeDerivedKey(
+                        resumption_secret,
+                        info=RESUMPTION_KEY_DERIVATION_INFO
+                        + client_nonce
+                        + server_nonce,
+                    ),
+                    False,
+                )
+
+                yield (
+                    ROUTINE_SEND,
+                    self._make_preamble(
+                        self.protocol_version, response_flags | PROTOCOL_FLAG_RESUME
+                    )
+                    + self._make_frame(server_nonce)
+                    + (
+                        self._make_session_ticket_frame()
+                        if response_flags & PROTOCOL_FLAG_TICKET
+                        else b""
+                    ),
+                )
+
+                return
+
+            # The ticket is refused, the preamble is sent right away
+            # so that the peer sends its first handshake frame
+            yield (
+                ROUTINE_SEND,
+                self._make_preamble(self.protocol_version, response_flags),
+            )
+
+        yield from (
+            self._respond_v3_handshake_routine
+            if self.protocol_version >= PROTOCOL_VERSION_3
+            else self._respond_v2_handshake_routine
+        )(response_flags, not recv_preamble[7] & PROTOCOL_FLAG_RESUME)
+
+    def _exchange_keys_routine(self, receive_first):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
+        # Initiators offer the version 2 by default, since peers which do not
+        # accept the offered version close the connection without any fallback
+        if not self.protocol_version:
+            self.protocol_version = (
+                DEFAULT_ACCEPTED_PROTOCOL_VERSION
+                if receive_first
+                else DEFAULT_PROTOCOL_VERSION
+            )
+
         if receive_first:
-            self.recvPublicRSAKey()
-            self.sendPublicRSAKey()
-            self.recvAESKey()
-            self.sendAESKey()
+            recv_preamble = yield from self._recv_exact_routine(PROTOCOL_PREAMBLE_SIZE)
+
+            # Version 1 peers directly send their public key length
+            if not recv_preamble.startswith(PROTOCOL_PREAMBLE_MAGIC):
+                self.protocol_version = PROTOCOL_VERSION_1
+                self.keep_alive = False
+                self.binary_encoding = False
+
+                yield from self._recv_public_rsa_key_routine(recv_preamble)
+                yield from self._send_public_rsa_key_routine()
+                yield from self._recv_aes_key_routine()
+                yield from self._send_aes_key_routine()
+
+                return
+
+            if recv_preamble[6] < PROTOCOL_VERSION_2:
+                yield (ROUTINE_SEND, MESSAGE_NOK.encode())
+                raise ValueError(f"Received bad protocol version : {recv_preamble[6]}")
+
+            # The first frame depends on the offered version, so an unsupported
+            # version is refused the same way version 1 peers refuse a preamble.
+            # The peer is then expected to reconnect with a lower version
+            if recv_preamble[6] > self.protocol_version:
+                yield (ROUTINE_SEND, MESSAGE_NOK.encode())
+                raise RuntimeError(
+                    f"Protocol version {recv_preamble[6]} is not accepted"
+                )
+
+            self.protocol_version = recv_preamble[6]
+
+            yield from self._respond_handshake_routine(recv_preamble)
+
+        elif self.protocol_version >= PROTOCOL_VERSION_2:
+            yield from self._initiate_handshake_routine()
 
         else:
-            self.sendPublicRSAKey()
-            self.recvPublicRSAKey()
-            self.sendAESKey()
-            self.recvAESKey()
+            self.keep_alive = False
+            self.binary_encoding = False
 
-    def sendResponse(
-        self, success: bool, message: str, data: dict = {}, reason: str = None
-    ) -> None:
+            yield from self._send_public_rsa_key_routine()
+            yield from self._recv_public_rsa_key_routine()
+            yield from self._send_aes_key_routine()
+            yield from self._recv_aes_key_routine()
+
+    def _send_response_routine(self, success, message, data, reason):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
@@ -200,38 +878,46 @@ class ClientInstance:
         if not is_response_valid:
             raise ValueError(f"Error in specified values : {response_errors}")
 
+        if self.protocol_version >= PROTOCOL_VERSION_2:
+            yield from self._send_encrypted_frame_routine(
+                encodePayload(response_content)
+                if self.binary_encoding
+                else json.dumps(response_content)
+            )
+            return
+
         encrypted_packet = self.aes_wrapper.encryptData(json.dumps(response_content))
         new_iv = os.urandom(16)
 
-        self.socket.sendall(
-            self.aes_wrapper.encryptData(str(len(encrypted_packet) + len(new_iv)))
+        yield (
+            ROUTINE_SEND,
+            self.aes_wrapper.encryptData(str(len(encrypted_packet) + len(new_iv))),
         )
 
-        if self.socket.recv(1).decode() != MESSAGE_OK:
+        if (yield from self._recv_exact_routine(1)).decode() != MESSAGE_OK:
             raise RuntimeError("Peer refused the packet")
 
-        self.socket.sendall(encrypted_packet + new_iv)
+        yield (ROUTINE_SEND, encrypted_packet + new_iv)
         self.aes_wrapper.setKey(self.aes_wrapper.getKey()[0], new_iv)
 
-    def recvRequest(self, store_request: bool = DEFAULT_STORE_REQUEST) -> tuple:
+    def _recv_request_routine(self, store_request):
         if self.isClosed():
             raise RuntimeError("Client must be connected to the server")
 
-        recv_packet_length = int(self.aes_wrapper.decryptData(self.socket.recv(16)))
-
-        if recv_packet_length <= 0:
-            self.socket.sendall(MESSAGE_NOK.encode())
-            raise ValueError(f"Received bad packet length : {recv_packet_length}")
-
-        self.socket.sendall(MESSAGE_OK.encode())
+        if self.protocol_version >= PROTOCOL_VERSION_2:
+            decrypted_recv_request = yield from self._recv_encrypted_frame_routine(
+                decode=not self.binary_encoding
+            )
 
-        recv_packet = self.socket.recv(recv_packet_length)
-        decrypted_recv_request = self.aes_wrapper.decryptData(recv_packet[:-16])
+        else:
+            decrypted_recv_request = yield from self._recv_v1_request_routine()
 
-        self.aes_wrapper.setKey(self.aes_wrapper.getKey()[0], recv_packet[-16:])
+        self.received_requests_amount += 1
 
         is_request_valid, request_content, request_errors = verifyRequestContent(
-            json.loads(decrypted_recv_request)
+            decodePayload(decrypted_recv_request)
+            if self.binary_encoding
+            else json.loads(decrypted_recv_request)
         )
 
         if is_request_valid and store_request:
@@ -239,5 +925,67 @@ class ClientInstance:
 
         return (is_request_valid, request_content, request_errors)
 
+    def _recv_v1_request_routine(self):
+        recv_packet_length = int(
+            self.aes_wrapper.decryptData((yield from self._recv_exact_routine(16)))
+        )
+
+        if recv_packet_length <= 16 or recv_packet_length > PROTOCOL_MAX_FRAME_SIZE:
+            yield (ROUTINE_SEND, MESSAGE_NOK.encode())
+            raise ValueError(f"Received bad packet length : {recv_packet_length}")
+
+        yield (ROUTINE_SEND, MESSAGE_OK.encode())
+
+        recv_packet = yield from self._recv_into_buffer_routine(recv_packet_length)
+        decrypted_recv_request = self.aes_wrapper.decryptData(recv_packet[:-16])
+
+        self.aes_wrapper.setKey(self.aes_wrapper.getKey()[0], bytes(recv_packet[-16:]))
+
+        return decrypted_recv_request
+
+    def sendPublicRSAKey(self) -> None:
+        self._execute_routine(self._send_public_rsa_key_routine())
+
+    def recvPublicRSAKey(self) -> None:
+        self._execute_routine(self._recv_public_rsa_key_routine())
+
+    def sendAESKey(self) -> None:
+        self._execute_routine(self._send_aes_key_routine())
+
+    def recvAESKey(self) -> None:
+        self._execute_routine(self._recv_aes_key_routine())
+
+    def exchangeKeys(self, receive_first: bool = DEFAULT_RECEIVE_FIRST) -> None:
+        self._execute_routine(self._exchange_keys_routine(receive_first))
+
+    def sendResponse(
+        self, success: bool, message: str, data: dict = {}, reason: str = None
+    ) -> None:
+        self._execute_routine(
+            self._send_response_routine(success, message, data, reason)
+        )
+
+    def recvRequest(self, store_request: bool = DEFAULT_STORE_REQUEST) -> tuple:
+        return self._execute_routine(self._recv_request_routine(store_request))
+
+    async def asyncExchangeKeys(
+        self, receive_first: bool = DEFAULT_RECEIVE_FIRST
+    ) -> None:
+        await self._async_execute_routine(self._exchange_keys_routine(receive_first))
+
+    async def asyncSendResponse(
+        self, success: bool, message: str, data: dict = {}, reason: str = None
+    ) -> None:
+        await self._async_execute_routine(
+            self._send_response_routine(success, message, data, reason)
+        )
+
+    async def asyncRecvRequest(
+        self, store_request: bool = DEFAULT_STORE_REQUEST
+    ) -> tuple:
+        return await self._async_execute_routine(
+            self._recv_request_routine(store_request)
+        )
+
     def closeConnection(self) -> None:
         self.socket.close()
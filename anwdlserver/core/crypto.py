@@ -4,21 +4,33 @@ See the LICENSE file for licensing informations
 ---
 
 This module provides the Anweddol server with RSA/AES encryption features.
-There is 2 provided encryption algorithms :
+There is 4 provided cryptographic algorithms :
 
  - RSA 4096 ;
  - AES 256 CBC ;
+ - AES 256 GCM ;
+ - X25519 key agreement ;
 
 """
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import cryptography.hazmat.primitives.padding as symetric_padding
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import serialization
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes
 from typing import Union
+import concurrent.futures
+import heapq
+import multiprocessing
+import threading
+import queue
+import struct
+import time
 import os
 
 
@@ -31,6 +43,107 @@ DEFAULT_PEM_FORMAT = True
 DEFAULT_GENERATE_KEY_PAIR = True
 DEFAULT_DERIVATE_PUBLIC_KEY = False
 
+DEFAULT_IS_INITIATOR = False
+DEFAULT_ECDH_KEY_LIFETIME = 300
+DEFAULT_SESSION_TICKET_LIFETIME = 3600
+DEFAULT_MAX_REPLAY_CACHE_SIZE = 65536
+
+DEFAULT_RSA_KEY_POOL_SIZE = 2
+DEFAULT_RSA_KEY_POOL_TIMEOUT = None
+
+DEFAULT_RSA_OPERATION_POOL_MAX_WORKERS = 2
+DEFAULT_RSA_OPERATION_POOL_MAX_PENDING_OPERATIONS = 256
+DEFAULT_RSA_OPERATION_POOL_MAX_BATCH_SIZE = 16
+
+# Constants definition
+AES_GCM_DIRECTION_INITIATOR = 1
+AES_GCM_DIRECTION_RESPONDER = 2
+AES_GCM_MAX_COUNTER = 2**64 - 1
+
+X25519_PUBLIC_KEY_SIZE = 32
+
+SESSION_TICKET_ID_SIZE = 16
+SESSION_TICKET_SECRET_SIZE = 32
+SESSION_TICKET_KEY_DERIVATION_INFO = b"anweddol ticket key"
+
+RSA_OPERATION_DECRYPT = 0
+RSA_OPERATION_SIGN = 1
+
+# Private key loaded in each RSA operation pool worker process
+_worker_rsa_private_key = None
+
+
+def makeDerivedKey(
+    secret: bytes, info: bytes = None, key_size: int = DEFAULT_AES_KEY_SIZE
+) -> bytes:
+    return HKDF(
+        algorithm=hashes.SHA256(), length=int(key_size / 8), salt=None, info=info
+    ).derive(secret)
+
+
+# Executed in the key pool worker process, the key pair
+# is sent back serialized since key objects cannot be pickled
+def _generate_rsa_private_key(public_exponent, key_size):
+    return rsa.generate_private_key(
+        public_exponent=public_exponent, key_size=key_size
+    ).private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def _execute_rsa_operation(private_key, operation_kind, data):
+    if operation_kind == RSA_OPERATION_DECRYPT:
+        return private_key.decrypt(
+            data,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None,
+            ),
+        )
+
+    return private_key.sign(
+        data,
+        padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
+        ),
+        hashes.SHA256(),
+    )
+
+
+# Executed once in each operation pool worker process, since
+# key objects cannot be pickled along with the operations
+def _initialize_rsa_operation_worker(private_key):
+    global _worker_rsa_private_key
+
+    _worker_rsa_private_key = serialization.load_pem_private_key(
+        private_key, password=None, unsafe_skip_rsa_key_validation=True
+    )
+
+
+# Executed in an operation pool worker process, a failed operation
+# is sent back as an exception without failing the whole batch
+def _execute_rsa_operation_batch(operation_list):
+    result_list = []
+
+    for operation_kind, data in operation_list:
+        try:
+            result_list.append(
+                (
+                    True,
+                    _execute_rsa_operation(
+                        _worker_rsa_private_key, operation_kind, data
+                    ),
+                )
+            )
+
+        except Exception as E:
+            result_list.append((False, ValueError(str(E))))
+
+    return result_list
+
 
 class RSAWrapper:
     def __init__(
@@ -43,6 +156,9 @@ class RSAWrapper:
         self.private_key = None
         self.public_key = None
 
+        # Optional, private key operations are executed inline without it
+        self.operation_pool = None
+
         if generate_key_pair:
             self.generateKeyPair(public_exponent, key_size)
 
@@ -59,6 +175,22 @@ class RSAWrapper:
     def getKeySize(self) -> Union[None, int]:
         return self.public_key.key_size if self.public_key else None
 
+    # Sessions store the remote public key on their wrapper, so concurrent
+    # sessions must each use their own wrapper around the same local key pair
+    def makeSessionWrapper(self) -> "RSAWrapper":
+        session_rsa_wrapper = RSAWrapper(generate_key_pair=False)
+        session_rsa_wrapper.private_key = self.private_key
+        session_rsa_wrapper.public_key = self.public_key
+        session_rsa_wrapper.operation_pool = self.operation_pool
+
+        return session_rsa_wrapper
+
+    def getOperationPool(self) -> Union[None, "RSAOperationPool"]:
+        return self.operation_pool
+
+    def setOperationPool(self, operation_pool: Union[None, "RSAOperationPool"]) -> None:
+        self.operation_pool = operation_pool
+
     def getPublicKey(
         self, pem_format: bool = DEFAULT_PEM_FORMAT
     ) -> Union[None, str, bytes]:
@@ -169,13 +301,10 @@ class RSAWrapper:
         if not self.private_key:
             raise ValueError("Local private key is not set")
 
-        decrypted_data = self.private_key.decrypt(
-            cipher,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None,
-            ),
+        decrypted_data = (
+            self.operation_pool.executeOperation(RSA_OPERATION_DECRYPT, bytes(cipher))
+            if self.operation_pool
+            else _execute_rsa_operation(self.private_key, RSA_OPERATION_DECRYPT, cipher)
         )
 
         return decrypted_data.decode() if decode else decrypted_data
@@ -186,12 +315,12 @@ class RSAWrapper:
 
         encoded_data = data.encode() if type(data) is str else data
 
-        return self.private_key.sign(
-            encoded_data,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256(),
+        return (
+            self.operation_pool.executeOperation(RSA_OPERATION_SIGN, encoded_data)
+            if self.operation_pool
+            else _execute_rsa_operation(
+                self.private_key, RSA_OPERATION_SIGN, encoded_data
+            )
         )
 
     # `signature` is the signed data, `data` is the data itself
@@ -218,6 +347,388 @@ class RSAWrapper:
             return False
 
 
+# Pre-generates RSA key pairs in a separate process, so that
+# drawing a key pair does not block on its generation
+class RSAKeyPool:
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_RSA_KEY_POOL_SIZE,
+        public_exponent: int = DEFAULT_RSA_EXPONENT,
+        key_size: int = DEFAULT_RSA_KEY_SIZE,
+    ):
+        if pool_size < 1:
+            raise ValueError("Pool size must be greater than 0")
+
+        self.pool_size = pool_size
+        self.public_exponent = public_exponent
+        self.key_size = key_size
+
+        self.private_key_list = []
+        self.pool_condition = threading.Condition()
+        self.pending_generations_amount = 0
+        self.executor = None
+        self.is_running = False
+
+        self.hits_amount = 0
+        self.misses_amount = 0
+        self.total_wait_time = 0
+        self.max_wait_time = 0
+
+    def __del__(self):
+        if self.is_running:
+            self.stopPool()
+
+    def _refill_pool(self):
+        while (
+            self.is_running
+            and len(self.private_key_list) + self.pending_generations_amount
+            < self.pool_size
+        ):
+            try:
+                future = self.executor.submit(
+                    _generate_rsa_private_key, self.public_exponent, self.key_size
+                )
+
+            # The worker process died, key pairs are
+            # generated by the drawing threads from now
+            except concurrent.futures.process.BrokenProcessPool:
+                return
+
+            self.pending_generations_amount += 1
+            future.add_done_callback(self._handle_generation_done)
+
+    def _handle_generation_done(self, future):
+        with self.pool_condition:
+            self.pending_generations_amount -= 1
+
+            # The waiting threads generate their key pair themselves
+            # if the worker process is unable to do it
+            if not future.cancelled() and not future.exception():
+                self.private_key_list.append(future.result())
+
+            self.pool_condition.notify_all()
+
+    # The key pairs were generated by the pool itself, so the costly
+    # consistency checks done when loading a foreign key are skipped
+    def _make_rsa_wrapper(self, private_key):
+        rsa_wrapper = RSAWrapper(generate_key_pair=False)
+        rsa_wrapper.private_key = serialization.load_pem_private_key(
+            private_key, password=None, unsafe_skip_rsa_key_validation=True
+        )
+        rsa_wrapper.public_key = rsa_wrapper.private_key.public_key()
+
+        return rsa_wrapper
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getPoolSize(self) -> int:
+        return self.pool_size
+
+    def getKeySize(self) -> int:
+        return self.key_size
+
+    def getStatistics(self) -> tuple:
+        with self.pool_condition:
+            return (
+                len(self.private_key_list),
+                self.hits_amount,
+                self.misses_amount,
+                (
+                    self.total_wait_time / self.misses_amount
+                    if self.misses_amount
+                    else 0
+                ),
+                self.max_wait_time,
+            )
+
+    def startPool(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Key pool is already running")
+
+        # A spawned worker does not inherit the threads and
+        # sockets of the server process
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+
+        with self.pool_condition:
+            self.is_running = True
+            self._refill_pool()
+
+    def stopPool(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Key pool is not running")
+
+        with self.pool_condition:
+            self.is_running = False
+            self.pool_condition.notify_all()
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def getRSAWrapper(
+        self, timeout: Union[None, int] = DEFAULT_RSA_KEY_POOL_TIMEOUT
+    ) -> RSAWrapper:
+        with self.pool_condition:
+            if self.private_key_list:
+                self.hits_amount += 1
+                private_key = self.private_key_list.pop()
+
+                self._refill_pool()
+
+                return self._make_rsa_wrapper(private_key)
+
+            self.misses_amount += 1
+            wait_start_time = time.monotonic()
+
+            self._refill_pool()
+            self.pool_condition.wait_for(
+                lambda: self.private_key_list
+                or not self.pending_generations_amount
+                or not self.is_running,
+                timeout,
+            )
+
+            private_key = self.private_key_list.pop() if self.private_key_list else None
+
+            self._refill_pool()
+
+        rsa_wrapper = (
+            self._make_rsa_wrapper(private_key)
+            if private_key
+            else RSAWrapper(
+                public_exponent=self.public_exponent, key_size=self.key_size
+            )
+        )
+
+        wait_time = time.monotonic() - wait_start_time
+
+        with self.pool_condition:
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        return rsa_wrapper
+
+
+# Executes the RSA private key operations in worker processes, so that
+# concurrent key exchanges are not serialized on a single core
+class RSAOperationPool:
+    def __init__(
+        self,
+        rsa_wrapper: RSAWrapper,
+        max_workers: int = DEFAULT_RSA_OPERATION_POOL_MAX_WORKERS,
+        max_pending_operations: int = DEFAULT_RSA_OPERATION_POOL_MAX_PENDING_OPERATIONS,
+        max_batch_size: int = DEFAULT_RSA_OPERATION_POOL_MAX_BATCH_SIZE,
+    ):
+        if max_workers < 1:
+            raise ValueError("Workers amount must be greater than 0")
+
+        if not rsa_wrapper.getPrivateKey(pem_format=False):
+            raise ValueError("Local private key is not set")
+
+        self.rsa_wrapper = rsa_wrapper
+        self.max_workers = max_workers
+        self.max_pending_operations = max_pending_operations
+        self.max_batch_size = max_batch_size
+
+        # When it is full, the operations are executed inline
+        self.operation_queue = queue.Queue(maxsize=max_pending_operations)
+        self.batch_slot_semaphore = threading.BoundedSemaphore(max_workers)
+        self.pool_lock = threading.Lock()
+        self.dispatch_thread = None
+        self.executor = None
+        self.is_running = False
+
+        self.pending_operations_amount = 0
+        self.pooled_operations_amount = 0
+        self.inline_operations_amount = 0
+        self.batches_amount = 0
+        self.total_latency = 0
+        self.max_latency = 0
+
+    def __del__(self):
+        if self.is_running:
+            self.stopPool()
+
+    # Operations queued while every worker is busy are sent in a single batch
+    def _dispatch_routine(self):
+        is_stopping = False
+
+        while not is_stopping:
+            operation = self.operation_queue.get()
+
+            if not operation:
+                break
+
+            self.batch_slot_semaphore.acquire()
+            operation_list = [operation]
+
+            while len(operation_list) < self.max_batch_size:
+                try:
+                    operation = self.operation_queue.get_nowait()
+
+                except queue.Empty:
+                    break
+
+                if not operation:
+                    is_stopping = True
+                    break
+
+                operation_list.append(operation)
+
+            try:
+                batch_future = self.executor.submit(
+                    _execute_rsa_operation_batch,
+                    [
+                        (operation_kind, data)
+                        for operation_kind, data, _, _ in operation_list
+                    ],
+                )
+
+            # The worker processes died, the waiting
+            # threads execute their operation themselves
+            except (concurrent.futures.process.BrokenProcessPool, RuntimeError):
+                self._handle_batch_done(operation_list, None)
+                continue
+
+            batch_future.add_done_callback(
+                lambda future, operation_list=operation_list: self._handle_batch_done(
+                    operation_list, future
+                )
+            )
+
+    def _handle_batch_done(self, operation_list, batch_future):
+        self.batch_slot_semaphore.release()
+
+        if not batch_future or batch_future.cancelled() or batch_future.exception():
+            for _, _, future, _ in operation_list:
+                future.cancel()
+
+            with self.pool_lock:
+                self.pending_operations_amount -= len(operation_list)
+
+            return
+
+        actual_time = time.monotonic()
+
+        with self.pool_lock:
+            self.pending_operations_amount -= len(operation_list)
+            self.pooled_operations_amount += len(operation_list)
+            self.batches_amount += 1
+
+            for _, _, _, submit_time in operation_list:
+                self.total_latency += actual_time - submit_time
+                self.max_latency = max(self.max_latency, actual_time - submit_time)
+
+        for (_, _, future, _), (is_success, result) in zip(
+            operation_list, batch_future.result()
+        ):
+            if is_success:
+                future.set_result(result)
+
+            else:
+                future.set_exception(result)
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getRSAWrapper(self) -> RSAWrapper:
+        return self.rsa_wrapper
+
+    def getMaxWorkers(self) -> int:
+        return self.max_workers
+
+    def getMaxPendingOperations(self) -> int:
+        return self.max_pending_operations
+
+    def getStatistics(self) -> tuple:
+        with self.pool_lock:
+            return (
+                self.pending_operations_amount,
+                self.pooled_operations_amount,
+                self.inline_operations_amount,
+                (
+                    self.pooled_operations_amount / self.batches_amount
+                    if self.batches_amount
+                    else 0
+                ),
+                (
+                    self.total_latency / self.pooled_operations_amount
+                    if self.pooled_operations_amount
+                    else 0
+                ),
+                self.max_latency,
+            )
+
+    def startPool(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Operation pool is already running")
+
+        # A spawned worker does not inherit the threads and
+        # sockets of the server process
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_rsa_operation_worker,
+            initargs=(self.rsa_wrapper.getPrivateKey(),),
+        )
+
+        # Workers are spawned on demand, which takes a while
+        # since they load the key, so they are all spawned now
+        for _ in range(self.max_workers):
+            self.executor.submit(_execute_rsa_operation_batch, [])
+
+        self.dispatch_thread = threading.Thread(
+            target=self._dispatch_routine, daemon=True
+        )
+        self.dispatch_thread.start()
+
+        self.is_running = True
+
+    # The operations queued before the pool is stopped are still executed
+    def stopPool(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Operation pool is not running")
+
+        with self.pool_lock:
+            self.is_running = False
+
+        self.operation_queue.put(None)
+        self.dispatch_thread.join()
+
+        self.executor.shutdown(wait=True)
+
+    # Blocks until the operation is executed, and raises ValueError if it failed
+    def executeOperation(self, operation_kind: int, data: bytes) -> bytes:
+        future = concurrent.futures.Future()
+
+        with self.pool_lock:
+            try:
+                if not self.is_running:
+                    raise queue.Full()
+
+                self.operation_queue.put_nowait(
+                    (operation_kind, data, future, time.monotonic())
+                )
+                self.pending_operations_amount += 1
+
+            except queue.Full:
+                future = None
+                self.inline_operations_amount += 1
+
+        if future:
+            try:
+                return future.result()
+
+            except concurrent.futures.CancelledError:
+                with self.pool_lock:
+                    self.inline_operations_amount += 1
+
+        return _execute_rsa_operation(
+            self.rsa_wrapper.getPrivateKey(pem_format=False), operation_kind, data
+        )
+
+
 class AESWrapper:
     def __init__(self, key_size: int = DEFAULT_AES_KEY_SIZE):
         self.key = os.urandom(int(key_size / 8))
@@ -264,3 +775,316 @@ class AESWrapper:
         )
 
         return decrypted_data.decode() if decode else decrypted_data
+
+
+# Nonces are made of the sender direction and a per-direction message
+# counter, so that a nonce is never reused under the same key and
+# out-of-order or replayed messages fail authentication
+class AESGCMWrapper:
+    def __init__(
+        self,
+        key_size: int = DEFAULT_AES_KEY_SIZE,
+        is_initiator: bool = DEFAULT_IS_INITIATOR,
+    ):
+        self.is_initiator = is_initiator
+        self.send_counter = 0
+        self.recv_counter = 0
+
+        self.setKey(os.urandom(int(key_size / 8)))
+
+    def _make_nonce(self, direction, counter):
+        if counter > AES_GCM_MAX_COUNTER:
+            raise RuntimeError("Message counter is exhausted, a new key is needed")
+
+        return struct.pack(">IQ", direction, counter)
+
+    def isInitiator(self) -> bool:
+        return self.is_initiator
+
+    def getKeySize(self) -> int:
+        return len(self.key) * 8
+
+    def getKey(self) -> bytes:
+        return self.key
+
+    def getCounters(self) -> tuple:
+        return (self.send_counter, self.recv_counter)
+
+    def setKey(self, key: bytes) -> None:
+        self.key = key
+        self.aesgcm = AESGCM(self.key)
+
+        self.send_counter = 0
+        self.recv_counter = 0
+
+    def setCounters(self, send_counter: int, recv_counter: int) -> None:
+        self.send_counter = send_counter
+        self.recv_counter = recv_counter
+
+    def encryptData(
+        self, data: Union[str, bytes], associated_data: bytes = None
+    ) -> bytes:
+        nonce = self._make_nonce(
+            AES_GCM_DIRECTION_INITIATOR
+            if self.is_initiator
+            else AES_GCM_DIRECTION_RESPONDER,
+            self.send_counter,
+        )
+        encoded_data = data.encode() if type(data) is str else data
+
+        cipher = self.aesgcm.encrypt(nonce, encoded_data, associated_data)
+        self.send_counter += 1
+
+        return cipher
+
+    def decryptData(
+        self, cipher: bytes, decode: bool = True, associated_data: bytes = None
+    ) -> Union[str, bytes]:
+        nonce = self._make_nonce(
+            AES_GCM_DIRECTION_RESPONDER
+            if self.is_initiator
+            else AES_GCM_DIRECTION_INITIATOR,
+            self.recv_counter,
+        )
+
+        # Raises InvalidTag if the cipher was altered or is not the expected one
+        decrypted_data = self.aesgcm.decrypt(nonce, cipher, associated_data)
+        self.recv_counter += 1
+
+        return decrypted_data.decode() if decode else decrypted_data
+
+
+class ECDHWrapper:
+    def __init__(self, generate_key_pair: bool = DEFAULT_GENERATE_KEY_PAIR):
+        self.private_key = None
+        self.public_key = None
+
+        if generate_key_pair:
+            self.generateKeyPair()
+
+    def generateKeyPair(self) -> None:
+        self.private_key = x25519.X25519PrivateKey.generate()
+        self.public_key = self.private_key.public_key()
+
+    # Public keys are exchanged as their 32 raw bytes
+    def getPublicKey(self) -> Union[None, bytes]:
+        return (
+            self.public_key.public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw,
+            )
+            if self.public_key
+            else None
+        )
+
+    def deriveKey(
+        self,
+        remote_public_key: bytes,
+        info: bytes = None,
+        key_size: int = DEFAULT_AES_KEY_SIZE,
+    ) -> bytes:
+        if not self.private_key:
+            raise ValueError("Local private key is not set")
+
+        shared_secret = self.private_key.exchange(
+            x25519.X25519PublicKey.from_public_bytes(remote_public_key)
+        )
+
+        return makeDerivedKey(shared_secret, info=info, key_size=key_size)
+
+
+# Signing a new ephemeral key for each connection would cost as much as the
+# RSA decryption it replaces, so the signed key is shared by the connections
+# until it is half expired. The signature covers the key and its expiry
+# timestamp, so that a peer does not accept an outdated key
+class ECDHKeyProvider:
+    def __init__(
+        self, rsa_wrapper: RSAWrapper, key_lifetime: int = DEFAULT_ECDH_KEY_LIFETIME
+    ):
+        self.rsa_wrapper = rsa_wrapper
+        self.key_lifetime = key_lifetime
+
+        self.provider_lock = threading.Lock()
+        self.signed_key_tuple = None
+        self.key_expiry_timestamp = 0
+
+    def getKeyLifetime(self) -> int:
+        return self.key_lifetime
+
+    def getRSAWrapper(self) -> RSAWrapper:
+        return self.rsa_wrapper
+
+    # Returns (ecdh_wrapper, signed_data, signature), where signed_data
+    # is the raw public key followed by its expiry timestamp
+    def getSignedKey(self) -> tuple:
+        with self.provider_lock:
+            if (
+                not self.signed_key_tuple
+                or self.key_expiry_timestamp - time.time() < self.key_lifetime / 2
+            ):
+                ecdh_wrapper = ECDHWrapper()
+
+                self.key_expiry_timestamp = int(time.time()) + self.key_lifetime
+                signed_data = ecdh_wrapper.getPublicKey() + struct.pack(
+                    ">Q", self.key_expiry_timestamp
+                )
+
+                self.signed_key_tuple = (
+                    ecdh_wrapper,
+                    signed_data,
+                    self.rsa_wrapper.signData(signed_data),
+                )
+
+            return self.signed_key_tuple
+
+
+# Tickets are sealed with a key derived from a master key and the actual
+# lifetime period, so the sealing key rotates with each period while the
+# processes forked from the same manager keep agreeing on it.
+# A redeemed ticket ID is kept in the replay cache until the ticket expires,
+# so that each ticket can only be redeemed once
+class SessionTicketManager:
+    def __init__(
+        self,
+        ticket_lifetime: int = DEFAULT_SESSION_TICKET_LIFETIME,
+        max_replay_cache_size: int = DEFAULT_MAX_REPLAY_CACHE_SIZE,
+    ):
+        self.ticket_lifetime = ticket_lifetime
+        self.max_replay_cache_size = max_replay_cache_size
+
+        self.master_key = os.urandom(32)
+        self.ticket_key_dict = {}
+
+        # The tickets are not redeemed in their issue order, so the
+        # expiry timestamps of the redeemed ones are kept in a heap
+        self.replay_cache = set()
+        self.replay_cache_expiry_heap = []
+        self.manager_lock = threading.Lock()
+
+        self.issued_tickets_amount = 0
+        self.redeemed_tickets_amount = 0
+        self.refused_tickets_amount = 0
+
+    def _get_ticket_aesgcm(self, period):
+        ticket_aesgcm = self.ticket_key_dict.get(period)
+
+        if not ticket_aesgcm:
+            ticket_aesgcm = AESGCM(
+                makeDerivedKey(
+                    self.master_key,
+                    info=SESSION_TICKET_KEY_DERIVATION_INFO + struct.pack(">Q", period),
+                )
+            )
+
+            # Only the keys of the accepted periods are kept
+            for stored_period in list(self.ticket_key_dict):
+                if stored_period < period - 2:
+                    self.ticket_key_dict.pop(stored_period)
+
+            self.ticket_key_dict[period] = ticket_aesgcm
+
+        return ticket_aesgcm
+
+    def _refuse_ticket(self):
+        self.refused_tickets_amount += 1
+
+    def getTicketLifetime(self) -> int:
+        return self.ticket_lifetime
+
+    def getMaxReplayCacheSize(self) -> int:
+        return self.max_replay_cache_size
+
+    def getStatistics(self) -> tuple:
+        with self.manager_lock:
+            return (
+                self.issued_tickets_amount,
+                self.redeemed_tickets_amount,
+                self.refused_tickets_amount,
+                len(self.replay_cache),
+            )
+
+    def makeTicket(self, resumption_secret: bytes, protocol_version: int) -> bytes:
+        actual_timestamp = int(time.time())
+        period_header = struct.pack(">Q", actual_timestamp // self.ticket_lifetime)
+        nonce = os.urandom(12)
+
+        with self.manager_lock:
+            ticket_aesgcm = self._get_ticket_aesgcm(
+                actual_timestamp // self.ticket_lifetime
+            )
+            self.issued_tickets_amount += 1
+
+        return (
+            period_header
+            + nonce
+            + ticket_aesgcm.encrypt(
+                nonce,
+                os.urandom(SESSION_TICKET_ID_SIZE)
+                + bytes((protocol_version,))
+                + struct.pack(">Q", actual_timestamp + self.ticket_lifetime)
+                + resumption_secret,
+                period_header,
+            )
+        )
+
+    # Returns the ticket resumption secret, or None if the ticket is
+    # invalid, expired, already redeemed or for another protocol version
+    def redeemTicket(self, ticket: bytes, protocol_version: int) -> Union[None, bytes]:
+        actual_timestamp = int(time.time())
+        ticket_period = int.from_bytes(ticket[:8], "big")
+
+        with self.manager_lock:
+            if not (
+                actual_timestamp // self.ticket_lifetime - 2
+                <= ticket_period
+                <= actual_timestamp // self.ticket_lifetime
+            ):
+                self._refuse_ticket()
+                return None
+
+            try:
+                ticket_content = self._get_ticket_aesgcm(ticket_period).decrypt(
+                    ticket[8:20], ticket[20:], ticket[:8]
+                )
+
+            except Exception:
+                self._refuse_ticket()
+                return None
+
+            ticket_id = ticket_content[:SESSION_TICKET_ID_SIZE]
+            ticket_protocol_version = ticket_content[SESSION_TICKET_ID_SIZE]
+            ticket_expiry_timestamp = int.from_bytes(
+                ticket_content[SESSION_TICKET_ID_SIZE + 1 : SESSION_TICKET_ID_SIZE + 9],
+                "big",
+            )
+
+            if (
+                ticket_protocol_version != protocol_version
+                or ticket_expiry_timestamp < actual_timestamp
+            ):
+                self._refuse_ticket()
+                return None
+
+            while (
+                self.replay_cache_expiry_heap
+                and self.replay_cache_expiry_heap[0][0] < actual_timestamp
+            ):
+                _, expired_ticket_id = heapq.heappop(self.replay_cache_expiry_heap)
+                self.replay_cache.discard(expired_ticket_id)
+
+            # Evicting a living ticket ID would allow it to be replayed,
+            # so the ticket is refused instead if the cache is full
+            if (
+                ticket_id in self.replay_cache
+                or len(self.replay_cache) >= self.max_replay_cache_size
+            ):
+                self._refuse_ticket()
+                return None
+
+            self.replay_cache.add(ticket_id)
+            heapq.heappush(
+                self.replay_cache_expiry_heap, (ticket_expiry_timestamp, ticket_id)
+            )
+            self.redeemed_tickets_amount += 1
+
+            return ticket_content[SESSION_TICKET_ID_SIZE + 9 :]
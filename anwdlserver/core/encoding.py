@@ -0,0 +1,310 @@
+"""
+Copyright 2023 The Anweddol project
+See the LICENSE file for licensing informations
+---
+
+This module provides the Anweddol server with a compact binary
+encoding of requests and responses, an alternative to JSON.
+
+"""
+
+import base64
+import struct
+import re
+
+# Constants definition
+VALUE_NULL = 0x00
+VALUE_FALSE = 0x01
+VALUE_TRUE = 0x02
+VALUE_POSITIVE_INTEGER = 0x03
+VALUE_NEGATIVE_INTEGER = 0x04
+VALUE_FLOAT = 0x05
+VALUE_STRING = 0x06
+VALUE_LIST = 0x07
+VALUE_MAP = 0x08
+VALUE_UUID_STRING = 0x09
+VALUE_HEX_STRING = 0x0A
+VALUE_BASE64_STRING = 0x0B
+
+# Map keys are encoded as their index in this list plus one, 0 meaning that a
+# literal string follows. New fields must only be appended to this list
+FIELD_TAG_LIST = (
+    "verb",
+    "parameters",
+    "success",
+    "message",
+    "data",
+    "container_uuid",
+    "client_token",
+    "container_iso_sha256",
+    "container_username",
+    "container_password",
+    "container_listen_port",
+    "uptime",
+    "version",
+    "amount",
+    "containers",
+)
+FIELD_TAG_DICT = {field: tag for tag, field in enumerate(FIELD_TAG_LIST, 1)}
+
+# Shorter strings are always sent as UTF-8
+COMPACT_STRING_MIN_LENGTH = 16
+MAX_NESTING_DEPTH = 32
+
+UUID_STRING_REGEX = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z"
+)
+HEX_STRING_REGEX = re.compile(r"(?:[0-9a-f]{2})+\Z")
+BASE64_STRING_REGEX = re.compile(r"[0-9a-zA-Z_-]+\Z")
+
+FLOAT_STRUCT = struct.Struct(">d")
+
+# Varints hold unsigned 64 bit values, which take 10 bytes at most
+MAX_VARINT_VALUE = (1 << 64) - 1
+
+
+def _encode_varint(buffer, value):
+    if value > MAX_VARINT_VALUE:
+        raise ValueError("Integers must fit in 64 bits")
+
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+def _decode_varint(data, offset):
+    value = 0
+    shift = 0
+
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated payload")
+
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            if value > MAX_VARINT_VALUE:
+                raise ValueError("Malformed payload : varint is too large")
+
+            return (value, offset)
+
+        shift += 7
+
+        if shift > 63:
+            raise ValueError("Malformed payload : varint is too long")
+
+
+# Tokens, passwords, UUIDs and hashes only use a small alphabet,
+# so they are packed instead of being sent as UTF-8
+def _encode_string(buffer, value):
+    if len(value) >= COMPACT_STRING_MIN_LENGTH:
+        if UUID_STRING_REGEX.match(value):
+            buffer.append(VALUE_UUID_STRING)
+            buffer += bytes.fromhex(value.replace("-", ""))
+            return
+
+        if HEX_STRING_REGEX.match(value):
+            buffer.append(VALUE_HEX_STRING)
+            _encode_varint(buffer, len(value) // 2)
+            buffer += bytes.fromhex(value)
+            return
+
+        if BASE64_STRING_REGEX.match(value):
+            # Padding with 'A' chars keeps every group complete,
+            # the decoded string is then truncated to its length
+            buffer.append(VALUE_BASE64_STRING)
+            _encode_varint(buffer, len(value))
+            buffer += base64.urlsafe_b64decode(value + "A" * (-len(value) % 4))
+            return
+
+    encoded_value = value.encode()
+
+    buffer.append(VALUE_STRING)
+    _encode_varint(buffer, len(encoded_value))
+    buffer += encoded_value
+
+
+def _encode_value(buffer, value, depth):
+    value_type = type(value)
+
+    if value_type is str:
+        _encode_string(buffer, value)
+
+    elif value_type is bool:
+        buffer.append(VALUE_TRUE if value else VALUE_FALSE)
+
+    elif value_type is int:
+        if value >= 0:
+            buffer.append(VALUE_POSITIVE_INTEGER)
+            _encode_varint(buffer, value)
+
+        else:
+            buffer.append(VALUE_NEGATIVE_INTEGER)
+            _encode_varint(buffer, -value - 1)
+
+    elif value is None:
+        buffer.append(VALUE_NULL)
+
+    elif value_type is float:
+        buffer.append(VALUE_FLOAT)
+        buffer += FLOAT_STRUCT.pack(value)
+
+    else:
+        if depth >= MAX_NESTING_DEPTH:
+            raise ValueError("Maximum nesting depth exceeded")
+
+        if isinstance(value, dict):
+            buffer.append(VALUE_MAP)
+            _encode_varint(buffer, len(value))
+
+            for key, item in value.items():
+                if type(key) is not str:
+                    raise TypeError(f"Keys must be str, not {type(key).__name__}")
+
+                tag = FIELD_TAG_DICT.get(key)
+
+                if tag:
+                    _encode_varint(buffer, tag)
+
+                else:
+                    encoded_key = key.encode()
+
+                    buffer.append(0)
+                    _encode_varint(buffer, len(encoded_key))
+                    buffer += encoded_key
+
+                _encode_value(buffer, item, depth + 1)
+
+        elif isinstance(value, (list, tuple)):
+            buffer.append(VALUE_LIST)
+            _encode_varint(buffer, len(value))
+
+            for item in value:
+                _encode_value(buffer, item, depth + 1)
+
+        else:
+            raise TypeError(f"Object of type {value_type.__name__} is not serializable")
+
+
+def _decode_bytes(data, offset, length):
+    end_offset = offset + length
+
+    if end_offset > len(data):
+        raise ValueError("Truncated payload")
+
+    return (data[offset:end_offset], end_offset)
+
+
+def _decode_value(data, offset, depth):
+    if offset >= len(data):
+        raise ValueError("Truncated payload")
+
+    value_type = data[offset]
+    offset += 1
+
+    if value_type == VALUE_STRING:
+        length, offset = _decode_varint(data, offset)
+        value, offset = _decode_bytes(data, offset, length)
+
+        return (str(value, "utf-8"), offset)
+
+    if value_type == VALUE_POSITIVE_INTEGER:
+        return _decode_varint(data, offset)
+
+    if value_type == VALUE_MAP or value_type == VALUE_LIST:
+        if depth >= MAX_NESTING_DEPTH:
+            raise ValueError("Maximum nesting depth exceeded")
+
+        length, offset = _decode_varint(data, offset)
+
+        # Every item takes at least one byte
+        if length > len(data) - offset:
+            raise ValueError("Truncated payload")
+
+        if value_type == VALUE_LIST:
+            value = []
+
+            for _ in range(length):
+                item, offset = _decode_value(data, offset, depth + 1)
+                value.append(item)
+
+            return (value, offset)
+
+        value = {}
+
+        for _ in range(length):
+            tag, offset = _decode_varint(data, offset)
+
+            if tag:
+                if tag > len(FIELD_TAG_LIST):
+                    raise ValueError(f"Unknown field tag : {tag}")
+
+                key = FIELD_TAG_LIST[tag - 1]
+
+            else:
+                key_length, offset = _decode_varint(data, offset)
+                key, offset = _decode_bytes(data, offset, key_length)
+                key = str(key, "utf-8")
+
+            value[key], offset = _decode_value(data, offset, depth + 1)
+
+        return (value, offset)
+
+    if value_type == VALUE_TRUE or value_type == VALUE_FALSE:
+        return (value_type == VALUE_TRUE, offset)
+
+    if value_type == VALUE_NULL:
+        return (None, offset)
+
+    if value_type == VALUE_UUID_STRING:
+        value, offset = _decode_bytes(data, offset, 16)
+        value = value.hex()
+
+        return (
+            f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}",
+            offset,
+        )
+
+    if value_type == VALUE_HEX_STRING:
+        length, offset = _decode_varint(data, offset)
+        value, offset = _decode_bytes(data, offset, length)
+
+        return (value.hex(), offset)
+
+    if value_type == VALUE_BASE64_STRING:
+        length, offset = _decode_varint(data, offset)
+        value, offset = _decode_bytes(data, offset, -(-length // 4) * 3)
+
+        return (base64.urlsafe_b64encode(value)[:length].decode(), offset)
+
+    if value_type == VALUE_NEGATIVE_INTEGER:
+        value, offset = _decode_varint(data, offset)
+
+        return (-value - 1, offset)
+
+    if value_type == VALUE_FLOAT:
+        value, offset = _decode_bytes(data, offset, FLOAT_STRUCT.size)
+
+        return (FLOAT_STRUCT.unpack(value)[0], offset)
+
+    raise ValueError(f"Unknown value type : {value_type}")
+
+
+def encodePayload(content) -> bytes:
+    buffer = bytearray()
+    _encode_value(buffer, content, 0)
+
+    return bytes(buffer)
+
+
+def decodePayload(data: bytes):
+    content, offset = _decode_value(data, 0, 0)
+
+    if offset != len(data):
+        raise ValueError("Trailing data after the payload")
+
+    return content
@@ -9,32 +9,743 @@ communicate.
 
 """
 
-from typing import Union
+from typing import Callable, Union
 import subprocess
+import selectors
+import threading
 import secrets
+import socket
+import errno
 import time
 
-from .utilities import isPortBindable
+from collections import deque
 
 # Default values
 DEFAULT_STORE_FORWARDER = True
 DEFAULT_STOP_FORWARD = False
 DEFAULT_FORWARDABLE_PORT_RANGE = range(10000, 15000)
+DEFAULT_RELAY_BUFFER_SIZE = 65536
+DEFAULT_PORT_QUARANTINE_DURATION = 60
+DEFAULT_MARK_LISTENING_PORTS_BUSY = True
+
+# Constants definition
+FORWARDING_BACKEND_SOCAT = "socat"
+FORWARDING_BACKEND_SELECTOR = "selector"
+FORWARDING_BACKEND_NFTABLES = "nftables"
+
+NFTABLES_EXECUTABLE_PATH = "/usr/sbin/nft"
+NFTABLES_TABLE_NAME = "anweddol"
+NFTABLES_MAP_NAME = "forwarded_ports"
+
+FORWARDER_LISTEN_BACKLOG = 128
+
+PROC_NET_TCP_FILE_PATH_LIST = ["/proc/net/tcp", "/proc/net/tcp6"]
+PROC_NET_TCP_LISTEN_STATE = "0A"
+
+
+# Gives out random forwardable ports. Free ports are kept in a list
+# with an index, so that a port is reserved or removed by swapping it
+# with the last one. Released ports are kept in quarantine for a while
+# so that a client does not reach the container of the previous one
+class PortAllocator:
+    def __init__(
+        self,
+        port_range: Union[range, list] = DEFAULT_FORWARDABLE_PORT_RANGE,
+        quarantine_duration: int = DEFAULT_PORT_QUARANTINE_DURATION,
+    ):
+        self.port_range = port_range
+        self.quarantine_duration = quarantine_duration
+
+        self.free_port_list = []
+        self.free_port_index_dict = {}
+        self.reserved_port_set = set()
+        self.busy_port_set = set()
+        self.quarantined_port_deque = deque()
+        self.port_lock = threading.Lock()
+
+        for port in port_range:
+            self._add_free_port(port)
+
+    def _add_free_port(self, port):
+        self.free_port_index_dict.update({port: len(self.free_port_list)})
+        self.free_port_list.append(port)
+
+    def _remove_free_port(self, port):
+        port_index = self.free_port_index_dict.pop(port)
+        last_port = self.free_port_list.pop()
+
+        if last_port != port:
+            self.free_port_list[port_index] = last_port
+            self.free_port_index_dict.update({last_port: port_index})
+
+    # Must be called with the port lock acquired
+    def _release_quarantined_ports(self):
+        now = time.monotonic()
+
+        while self.quarantined_port_deque and self.quarantined_port_deque[0][0] <= now:
+            _, port = self.quarantined_port_deque.popleft()
+            self._add_free_port(port)
+
+    def _list_listening_ports(self):
+        listening_port_set = set()
+
+        for proc_net_tcp_file_path in PROC_NET_TCP_FILE_PATH_LIST:
+            try:
+                with open(proc_net_tcp_file_path, "r") as fd:
+                    # The first line is the columns header
+                    proc_net_tcp_line_list = fd.readlines()[1:]
+
+            except FileNotFoundError:
+                continue
+
+            for proc_net_tcp_line in proc_net_tcp_line_list:
+                field_list = proc_net_tcp_line.split()
+
+                if field_list[3] == PROC_NET_TCP_LISTEN_STATE:
+                    listening_port_set.add(int(field_list[1].split(":")[-1], 16))
+
+        return listening_port_set
+
+    def getPortRange(self) -> Union[range, list]:
+        return self.port_range
+
+    def getQuarantineDuration(self) -> int:
+        return self.quarantine_duration
+
+    def getFreePortsAmount(self) -> int:
+        with self.port_lock:
+            self._release_quarantined_ports()
+
+            return len(self.free_port_list)
+
+    def getStatistics(self) -> tuple:
+        with self.port_lock:
+            self._release_quarantined_ports()
+
+            return (
+                len(self.free_port_list),
+                len(self.reserved_port_set),
+                len(self.quarantined_port_deque),
+                len(self.busy_port_set),
+            )
+
+    def isPortReserved(self, port: int) -> bool:
+        return port in self.reserved_port_set
+
+    def markListeningPortsBusy(self) -> None:
+        listening_port_set = self._list_listening_ports()
+
+        with self.port_lock:
+            # Ports that were listening but are not anymore can be given out again
+            for port in self.busy_port_set - listening_port_set:
+                self.busy_port_set.discard(port)
+                self._add_free_port(port)
+
+            for port in listening_port_set:
+                if port in self.free_port_index_dict:
+                    self._remove_free_port(port)
+                    self.busy_port_set.add(port)
+
+    def reservePort(self, port: Union[None, int] = None) -> int:
+        with self.port_lock:
+            self._release_quarantined_ports()
+
+            if port is not None:
+                if port not in self.free_port_index_dict:
+                    raise ValueError(f"Port {port} is not available")
+
+            elif self.free_port_list:
+                port = self.free_port_list[secrets.randbelow(len(self.free_port_list))]
+
+            # Rather than failing, take the port that was released first
+            elif self.quarantined_port_deque:
+                _, port = self.quarantined_port_deque.popleft()
+                self._add_free_port(port)
+
+            else:
+                raise RuntimeError("All available ports are busy")
+
+            self._remove_free_port(port)
+            self.reserved_port_set.add(port)
+
+            return port
+
+    def releasePort(self, port: int) -> None:
+        with self.port_lock:
+            if port not in self.reserved_port_set:
+                raise ValueError(f"Port {port} is not reserved")
+
+            self.reserved_port_set.discard(port)
+            self.quarantined_port_deque.append(
+                (time.monotonic() + self.quarantine_duration, port)
+            )
 
 
 # Inspired from https://github.com/Dronehub/socatlord/blob/master/socatlord/operations.py
+# Spawns a 'socat' process per forwarder, which forks on each connection
+class SocatForwardingBackend:
+    def isForwarding(self, forwarder_instance) -> bool:
+        process = forwarder_instance.getProcess()
+
+        return (process.poll() is None) if process else False
+
+    def startForward(self, forwarder_instance) -> None:
+        command_list = [
+            "/bin/socat",
+            f"TCP-LISTEN:{forwarder_instance.getServerOriginPort()},fork,reuseaddr",
+            "TCP:{}:{}".format(
+                forwarder_instance.getContainerIP(),
+                forwarder_instance.getContainerDestinationPort(),
+            ),
+        ]
+        kw_args = {
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.DEVNULL,
+        }
+
+        forwarder_instance.setProcess(
+            subprocess.Popen(command_list, **kw_args, shell=False)
+        )
+
+    def stopForward(self, forwarder_instance) -> None:
+        forwarder_instance.getProcess().terminate()
+
+
+# A client connection relayed to a container domain, with one
+# buffer per direction taken from the backend buffer pool
+class _RelayConnection:
+    def __init__(self, forwarder_instance, client_sock, container_sock, buffers):
+        self.forwarder_instance = forwarder_instance
+        self.is_connecting = True
+        self.is_closed = False
+
+        self.peer_sock_dict = {client_sock: container_sock, container_sock: client_sock}
+
+        # Indexed by the socket the data is read from :
+        # [buffer, buffer view, pending start, pending end, EOF received]
+        self.direction_dict = {
+            client_sock: [buffers[0], memoryview(buffers[0]), 0, 0, False],
+            container_sock: [buffers[1], memoryview(buffers[1]), 0, 0, False],
+        }
+
+    def getBuffers(self):
+        return [direction[0] for direction in self.direction_dict.values()]
+
+    def getSockets(self):
+        return list(self.peer_sock_dict.keys())
+
+
+# Relays every forwarded port in this process, with a single
+# thread multiplexing the sockets with the best selector of the
+# system (epoll on Linux) instead of a process per connection
+class SelectorForwardingBackend:
+    def __init__(self, relay_buffer_size: int = DEFAULT_RELAY_BUFFER_SIZE):
+        self.relay_buffer_size = relay_buffer_size
+
+        self.selector = None
+        self.selector_thread = None
+        self.is_running = False
+
+        # Other threads request changes through this queue, which is
+        # executed by the selector thread after being woken up
+        self.pending_call_list = []
+        self.pending_call_list_lock = threading.Lock()
+        self.wakeup_recv_sock = None
+        self.wakeup_send_sock = None
+
+        self.listen_sock_dict = {}
+        self.listen_sock_dict_lock = threading.Lock()
+        self.relay_connection_set = set()
+        self.free_buffer_list = []
+
+    def __del__(self):
+        if self.is_running:
+            self.stopBackend()
+
+    def _call_in_selector_thread(self, routine, *args):
+        with self.pending_call_list_lock:
+            self.pending_call_list.append((routine, args))
+
+        try:
+            self.wakeup_send_sock.send(b"\0")
+
+        # The wakeup socket buffer is full, the thread is already woken up
+        except BlockingIOError:
+            pass
+
+    def _execute_pending_calls(self):
+        try:
+            while self.wakeup_recv_sock.recv(4096):
+                pass
+
+        except BlockingIOError:
+            pass
+
+        with self.pending_call_list_lock:
+            pending_call_list = self.pending_call_list
+            self.pending_call_list = []
+
+        for routine, args in pending_call_list:
+            routine(*args)
+
+    def _get_buffer(self):
+        if self.free_buffer_list:
+            return self.free_buffer_list.pop()
+
+        return bytearray(self.relay_buffer_size)
+
+    def _register_listen_sock(self, listen_sock, forwarder_instance):
+        self.selector.register(
+            listen_sock, selectors.EVENT_READ, (None, forwarder_instance)
+        )
+
+    def _unregister_listen_sock(self, listen_sock, forwarder_instance):
+        self.selector.unregister(listen_sock)
+        listen_sock.close()
+
+        # Close the connections relayed to the forwarder container domain
+        for relay_connection in list(self.relay_connection_set):
+            if relay_connection.forwarder_instance is forwarder_instance:
+                self._close_relay_connection(relay_connection)
+
+    def _accept_connection(self, listen_sock, forwarder_instance):
+        try:
+            client_sock, _ = listen_sock.accept()
+
+        except (BlockingIOError, InterruptedError):
+            return
+
+        client_sock.setblocking(False)
+
+        container_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        container_sock.setblocking(False)
+
+        relay_connection = _RelayConnection(
+            forwarder_instance,
+            client_sock,
+            container_sock,
+            [self._get_buffer(), self._get_buffer()],
+        )
+        self.relay_connection_set.add(relay_connection)
+
+        connect_result = container_sock.connect_ex(
+            (
+                forwarder_instance.getContainerIP(),
+                forwarder_instance.getContainerDestinationPort(),
+            )
+        )
+
+        if connect_result not in (0, errno.EINPROGRESS):
+            self._close_relay_connection(relay_connection)
+            return
+
+        # The client is only read once the container domain is connected
+        self.selector.register(
+            container_sock, selectors.EVENT_WRITE, (relay_connection, None)
+        )
+
+    def _close_relay_connection(self, relay_connection):
+        if relay_connection.is_closed:
+            return
+
+        relay_connection.is_closed = True
+        self.relay_connection_set.discard(relay_connection)
+
+        for sock in relay_connection.getSockets():
+            try:
+                self.selector.unregister(sock)
+
+            except (KeyError, ValueError):
+                pass
+
+            sock.close()
+
+        self.free_buffer_list.extend(relay_connection.getBuffers())
+
+    def _update_interest(self, relay_connection, sock):
+        peer_sock = relay_connection.peer_sock_dict[sock]
+        _, _, start, end, eof_received = relay_connection.direction_dict[sock]
+        _, _, peer_start, peer_end, _ = relay_connection.direction_dict[peer_sock]
+
+        # A socket is read when what was previously read from it has been
+        # sent to its peer, and written when data from its peer is pending
+        events = 0
+
+        if start == end and not eof_received:
+            events |= selectors.EVENT_READ
+
+        if peer_start != peer_end:
+            events |= selectors.EVENT_WRITE
+
+        try:
+            selector_key = self.selector.get_key(sock)
+
+        except KeyError:
+            selector_key = None
+
+        # A socket can not stay registered without events
+        if not events:
+            if selector_key:
+                self.selector.unregister(sock)
+
+        elif not selector_key:
+            self.selector.register(sock, events, (relay_connection, None))
+
+        elif selector_key.events != events:
+            self.selector.modify(sock, events, (relay_connection, None))
+
+    def _flush_direction(self, relay_connection, sock):
+        peer_sock = relay_connection.peer_sock_dict[sock]
+        direction = relay_connection.direction_dict[sock]
+        _, buffer_view, start, end, eof_received = direction
+
+        if start != end:
+            try:
+                direction[2] += peer_sock.send(buffer_view[start:end])
+
+            except (BlockingIOError, InterruptedError):
+                pass
+
+            if direction[2] == direction[3]:
+                direction[2] = direction[3] = 0
+
+        if direction[2] == direction[3] and eof_received:
+            try:
+                peer_sock.shutdown(socket.SHUT_WR)
+
+            except OSError:
+                pass
+
+    def _handle_relay_event(self, relay_connection, sock, events):
+        if relay_connection.is_closed:
+            return
+
+        peer_sock = relay_connection.peer_sock_dict[sock]
+
+        try:
+            if relay_connection.is_connecting:
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                    self._close_relay_connection(relay_connection)
+                    return
+
+                relay_connection.is_connecting = False
+
+            else:
+                if events & selectors.EVENT_WRITE:
+                    self._flush_direction(relay_connection, peer_sock)
+
+                direction = relay_connection.direction_dict[sock]
+
+                if events & selectors.EVENT_READ and direction[2] == direction[3]:
+                    try:
+                        read_size = sock.recv_into(direction[0])
+
+                    except (BlockingIOError, InterruptedError):
+                        read_size = None
+
+                    if read_size == 0:
+                        direction[4] = True
+
+                    elif read_size:
+                        direction[3] = read_size
+
+                    # Try to send the data right away, the peer is
+                    # only polled for writing if it can not take it all
+                    self._flush_direction(relay_connection, sock)
+
+            direction_list = relay_connection.direction_dict.values()
+
+            if all(
+                direction[4] and direction[2] == direction[3]
+                for direction in direction_list
+            ):
+                self._close_relay_connection(relay_connection)
+                return
+
+            for relay_sock in relay_connection.getSockets():
+                self._update_interest(relay_connection, relay_sock)
+
+        except OSError:
+            self._close_relay_connection(relay_connection)
+
+    def _selector_routine(self):
+        while self.is_running:
+            for key, events in self.selector.select():
+                if key.fileobj is self.wakeup_recv_sock:
+                    self._execute_pending_calls()
+                    continue
+
+                relay_connection, forwarder_instance = key.data
+
+                if forwarder_instance:
+                    self._accept_connection(key.fileobj, forwarder_instance)
+
+                else:
+                    self._handle_relay_event(relay_connection, key.fileobj, events)
+
+        for relay_connection in list(self.relay_connection_set):
+            self._close_relay_connection(relay_connection)
+
+        self.selector.close()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getRelayBufferSize(self) -> int:
+        return self.relay_buffer_size
+
+    def getRelayedConnectionsAmount(self) -> int:
+        return len(self.relay_connection_set)
+
+    def isForwarding(self, forwarder_instance) -> bool:
+        with self.listen_sock_dict_lock:
+            return forwarder_instance in self.listen_sock_dict.values()
+
+    def startForward(self, forwarder_instance) -> None:
+        if not self.is_running:
+            self.startBackend()
+
+        # The port is bound in the calling thread so
+        # that a bind error is raised to the caller
+        listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        try:
+            listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listen_sock.bind(("", forwarder_instance.getServerOriginPort()))
+            listen_sock.listen(FORWARDER_LISTEN_BACKLOG)
+            listen_sock.setblocking(False)
+
+        except Exception as E:
+            listen_sock.close()
+            raise E
+
+        with self.listen_sock_dict_lock:
+            self.listen_sock_dict.update({listen_sock: forwarder_instance})
+
+        self._call_in_selector_thread(
+            self._register_listen_sock, listen_sock, forwarder_instance
+        )
+
+    def stopForward(self, forwarder_instance) -> None:
+        with self.listen_sock_dict_lock:
+            for listen_sock, stored_forwarder_instance in self.listen_sock_dict.items():
+                if stored_forwarder_instance is forwarder_instance:
+                    self.listen_sock_dict.pop(listen_sock)
+                    break
+
+            else:
+                raise RuntimeError("Forwarder is not registered on this backend")
+
+        self._call_in_selector_thread(
+            self._unregister_listen_sock, listen_sock, forwarder_instance
+        )
+
+    def startBackend(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Forwarding backend is already running")
+
+        self.selector = selectors.DefaultSelector()
+        self.wakeup_recv_sock, self.wakeup_send_sock = socket.socketpair()
+        self.wakeup_recv_sock.setblocking(False)
+        self.wakeup_send_sock.setblocking(False)
+        self.selector.register(self.wakeup_recv_sock, selectors.EVENT_READ)
+
+        self.is_running = True
+
+        self.selector_thread = threading.Thread(
+            target=self._selector_routine, daemon=True
+        )
+        self.selector_thread.start()
+
+    def stopBackend(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Forwarding backend is not running")
+
+        with self.listen_sock_dict_lock:
+            listen_sock_list = list(self.listen_sock_dict.items())
+            self.listen_sock_dict = {}
+
+        for listen_sock, forwarder_instance in listen_sock_list:
+            self._call_in_selector_thread(
+                self._unregister_listen_sock, listen_sock, forwarder_instance
+            )
+
+        def stop():
+            self.is_running = False
+
+        self._call_in_selector_thread(stop)
+        self.selector_thread.join()
+
+        self.wakeup_recv_sock.close()
+        self.wakeup_send_sock.close()
+        self.selector_thread = None
+
+
+# Lets the kernel forward the connections with DNAT rules, so that the
+# packets are never copied to user space. Every forwarded port is an
+# element of a single nftables map, matched by a single rule
+class NftablesForwardingBackend:
+    def __init__(
+        self,
+        rule_executor: Union[None, Callable] = None,
+        table_name: str = NFTABLES_TABLE_NAME,
+    ):
+        self.rule_executor = (
+            rule_executor if rule_executor else self._execute_nftables_command
+        )
+        self.table_name = table_name
+
+        self.is_initialized = False
+        self.initialization_lock = threading.Lock()
+
+    def _execute_nftables_command(self, command):
+        result = subprocess.run(
+            [NFTABLES_EXECUTABLE_PATH, command],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            shell=False,
+        )
+
+        if result.returncode:
+            raise RuntimeError(
+                f"nftables command failed (command='{command}', stderr='{result.stderr.decode().rstrip()}')"
+            )
+
+        return result.stdout.decode()
+
+    def _make_map_element(self, forwarder_instance, with_destination=True):
+        if not with_destination:
+            return f"{{ {forwarder_instance.getServerOriginPort()} }}"
+
+        return "{{ {} : {} . {} }}".format(
+            forwarder_instance.getServerOriginPort(),
+            forwarder_instance.getContainerIP(),
+            forwarder_instance.getContainerDestinationPort(),
+        )
+
+    def isInitialized(self) -> bool:
+        return self.is_initialized
+
+    def getTableName(self) -> str:
+        return self.table_name
+
+    def getRuleExecutor(self) -> Callable:
+        return self.rule_executor
+
+    def initializeRules(self) -> None:
+        with self.initialization_lock:
+            table = f"ip {self.table_name}"
+
+            # Deleting the table removes every stale forwarding rule left by a
+            # previous run at once. It is added first since deleting a table
+            # that does not exist is an error
+            self.rule_executor(f"add table {table}")
+            self.rule_executor(f"delete table {table}")
+
+            self.rule_executor(f"add table {table}")
+            self.rule_executor(
+                f"add map {table} {NFTABLES_MAP_NAME} {{ type inet_service : ipv4_addr . inet_service ; }}"
+            )
+
+            # Connections coming from outside, and from the server host itself
+            self.rule_executor(
+                f"add chain {table} prerouting {{ type nat hook prerouting priority dstnat ; }}"
+            )
+            self.rule_executor(
+                f"add rule {table} prerouting dnat ip addr . port to tcp dport map @{NFTABLES_MAP_NAME}"
+            )
+            self.rule_executor(
+                f"add chain {table} output {{ type nat hook output priority -100 ; }}"
+            )
+            self.rule_executor(
+                f"add rule {table} output fib daddr type local dnat ip addr . port to tcp dport map @{NFTABLES_MAP_NAME}"
+            )
+
+            self.is_initialized = True
+
+    def clearRules(self) -> None:
+        with self.initialization_lock:
+            self.rule_executor(f"delete table ip {self.table_name}")
+            self.is_initialized = False
+
+    def isForwarding(self, forwarder_instance) -> bool:
+        if not self.is_initialized:
+            return False
+
+        try:
+            output = self.rule_executor(
+                "get element ip {} {} {}".format(
+                    self.table_name,
+                    NFTABLES_MAP_NAME,
+                    self._make_map_element(forwarder_instance, with_destination=False),
+                )
+            )
+
+        # The element does not exist
+        except RuntimeError:
+            return False
+
+        return (
+            ": {} . {}".format(
+                forwarder_instance.getContainerIP(),
+                forwarder_instance.getContainerDestinationPort(),
+            )
+            in output
+        )
+
+    def startForward(self, forwarder_instance) -> None:
+        if not self.is_initialized:
+            self.initializeRules()
+
+        self.rule_executor(
+            "add element ip {} {} {}".format(
+                self.table_name,
+                NFTABLES_MAP_NAME,
+                self._make_map_element(forwarder_instance),
+            )
+        )
+
+    def stopForward(self, forwarder_instance) -> None:
+        self.rule_executor(
+            "delete element ip {} {} {}".format(
+                self.table_name,
+                NFTABLES_MAP_NAME,
+                self._make_map_element(forwarder_instance, with_destination=False),
+            )
+        )
+
+
 class ForwarderInstance:
+    __slots__ = (
+        "server_origin_port",
+        "container_ip",
+        "container_uuid",
+        "container_destination_port",
+        "forwarding_backend",
+        "process",
+    )
+
     def __init__(
         self,
         server_origin_port: int,
         container_ip: str,
         container_uuid: str,
         container_destination_port: int,
+        forwarding_backend: Union[
+            None,
+            SocatForwardingBackend,
+            SelectorForwardingBackend,
+            NftablesForwardingBackend,
+        ] = None,
     ):
         self.server_origin_port = server_origin_port
         self.container_ip = container_ip
         self.container_uuid = container_uuid
         self.container_destination_port = container_destination_port
+        self.forwarding_backend = (
+            forwarding_backend if forwarding_backend else SocatForwardingBackend()
+        )
 
         self.process = None
 
@@ -43,7 +754,7 @@ class ForwarderInstance:
             self.stopForward()
 
     def isForwarding(self) -> bool:
-        return (self.process.poll() is None) if self.process else False
+        return self.forwarding_backend.isForwarding(self)
 
     def getServerOriginPort(self) -> int:
         return self.server_origin_port
@@ -60,6 +771,13 @@ class ForwarderInstance:
     def getProcess(self) -> subprocess.Popen:
         return self.process
 
+    def getForwardingBackend(
+        self,
+    ) -> Union[
+        SocatForwardingBackend, SelectorForwardingBackend, NftablesForwardingBackend
+    ]:
+        return self.forwarding_backend
+
     def setServerOriginPort(self, server_origin_port: int) -> None:
         self.server_origin_port = server_origin_port
 
@@ -76,34 +794,40 @@ class ForwarderInstance:
         if self.isForwarding():
             raise RuntimeError("Forwarder process is already running")
 
-        command_list = [
-            "/bin/socat",
-            f"TCP-LISTEN:{self.server_origin_port},fork,reuseaddr",
-            f"TCP:{self.container_ip}:{self.container_destination_port}",
-        ]
-        kw_args = {
-            "stdin": subprocess.DEVNULL,
-            "stdout": subprocess.DEVNULL,
-            "stderr": subprocess.DEVNULL,
-        }
-
-        self.process = subprocess.Popen(command_list, **kw_args, shell=False)
+        self.forwarding_backend.startForward(self)
 
     def stopForward(self) -> None:
         if not self.isForwarding():
             raise RuntimeError("Forwarder process is not running")
 
-        self.process.terminate()
+        self.forwarding_backend.stopForward(self)
 
 
 class PortForwardingInterface:
     def __init__(
         self,
         forwardable_port_range: Union[range, list] = DEFAULT_FORWARDABLE_PORT_RANGE,
+        mark_listening_ports_busy: bool = DEFAULT_MARK_LISTENING_PORTS_BUSY,
+        forwarding_backend: Union[
+            None,
+            SocatForwardingBackend,
+            SelectorForwardingBackend,
+            NftablesForwardingBackend,
+        ] = None,
     ):
-        self.available_port_list = list(forwardable_port_range)
+        self.port_allocator = PortAllocator(forwardable_port_range)
+        self.mark_listening_ports_busy = mark_listening_ports_busy
         self.stored_forwarders_instance_dict = {}
 
+        # Ports already used by other programs are never given out
+        if mark_listening_ports_busy:
+            self.port_allocator.markListeningPortsBusy()
+
+        # Shared by every forwarder created by this interface
+        self.forwarding_backend = (
+            forwarding_backend if forwarding_backend else SocatForwardingBackend()
+        )
+
     def __del__(self):
         forwarder_deletion_list = []
 
@@ -119,6 +843,16 @@ class PortForwardingInterface:
         for container_ip in forwarder_deletion_list:
             self.stored_forwarders_instance_dict.pop(container_ip)
 
+    def getForwardingBackend(
+        self,
+    ) -> Union[
+        SocatForwardingBackend, SelectorForwardingBackend, NftablesForwardingBackend
+    ]:
+        return self.forwarding_backend
+
+    def getPortAllocator(self) -> PortAllocator:
+        return self.port_allocator
+
     def getStoredForwarder(self, container_uuid: str) -> Union[None, ForwarderInstance]:
         return self.stored_forwarders_instance_dict.get(container_uuid)
 
@@ -129,10 +863,15 @@ class PortForwardingInterface:
         if forwarder_instance.getContainerUUID() in self.listStoredForwarders():
             raise ValueError("A forwarder already exists for this container UUID")
 
+        # Forwarders created with 'createForwarder' already reserved their port
+        if not self.port_allocator.isPortReserved(
+            forwarder_instance.getServerOriginPort()
+        ):
+            self.port_allocator.reservePort(forwarder_instance.getServerOriginPort())
+
         self.stored_forwarders_instance_dict.update(
             {forwarder_instance.getContainerUUID(): forwarder_instance}
         )
-        self.available_port_list.remove(forwarder_instance.getServerOriginPort())
 
     def createForwarder(
         self,
@@ -141,31 +880,38 @@ class PortForwardingInterface:
         container_destination_port: int,
         store: bool = DEFAULT_STORE_FORWARDER,
     ) -> ForwarderInstance:
-        if not len(self.available_port_list):
-            raise RuntimeError("All available ports are busy")
-
-        new_server_origin_port = None
-
-        while True:
-            new_server_origin_port = secrets.choice(self.available_port_list)
-
-            if isPortBindable(new_server_origin_port):
-                break
-
-            time.sleep(1)
+        # Look for ports taken by other programs since the last check
+        if (
+            self.mark_listening_ports_busy
+            and not self.port_allocator.getFreePortsAmount()
+        ):
+            self.port_allocator.markListeningPortsBusy()
 
         new_forwarder_instance = ForwarderInstance(
-            secrets.choice(self.available_port_list),
+            self.port_allocator.reservePort(),
             container_ip,
             container_uuid,
             container_destination_port,
+            forwarding_backend=self.forwarding_backend,
         )
 
         if store:
-            self.storeForwarder(new_forwarder_instance)
+            try:
+                self.storeForwarder(new_forwarder_instance)
+
+            except Exception as E:
+                self.releaseForwarderPort(new_forwarder_instance)
+                raise E
 
         return new_forwarder_instance
 
+    def releaseForwarderPort(self, forwarder_instance: ForwarderInstance) -> None:
+        if forwarder_instance.getContainerUUID() in self.listStoredForwarders():
+            raise ValueError("The forwarder is stored, delete it instead")
+
+        if self.port_allocator.isPortReserved(forwarder_instance.getServerOriginPort()):
+            self.port_allocator.releasePort(forwarder_instance.getServerOriginPort())
+
     def deleteStoredForwarder(
         self, container_uuid: str, stop_forward: bool = DEFAULT_STOP_FORWARD
     ) -> None:
@@ -177,5 +923,7 @@ class PortForwardingInterface:
 
         self.stored_forwarders_instance_dict.pop(container_uuid, None)
 
-        if forwarder_instance:
-            self.available_port_list.append(forwarder_instance.getServerOriginPort())
+        if forwarder_instance and self.port_allocator.isPortReserved(
+            forwarder_instance.getServerOriginPort()
+        ):
+            self.port_allocator.releasePort(forwarder_instance.getServerOriginPort())
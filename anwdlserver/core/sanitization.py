@@ -8,46 +8,359 @@ request / response values and formats verification features.
 
 """
 
+import collections.abc
+import functools
 import cerberus
+import re
 
-
-def verifyRequestContent(request_dict: dict) -> tuple:
-    validator = cerberus.Validator()
-    validator.allow_unknown = True
-
-    request_verification_scheme = {
-        "verb": {
-            "type": "string",
-            "regex": r"^[A-Z]{1,}$",
-            "required": True,
+# Constants definition
+REQUEST_VERIFICATION_SCHEME = {
+    "verb": {
+        "type": "string",
+        "regex": r"^[A-Z]{1,}$",
+        "required": True,
+    },
+    "parameters": {
+        "type": "dict",
+        "required": True,
+        "schema": {
+            "container_uuid": {
+                "type": "string",
+                "regex": r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
+                "required": False,
+                "dependencies": ["client_token"],
+            },
+            "client_token": {
+                "type": "string",
+                "regex": r"^[0-9a-zA-Z-_]{255}$",
+                "required": False,
+                "dependencies": ["container_uuid"],
+            },
+            "amount": {
+                "type": "integer",
+                "required": False,
+                "min": 1,
+            },
         },
-        "parameters": {
-            "type": "dict",
-            "required": True,
-            "schema": {
-                "container_uuid": {
-                    "type": "string",
-                    "regex": r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
-                    "required": False,
-                    "dependencies": ["client_token"],
-                },
-                "client_token": {
-                    "type": "string",
-                    "regex": r"^[0-9a-zA-Z-_]{255}$",
-                    "required": False,
-                    "dependencies": ["container_uuid"],
+    },
+}
+
+# Response data fields describing a created container
+CONTAINER_CREDENTIALS_VERIFICATION_SCHEME = {
+    "container_uuid": {
+        "type": "string",
+        "regex": r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
+        "required": False,
+        "dependencies": [
+            "client_token",
+            "container_iso_sha256",
+            "container_username",
+            "container_password",
+            "container_listen_port",
+        ],
+    },
+    "client_token": {
+        "type": "string",
+        "regex": r"^[0-9a-zA-Z-_]{255}$",
+        "required": False,
+        "dependencies": [
+            "container_uuid",
+            "container_iso_sha256",
+            "container_username",
+            "container_password",
+            "container_listen_port",
+        ],
+    },
+    "container_iso_sha256": {
+        "type": "string",
+        "regex": r"^[a-f0-9]{64}$",
+        "required": False,
+        "dependencies": [
+            "container_uuid",
+            "client_token",
+            "container_username",
+            "container_password",
+            "container_listen_port",
+        ],
+    },
+    "container_username": {
+        "type": "string",
+        "regex": r"^user_[0-9]{5}$",
+        "required": False,
+        "dependencies": [
+            "container_uuid",
+            "client_token",
+            "container_iso_sha256",
+            "container_password",
+            "container_listen_port",
+        ],
+    },
+    "container_password": {
+        "type": "string",
+        "regex": r"^[a-zA-Z0-9]{1,}$",
+        "required": False,
+        "dependencies": [
+            "container_uuid",
+            "client_token",
+            "container_iso_sha256",
+            "container_username",
+            "container_listen_port",
+        ],
+    },
+    "container_listen_port": {
+        "type": "integer",
+        "required": False,
+        "min": 1,
+        "max": 65535,
+        "dependencies": [
+            "container_uuid",
+            "client_token",
+            "container_iso_sha256",
+            "container_username",
+            "container_password",
+        ],
+    },
+}
+
+RESPONSE_VERIFICATION_SCHEME = {
+    "success": {
+        "type": "boolean",
+        "required": True,
+    },
+    "message": {
+        "type": "string",
+        "required": True,
+    },
+    "data": {
+        "type": "dict",
+        "required": True,
+        "schema": CONTAINER_CREDENTIALS_VERIFICATION_SCHEME
+        | {
+            "containers": {
+                "type": "list",
+                "required": False,
+                "schema": {
+                    "type": "dict",
+                    "schema": CONTAINER_CREDENTIALS_VERIFICATION_SCHEME,
                 },
             },
+            "uptime": {
+                "type": "integer",
+                "required": False,
+                "dependencies": ["version"],
+                "min": 0,
+            },
+            "version": {
+                "type": "string",
+                "required": False,
+                "dependencies": ["uptime"],
+            },
         },
-    }
+    },
+}
+
+# Verbs natively handled by the server, which are known to match the
+# verb regex, so that it is not evaluated for them
+NATIVE_REQUEST_VERBS = ("CREATE", "BATCHCREATE", "DESTROY", "STAT")
+
+SCHEME_TYPE_DICT = {
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "dict": collections.abc.Mapping,
+    "list": (list, tuple),
+}
+SCHEME_SUPPORTED_RULES = (
+    "type",
+    "required",
+    "regex",
+    "dependencies",
+    "min",
+    "max",
+    "schema",
+)
+
+
+# Compiles a cerberus validation scheme, so that it is parsed and its regexes
+# are compiled only once. Only the rules used in this module are supported
+def _compile_scheme(scheme, known_values_dict={}):
+    compiled_scheme = {}
+
+    for field, rules in scheme.items():
+        for rule in rules:
+            if rule not in SCHEME_SUPPORTED_RULES:
+                raise ValueError(f"Unsupported validation rule : {rule}")
+
+        compiled_rule_list = []
+
+        for rule, constraint in rules.items():
+            if rule == "regex":
+                # Like cerberus, the pattern is always anchored at its end
+                compiled_rule_list.append(
+                    (
+                        rule,
+                        re.compile(
+                            constraint if constraint.endswith("$") else constraint + "$"
+                        ),
+                        constraint,
+                    )
+                )
+
+            elif rule == "schema":
+                # The schema of a list applies to each of its items
+                compiled_rule_list.append(
+                    (
+                        rule,
+                        _compile_scheme({None: constraint})[None]
+                        if rules["type"] == "list"
+                        else _compile_scheme(constraint),
+                        None,
+                    )
+                )
+
+            elif rule in ("dependencies", "min", "max"):
+                compiled_rule_list.append((rule, constraint, None))
+
+        compiled_scheme[field] = (
+            rules.get("required", False),
+            rules["type"],
+            SCHEME_TYPE_DICT[rules["type"]],
+            frozenset(known_values_dict.get(field, ())),
+            compiled_rule_list,
+        )
+
+    return compiled_scheme
+
+
+# Cerberus sorts its errors after each one is added, by field then by rule,
+# an error being lower than any other one of the same rule : the same
+# ordering is used so that the messages of a field are listed identically
+def _compare_errors(error, other_error):
+    if error[0] != other_error[0]:
+        return -1 if error[0] < other_error[0] else 1
+
+    return -1 if error[1] <= other_error[1] else 1
+
+
+_ERROR_SORT_KEY = functools.cmp_to_key(_compare_errors)
+
+
+def _add_error(error_list, field, rule, message):
+    error_list.append((field, rule, message))
+    error_list.sort(key=_ERROR_SORT_KEY)
+
+
+# Returns a copy of the document and its errors, which are the same as
+# the cerberus ones : a null value only leaves the dependencies to check,
+# and a type error skips the other rules
+def _validate_document(compiled_scheme, document):
+    validated_document = dict(document)
+    error_list = []
+
+    for field, value in document.items():
+        compiled_field = compiled_scheme.get(field)
+
+        if compiled_field is None:
+            continue
+
+        _, type_name, field_type, known_value_set, compiled_rule_list = compiled_field
+
+        if value is None:
+            _add_error(error_list, field, "nullable", "null value not allowed")
+
+        elif not isinstance(value, field_type):
+            _add_error(error_list, field, "type", f"must be of {type_name} type")
+            continue
+
+        for rule, constraint, pattern in compiled_rule_list:
+            if rule == "dependencies":
+                for dependency in constraint:
+                    if dependency not in document:
+                        _add_error(
+                            error_list,
+                            field,
+                            rule,
+                            f"field '{dependency}' is required",
+                        )
+
+            elif value is None:
+                continue
+
+            elif rule == "regex":
+                if value not in known_value_set and not constraint.match(value):
+                    _add_error(
+                        error_list,
+                        field,
+                        rule,
+                        f"value does not match regex '{pattern}'",
+                    )
+
+            elif rule == "min":
+                if value < constraint:
+                    _add_error(error_list, field, rule, f"min value is {constraint}")
+
+            elif rule == "max":
+                if value > constraint:
+                    _add_error(error_list, field, rule, f"max value is {constraint}")
+
+            elif rule == "schema":
+                # Like cerberus, the items of a list are validated
+                # as a document keyed by their index, and kept as is
+                if type_name == "list":
+                    _, schema_errors_dict = _validate_document(
+                        {index: constraint for index in range(len(value))},
+                        dict(enumerate(value)),
+                    )
+
+                else:
+                    validated_document[field], schema_errors_dict = _validate_document(
+                        constraint, value
+                    )
+
+                if schema_errors_dict:
+                    _add_error(error_list, field, rule, schema_errors_dict)
+
+    for field, compiled_field in compiled_scheme.items():
+        if compiled_field[0] and field not in document:
+            _add_error(error_list, field, "required", "required field")
+
+    errors_dict = {}
+
+    for field, _, message in error_list:
+        errors_dict.setdefault(field, []).append(message)
+
+    return (validated_document, errors_dict)
+
+
+def _verify_content(compiled_scheme, content_dict):
+    # Same exceptions as a cerberus validation
+    if content_dict is None:
+        raise cerberus.DocumentError("document is missing")
+
+    if not isinstance(content_dict, collections.abc.Mapping):
+        raise cerberus.DocumentError(
+            f"'{content_dict}' is not a document, must be a dict"
+        )
+
+    document, errors_dict = _validate_document(compiled_scheme, content_dict)
 
     return (
-        validator.validate(request_dict, request_verification_scheme),
-        validator.document if validator.document else None,
-        validator.errors if validator.errors else None,
+        not errors_dict,
+        document if document else None,
+        errors_dict if errors_dict else None,
     )
 
 
+COMPILED_REQUEST_VERIFICATION_SCHEME = _compile_scheme(
+    REQUEST_VERIFICATION_SCHEME, known_values_dict={"verb": NATIVE_REQUEST_VERBS}
+)
+COMPILED_RESPONSE_VERIFICATION_SCHEME = _compile_scheme(RESPONSE_VERIFICATION_SCHEME)
+
+
+def verifyRequestContent(request_dict: dict) -> tuple:
+    return _verify_content(COMPILED_REQUEST_VERIFICATION_SCHEME, request_dict)
+
+
 def makeResponse(
     success: bool, message: str, data: dict = {}, reason: str = None
 ) -> tuple:
@@ -56,112 +369,5 @@ def makeResponse(
         "message": message + (f" ({reason})" if reason else ""),
         "data": data,
     }
-    validator = cerberus.Validator()
-    validator.allow_unknown = True
-
-    response_verification_scheme = {
-        "success": {
-            "type": "boolean",
-            "required": True,
-        },
-        "message": {
-            "type": "string",
-            "required": True,
-        },
-        "data": {
-            "type": "dict",
-            "required": True,
-            "schema": {
-                "container_uuid": {
-                    "type": "string",
-                    "regex": r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
-                    "required": False,
-                    "dependencies": [
-                        "client_token",
-                        "container_iso_sha256",
-                        "container_username",
-                        "container_password",
-                        "container_listen_port",
-                    ],
-                },
-                "client_token": {
-                    "type": "string",
-                    "regex": r"^[0-9a-zA-Z-_]{255}$",
-                    "required": False,
-                    "dependencies": [
-                        "container_uuid",
-                        "container_iso_sha256",
-                        "container_username",
-                        "container_password",
-                        "container_listen_port",
-                    ],
-                },
-                "container_iso_sha256": {
-                    "type": "string",
-                    "regex": r"^[a-f0-9]{64}$",
-                    "required": False,
-                    "dependencies": [
-                        "container_uuid",
-                        "client_token",
-                        "container_username",
-                        "container_password",
-                        "container_listen_port",
-                    ],
-                },
-                "container_username": {
-                    "type": "string",
-                    "regex": r"^user_[0-9]{5}$",
-                    "required": False,
-                    "dependencies": [
-                        "container_uuid",
-                        "client_token",
-                        "container_iso_sha256",
-                        "container_password",
-                        "container_listen_port",
-                    ],
-                },
-                "container_password": {
-                    "type": "string",
-                    "regex": r"^[a-zA-Z0-9]{1,}$",
-                    "required": False,
-                    "dependencies": [
-                        "container_uuid",
-                        "client_token",
-                        "container_iso_sha256",
-                        "container_username",
-                        "container_listen_port",
-                    ],
-                },
-                "container_listen_port": {
-                    "type": "integer",
-                    "required": False,
-                    "min": 1,
-                    "max": 65535,
-                    "dependencies": [
-                        "container_uuid",
-                        "client_token",
-                        "container_iso_sha256",
-                        "container_username",
-                        "container_password",
-                    ],
-                },
-                "uptime": {
-                    "type": "integer",
-                    "required": False,
-                    "dependencies": ["version"],
-                    "min": 0,
-                },
-                "version": {
-                    "type": "string",
-                    "required": False,
-                    "dependencies": ["uptime"],
-                },
-            },
-        },
-    }
 
-    return (
-        validator.validate(response_dict, response_verification_scheme),
-        validator.document if validator.document else None,
-        validator.errors if validator.errors else None,
-    )
+    return _verify_content(COMPILED_RESPONSE_VERIFICATION_SCHEME, response_dict)
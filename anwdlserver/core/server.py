@@ -10,19 +10,45 @@ so that they can all be used in a single module.
 """
 
 from typing import Callable, Any, Union
+import contextlib
+import selectors
 import threading
 import traceback
+import asyncio
+import libvirt
+import signal
+import queue
 import socket
+import json
 import time
+import os
 
 
 # Intern importation
-from .virtualization import VirtualizationInterface
+from .virtualization import (
+    VirtualizationInterface,
+    WarmPoolManager,
+    GoldenSnapshotManager,
+    DomainEventMonitor,
+    getISOFileChecksum,
+)
 from .port_forwarding import PortForwardingInterface
 from .database import DatabaseInterface
 from .client import ClientInstance
-from .utilities import isSocketClosed
-from .crypto import RSAWrapper
+from .utilities import (
+    isSocketClosed,
+    WorkerPool,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MAX_PENDING_TASKS,
+)
+from .crypto import (
+    DEFAULT_RSA_OPERATION_POOL_MAX_PENDING_OPERATIONS,
+    RSAWrapper,
+    RSAKeyPool,
+    RSAOperationPool,
+    ECDHKeyProvider,
+    SessionTicketManager,
+)
 from .sanitization import makeResponse
 
 # Version indicator importation
@@ -31,14 +57,26 @@ from ..__init__ import __version__
 # Default parameters
 DEFAULT_SERVER_BIND_ADDRESS = ""
 DEFAULT_SERVER_LISTEN_PORT = 6150
+DEFAULT_SERVER_LISTEN_BACKLOG = 5
 DEFAULT_CLIENT_TIMEOUT = None
 
 DEFAULT_DIE_ON_ERROR = False
 DEFAULT_PASSIVE_MODE = False
 DEFAULT_ASYNCHRONOUS = False
+DEFAULT_ENABLE_ASYNCIO_ENGINE = False
+DEFAULT_MAX_PENDING_CLIENTS = DEFAULT_MAX_PENDING_TASKS
+DEFAULT_ACCEPTOR_WORKERS = 0
+DEFAULT_KEEP_ALIVE_TIMEOUT = 5
+DEFAULT_MAX_KEEP_ALIVE_REQUESTS = 100
+DEFAULT_RSA_OPERATION_WORKERS = 0
+DEFAULT_MAX_PENDING_RSA_OPERATIONS = DEFAULT_RSA_OPERATION_POOL_MAX_PENDING_OPERATIONS
+DEFAULT_ENABLE_BINARY_ENCODING = True
+DEFAULT_MAX_BATCH_CREATE_AMOUNT = 8
+DEFAULT_BATCH_CREATE_STAGE_WORKERS = 4
 
 # Constants definition
 REQUEST_VERB_CREATE = "CREATE"
+REQUEST_VERB_BATCHCREATE = "BATCHCREATE"
 REQUEST_VERB_DESTROY = "DESTROY"
 REQUEST_VERB_STAT = "STAT"
 
@@ -76,6 +114,35 @@ CONTEXT_DEFERRED_CALL = 22
 CONTEXT_HANDLE_END = 23
 CONTEXT_ERROR = 24
 
+# Deadline of the whole key exchange made to tell an
+# overloaded client to retry later, exprimed in seconds
+OVERLOAD_RESPONSE_TIMEOUT = 2
+
+# Overloaded clients are told to retry later by a few dedicated workers,
+# the ones exceeding their queue are disconnected without any response
+OVERLOAD_REJECTION_WORKERS = 2
+MAX_PENDING_OVERLOADED_CLIENTS = 16
+
+# Maximum time spent by the parking thread waiting for a kept
+# alive connection to become readable, exprimed in seconds
+KEEP_ALIVE_POLLING_INTERVAL = 1
+
+# Maximum size of a client handoff message sent by an acceptor worker process
+HANDOFF_MESSAGE_MAX_SIZE = 65536
+
+# Interval between two checks of the stored container domains, exprimed
+# in seconds. With a domain event monitor, stopped domains are notified
+# by libvirt and the checks are only a safety net
+CONTAINER_REAPER_POLLING_INTERVAL = 1
+CONTAINER_REAPER_SAFETY_POLLING_INTERVAL = 30
+
+# Container domain, endpoint shell and forwarder
+PROVISIONING_STAGES = 3
+
+RUNNING_CONTAINER_DOMAINS_LIMIT_REASON = (
+    "The maximum allowed amount of running containers has been reached on the server"
+)
+
 
 class ServerInterface:
     def __init__(
@@ -89,9 +156,26 @@ class ServerInterface:
         runtime_port_forwarding_interface: Union[None, PortForwardingInterface] = None,
         runtime_rsa_wrapper: Union[None, RSAWrapper] = None,
         passive_mode: bool = DEFAULT_PASSIVE_MODE,
+        enable_asyncio_engine: bool = DEFAULT_ENABLE_ASYNCIO_ENGINE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending_clients: int = DEFAULT_MAX_PENDING_CLIENTS,
+        listen_backlog: int = DEFAULT_SERVER_LISTEN_BACKLOG,
+        acceptor_workers: int = DEFAULT_ACCEPTOR_WORKERS,
+        runtime_warm_pool_manager: Union[None, WarmPoolManager] = None,
+        runtime_domain_event_monitor: Union[None, DomainEventMonitor] = None,
+        runtime_rsa_key_pool: Union[None, RSAKeyPool] = None,
+        keep_alive_timeout: int = DEFAULT_KEEP_ALIVE_TIMEOUT,
+        max_keep_alive_requests: int = DEFAULT_MAX_KEEP_ALIVE_REQUESTS,
+        rsa_operation_workers: int = DEFAULT_RSA_OPERATION_WORKERS,
+        max_pending_rsa_operations: int = DEFAULT_MAX_PENDING_RSA_OPERATIONS,
+        enable_binary_encoding: bool = DEFAULT_ENABLE_BINARY_ENCODING,
+        runtime_golden_snapshot_manager: Union[None, GoldenSnapshotManager] = None,
+        max_batch_create_amount: int = DEFAULT_MAX_BATCH_CREATE_AMOUNT,
+        batch_create_stage_workers: int = DEFAULT_BATCH_CREATE_STAGE_WORKERS,
     ):
         self.request_handler_dict = {
             REQUEST_VERB_CREATE: self._handle_create_request,
+            REQUEST_VERB_BATCHCREATE: self._handle_batch_create_request,
             REQUEST_VERB_DESTROY: self._handle_destroy_request,
             REQUEST_VERB_STAT: self._handle_stat_request,
         }
@@ -119,17 +203,65 @@ class ServerInterface:
         }
 
         self.passive_mode = passive_mode
+        self.enable_asyncio_engine = enable_asyncio_engine
 
         self.server_sock = None
+        self.event_loop = None
+        self.async_main_server_task = None
+        self.listen_backlog = listen_backlog
         self.listen_port = listen_port
         self.bind_address = bind_address
         self.client_timeout = client_timeout
         self.container_iso_file_path = runtime_container_iso_file_path
 
+        # Clients which ask for it can send several requests on the same
+        # connection, which is closed once it stays idle for 'keep_alive_timeout'
+        # seconds. Setting it to 0 disables it. Idle connections are parked in a
+        # selector instead of holding a worker, until their next request arrives
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_keep_alive_requests = max_keep_alive_requests
+        self.keep_alive_selector = None
+        self.keep_alive_selector_lock = threading.Lock()
+
+        # Clients which ask for it send their requests and receive their
+        # responses in the binary encoding instead of JSON
+        self.enable_binary_encoding = enable_binary_encoding
+
+        # The containers of BATCHCREATE requests are provisioned concurrently,
+        # but at most 'batch_create_stage_workers' of them are in each
+        # provisioning stage at the same time, all requests included
+        self.max_batch_create_amount = max_batch_create_amount
+        self.batch_create_stage_semaphore_tuple = tuple(
+            threading.BoundedSemaphore(batch_create_stage_workers)
+            for _ in range(PROVISIONING_STAGES)
+        )
+
         self.recorded_runtime_errors_counter = 0
         self.start_timestamp = None
         self.is_running = False
 
+        self.worker_pool = WorkerPool(
+            max_workers=max_workers,
+            max_pending_tasks=max_pending_clients,
+            error_routine=self._handle_worker_pool_error,
+        )
+
+        # Rejects the overloaded clients without taking any
+        # worker of the pool above nor blocking the accept loop
+        self.rejection_pool = WorkerPool(
+            max_workers=OVERLOAD_REJECTION_WORKERS,
+            max_pending_tasks=MAX_PENDING_OVERLOADED_CLIENTS,
+            error_routine=self._handle_worker_pool_error,
+        )
+
+        # With acceptor workers, the key exchanges are done in forked processes
+        # listening on the same port, which then hand the clients over to this
+        # process, so that the containers state stays in a single process
+        self.acceptor_workers = acceptor_workers
+        self.acceptor_worker_pid_list = []
+        self.is_acceptor_worker = False
+        self.handoff_sock = None
+
         self.virtualization_interface = (
             runtime_virtualization_interface
             if runtime_virtualization_interface
@@ -146,14 +278,70 @@ class ServerInterface:
             else PortForwardingInterface()
         )
 
+        # Optional, containers are cold-booted on each CREATE request without it
+        self.warm_pool_manager = runtime_warm_pool_manager
+
+        # Optional, containers are restored from a memory image with it
+        self.golden_snapshot_manager = runtime_golden_snapshot_manager
+
+        # Optional, stopped container domains are detected by polling without it
+        self.domain_event_monitor = runtime_domain_event_monitor
+        self.stopped_container_uuid_queue = queue.Queue()
+
+        # Prevents a container from being deleted by the reaper
+        # while it is being deleted by another routine
+        self.container_deletion_lock = threading.RLock()
+
+        # Optional, the runtime RSA key pair is generated on initialization without it
+        self.rsa_key_pool = runtime_rsa_key_pool
+
         # If 'passive_mode' is set to True, the runtime RSA wrapper
         # become useless since it will not be used anywhere.
         self.rsa_wrapper = (
-            (runtime_rsa_wrapper if runtime_rsa_wrapper else RSAWrapper())
+            (
+                runtime_rsa_wrapper
+                if runtime_rsa_wrapper
+                else (
+                    self.rsa_key_pool.getRSAWrapper()
+                    if self.rsa_key_pool
+                    else RSAWrapper()
+                )
+            )
             if not passive_mode
             else None
         )
 
+        # Optional, the RSA private key operations are executed in the client
+        # threads without it. It is not used along with the acceptor workers,
+        # which already spread the key exchanges over several processes
+        self.rsa_operation_pool = (
+            RSAOperationPool(
+                self.rsa_wrapper,
+                max_workers=rsa_operation_workers,
+                max_pending_operations=max_pending_rsa_operations,
+            )
+            if rsa_operation_workers and not acceptor_workers and not passive_mode
+            else None
+        )
+
+        if self.rsa_operation_pool:
+            self.rsa_wrapper.setOperationPool(self.rsa_operation_pool)
+
+        # Shares the signed ephemeral key between the protocol version 3 sessions
+        self.ecdh_key_provider = (
+            ECDHKeyProvider(self.rsa_wrapper) if not passive_mode else None
+        )
+
+        # Issues the session tickets and holds the replay cache of the redeemed
+        # ones. It is not used along with the acceptor workers, since each forked
+        # process would have its own replay cache, so a ticket could be redeemed
+        # once in each of them
+        self.session_ticket_manager = (
+            SessionTicketManager()
+            if not acceptor_workers and not passive_mode
+            else None
+        )
+
     def __del__(self):
         if self.is_running:
             self._stop_server()
@@ -175,10 +363,20 @@ class ServerInterface:
     def _initialize_listen_interface(self):
         self.server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        # The kernel distributes the connections between acceptor workers
+        if self.is_acceptor_worker:
+            self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
         self.server_sock.bind((self.bind_address, self.listen_port))
-        self.server_sock.listen(5)
+        self.server_sock.listen(self.listen_backlog)
 
     def _terminate_listen_interface(self):
+        # The asyncio accept loop is not woken up by closing the server
+        # socket from another thread, so its task is cancelled first
+        if self.event_loop and self.event_loop.is_running():
+            self.event_loop.call_soon_threadsafe(self.async_main_server_task.cancel)
+
         self.server_sock.close()
 
     def _execute_event_handler(self, event, context, data={}):
@@ -214,47 +412,123 @@ class ServerInterface:
         self.virtualization_interface.deleteStoredContainer(container_uuid)
         self.port_forwarding_interface.deleteStoredForwarder(container_uuid)
 
+    def _reap_stopped_container(self, container_uuid):
+        with self.container_deletion_lock:
+            container_instance = self.virtualization_interface.getStoredContainer(
+                container_uuid
+            )
+
+            # The container may have been deleted in the meantime
+            if not container_instance or container_instance.isDomainRunning():
+                return
+
+            forwarder_instance = self.port_forwarding_interface.getStoredForwarder(
+                container_uuid
+            )
+
+            if forwarder_instance and forwarder_instance.isForwarding():
+                forwarder_instance.stopForward()
+
+                self._execute_event_handler(
+                    EVENT_FORWARDER_STOPPED,
+                    CONTEXT_AUTOMATIC_ACTION,
+                    data={"forwarder_instance": forwarder_instance},
+                )
+
+            self._delete_container(container_instance)
+
+            # Mark the container instance domain as stopped
+            self._execute_event_handler(
+                EVENT_CONTAINER_DOMAIN_STOPPED,
+                CONTEXT_AUTOMATIC_ACTION,
+                data={"container_instance": container_instance},
+            )
+
+    # Executed on the domain event monitor thread
+    def _handle_domain_lifecycle_event(self, domain_uuid, event, detail):
+        if event == libvirt.VIR_DOMAIN_EVENT_STOPPED:
+            self.stopped_container_uuid_queue.put(domain_uuid)
+
+    # The overlay image manager of the virtualization interface is started
+    # with the server, once the acceptor workers are forked
+    def _start_overlay_image_manager(self):
+        overlay_image_manager = (
+            self.virtualization_interface.getRuntimeOverlayImageManager()
+        )
+
+        if overlay_image_manager and not overlay_image_manager.isRunning():
+            overlay_image_manager.startManager()
+
+    # Stopped once the containers are deleted, their overlays being released
+    def _stop_overlay_image_manager(self):
+        overlay_image_manager = (
+            self.virtualization_interface.getRuntimeOverlayImageManager()
+        )
+
+        if overlay_image_manager and overlay_image_manager.isRunning():
+            overlay_image_manager.stopManager()
+
+    def _start_container_reaper(self):
+        if self.domain_event_monitor:
+            self.domain_event_monitor.addLifecycleEventRoutine(
+                self._handle_domain_lifecycle_event
+            )
+
+            if not self.domain_event_monitor.isRunning():
+                self.domain_event_monitor.startMonitor()
+
+        threading.Thread(
+            target=self._delete_container_on_domain_shutdown_routine
+        ).start()
+
+    def _stop_container_reaper(self):
+        if self.domain_event_monitor:
+            self.domain_event_monitor.removeLifecycleEventRoutine(
+                self._handle_domain_lifecycle_event
+            )
+
+            if self.domain_event_monitor.isRunning():
+                self.domain_event_monitor.stopMonitor()
+
+        # Wake the reaper up so that it notices that the server is stopped
+        self.stopped_container_uuid_queue.put(None)
+
     # This routine detects inactive container and destroy them in consequence
     def _delete_container_on_domain_shutdown_routine(self):
+        polling_interval = (
+            CONTAINER_REAPER_SAFETY_POLLING_INTERVAL
+            if self.domain_event_monitor
+            else CONTAINER_REAPER_POLLING_INTERVAL
+        )
+
         while self.is_running:
             try:
-                # Container UUID to delete are stored in a list and deleted after the
-                # first loop to avoid the "Dictionary changed size during iteration" error
-                container_instance_list = []
-
-                for (
-                    container_uuid
-                ) in self.virtualization_interface.listStoredContainers():
-                    container_instance = (
-                        self.virtualization_interface.getStoredContainer(container_uuid)
-                    )
-
-                    if not container_instance.isDomainRunning():
-                        container_instance_list.append(container_instance)
-
-                for container_instance in container_instance_list:
-                    forwarder_instance = (
-                        self.port_forwarding_interface.getStoredForwarder(
-                            container_instance.getUUID()
-                        )
-                    )
+                stopped_container_uuid = self.stopped_container_uuid_queue.get(
+                    timeout=polling_interval
+                )
 
-                    if forwarder_instance and forwarder_instance.isForwarding():
-                        forwarder_instance.stopForward()
+                if not stopped_container_uuid:
+                    continue
 
-                        self._execute_event_handler(
-                            EVENT_FORWARDER_STOPPED,
-                            CONTEXT_AUTOMATIC_ACTION,
-                            data={"forwarder_instance": forwarder_instance},
-                        )
+                self._reap_stopped_container(stopped_container_uuid)
 
-                    self._delete_container(container_instance)
+            except queue.Empty:
+                try:
+                    # Container UUID are copied in a list to avoid the
+                    # "Dictionary changed size during iteration" error
+                    for container_uuid in list(
+                        self.virtualization_interface.listStoredContainers()
+                    ):
+                        self._reap_stopped_container(container_uuid)
 
-                    # Mark the container instance domain as stopped
+                except Exception as E:
                     self._execute_event_handler(
-                        EVENT_CONTAINER_DOMAIN_STOPPED,
-                        CONTEXT_AUTOMATIC_ACTION,
-                        data={"container_instance": container_instance},
+                        EVENT_RUNTIME_ERROR,
+                        CONTEXT_ERROR,
+                        data={
+                            "exception_object": E,
+                            "traceback": self._format_traceback(E),
+                        },
                     )
 
             except Exception as E:
@@ -267,56 +541,287 @@ class ServerInterface:
                     },
                 )
 
-            time.sleep(1)
+    # Hashes the container ISO file in the background, so that
+    # the first CREATE request does not have to do it
+    def _make_iso_file_checksum_routine(self):
+        try:
+            getISOFileChecksum(self.container_iso_file_path)
+
+        except Exception as E:
+            self._execute_event_handler(
+                EVENT_RUNTIME_ERROR,
+                CONTEXT_ERROR,
+                data={
+                    "exception_object": E,
+                    "traceback": self._format_traceback(E),
+                },
+            )
 
     def _delete_all_containers(self):
         # Container UUID to delete are stored in a list and deleted after the
         # first loop to avoid the "Dictionary changed size during iteration" error
         container_instance_list = []
 
-        for container_uuid in self.virtualization_interface.listStoredContainers():
-            container_instance_list.append(
-                self.virtualization_interface.getStoredContainer(container_uuid)
+        with self.container_deletion_lock:
+            for container_uuid in self.virtualization_interface.listStoredContainers():
+                container_instance_list.append(
+                    self.virtualization_interface.getStoredContainer(container_uuid)
+                )
+
+            for container_instance in container_instance_list:
+                # Just a failsafe condition
+                if container_instance.isDomainRunning():
+                    container_instance.stopDomain()
+
+                    self._execute_event_handler(
+                        EVENT_CONTAINER_DOMAIN_STOPPED,
+                        CONTEXT_NORMAL_PROCESS,
+                        data={"container_instance": container_instance},
+                    )
+
+                self._delete_container(container_instance)
+
+    def _start_acceptor_workers(self):
+        self.handoff_sock, acceptor_handoff_sock = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_DGRAM
+        )
+
+        # The server starts its own threads and hypervisor connections once
+        # the workers are forked. The ones started beforehand by the caller
+        # are not running in the workers, which never use them
+        for _ in range(self.acceptor_workers):
+            pid = os.fork()
+
+            if pid == 0:
+                self.handoff_sock.close()
+                self.handoff_sock = acceptor_handoff_sock
+                self._acceptor_worker_routine()
+
+            self.acceptor_worker_pid_list.append(pid)
+
+        acceptor_handoff_sock.close()
+
+    def _terminate_acceptor_workers(self):
+        for pid in self.acceptor_worker_pid_list:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+
+            except ChildProcessError:
+                pass
+
+        self.acceptor_worker_pid_list = []
+
+        # Shutting the socket down wakes the handoff loop up
+        self.handoff_sock.shutdown(socket.SHUT_RDWR)
+        self.handoff_sock.close()
+
+    # Executed in the forked acceptor worker processes, never returns
+    def _acceptor_worker_routine(self):
+        exit_code = 0
+
+        try:
+            self.is_acceptor_worker = True
+            self.acceptor_worker_pid_list = []
+
+            # The parent process terminates the workers with SIGTERM
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(
+                signal.SIGTERM,
+                lambda signal_no, stack_frame: self._terminate_listen_interface(),
             )
 
-        for container_instance in container_instance_list:
-            # Just a failsafe condition
-            if container_instance.isDomainRunning():
-                container_instance.stopDomain()
+            self._initialize_listen_interface()
+            self.worker_pool.startPool()
+            self.rejection_pool.startPool()
+
+            if self.enable_asyncio_engine:
+                asyncio.run(self._async_main_server_loop_routine())
+
+            else:
+                self._main_server_loop_routine()
+
+            self.worker_pool.stopPool()
+
+        except BaseException as E:
+            self._execute_event_handler(
+                EVENT_RUNTIME_ERROR,
+                CONTEXT_ERROR,
+                data={"exception_object": E, "traceback": self._format_traceback(E)},
+            )
+
+            exit_code = 1
+
+        finally:
+            # Avoid executing the parent process cleanup routines
+            os._exit(exit_code)
+
+    # Executed in an acceptor worker process once the request is received
+    def _handoff_client(self, client_instance, *recv_request_tuple):
+        handoff_message = json.dumps(
+            {
+                "session_state": client_instance.getSessionState(),
+                "recv_request_tuple": recv_request_tuple,
+            }
+        ).encode()
+
+        socket.send_fds(
+            self.handoff_sock,
+            [handoff_message],
+            [client_instance.getSocketDescriptor().fileno()],
+        )
+
+        # Only the local descriptor is closed, the connection
+        # stays open in the parent process
+        client_instance.closeConnection()
+
+    def _acceptor_handoff_loop_routine(self):
+        while self.is_running:
+            new_client_socket = None
+            new_client_instance = None
+
+            try:
+                try:
+                    handoff_message, fd_list, _, _ = socket.recv_fds(
+                        self.handoff_sock, HANDOFF_MESSAGE_MAX_SIZE, 1
+                    )
+
+                except OSError:
+                    # If the handoff socket is closed in an external method,
+                    # will raise OSError here
+                    break
+
+                # An empty message means that the handoff socket was shut down
+                if not handoff_message and not fd_list:
+                    break
+
+                if not fd_list:
+                    continue
+
+                new_client_socket = socket.socket(fileno=fd_list[0])
+                new_client_socket.settimeout(self.client_timeout)
+
+                handoff_dict = json.loads(handoff_message.decode())
+
+                new_client_instance = ClientInstance(
+                    new_client_socket,
+                    rsa_wrapper=self.rsa_wrapper.makeSessionWrapper(),
+                    exchange_keys=False,
+                )
+                new_client_instance.setSessionState(handoff_dict["session_state"])
+
+                if not self.worker_pool.submitTask(
+                    self._handle_received_request,
+                    new_client_instance,
+                    *handoff_dict["recv_request_tuple"],
+                ):
+                    new_client_instance.sendResponse(
+                        False,
+                        RESPONSE_MSG_UNAVAILABLE,
+                        reason="The server is overloaded, retry later",
+                    )
+
+                    new_client_instance.closeConnection()
+
+                    self._execute_event_handler(
+                        EVENT_CLIENT_CLOSED,
+                        CONTEXT_HANDLE_END,
+                        data={"client_instance": new_client_instance},
+                    )
+
+            except Exception as E:
+                data = {
+                    "exception_object": E,
+                    "traceback": self._format_traceback(E),
+                    "client_socket": new_client_socket,
+                }
+
+                if new_client_instance:
+                    data.update({"client_instance": new_client_instance})
 
                 self._execute_event_handler(
-                    EVENT_CONTAINER_DOMAIN_STOPPED,
-                    CONTEXT_NORMAL_PROCESS,
-                    data={"container_instance": container_instance},
+                    EVENT_RUNTIME_ERROR, CONTEXT_ERROR, data=data
                 )
 
-            self._delete_container(container_instance)
+                if new_client_socket and not isSocketClosed(new_client_socket):
+                    new_client_socket.close()
 
     def _start_server(self):
-        if not self.passive_mode:
-            self._initialize_listen_interface()
-
         self.start_timestamp = int(time.time())
         self.is_running = True
 
+        if not self.passive_mode:
+            if self.acceptor_workers:
+                self._start_acceptor_workers()
+
+            else:
+                self._initialize_listen_interface()
+
+            if self.rsa_operation_pool:
+                self.rsa_operation_pool.startPool()
+
+            self.worker_pool.startPool()
+            self.rejection_pool.startPool()
+
+            if self.keep_alive_timeout:
+                self._start_kept_alive_client_parking()
+
+        self._start_overlay_image_manager()
+
+        if self.warm_pool_manager:
+            self.warm_pool_manager.startPool()
+
+        if self.golden_snapshot_manager:
+            self.golden_snapshot_manager.startManager()
+
         threading.Thread(
-            target=self._delete_container_on_domain_shutdown_routine
+            target=self._make_iso_file_checksum_routine, daemon=True
         ).start()
+        self._start_container_reaper()
 
         self._execute_event_handler(EVENT_SERVER_STARTED, CONTEXT_NORMAL_PROCESS)
 
         if not self.passive_mode:
-            self._main_server_loop_routine()
+            if self.acceptor_workers:
+                self._acceptor_handoff_loop_routine()
+
+            elif self.enable_asyncio_engine:
+                asyncio.run(self._async_main_server_loop_routine())
+
+            else:
+                self._main_server_loop_routine()
 
     def _stop_server(self, die_on_error=False):
         try:
+            if self.warm_pool_manager and self.warm_pool_manager.isRunning():
+                self.warm_pool_manager.stopPool()
+
+            if (
+                self.golden_snapshot_manager
+                and self.golden_snapshot_manager.isRunning()
+            ):
+                self.golden_snapshot_manager.stopManager()
+
             self._delete_all_containers()
             self.database_interface.closeDatabase()
 
+            self._stop_overlay_image_manager()
+
             if not self.passive_mode:
-                self._terminate_listen_interface()
+                if self.acceptor_workers:
+                    self._terminate_acceptor_workers()
+
+                else:
+                    self._terminate_listen_interface()
+
+                self.worker_pool.stopPool()
+                self.rejection_pool.stopPool()
+
+            if self.rsa_operation_pool and self.rsa_operation_pool.isRunning():
+                self.rsa_operation_pool.stopPool()
 
             self.is_running = False
+            self._stop_container_reaper()
 
             self._execute_event_handler(EVENT_SERVER_STOPPED, CONTEXT_NORMAL_PROCESS)
 
@@ -327,33 +832,83 @@ class ServerInterface:
             raise E
 
     # Intern methods for normal processes
-    def _handle_create_request(
-        self, client_instance=None, passive_execution=False, **kwargs
+    # Brings a container through the domain, endpoint shell and forwarder
+    # stages, each one bounded by its semaphore if any. Returns the container
+    # response data, None if it was aborted by a handler or 'abort_event', or
+    # False if no running container domain slot is available. The created
+    # instances are kept in 'resource_dict' for the rollback
+    def _provision_container(
+        self,
+        resource_dict,
+        client_instance=None,
+        stage_semaphore_tuple=None,
+        abort_event=None,
+        **kwargs,
     ):
-        new_endpoint_shell_instance = None
-        new_container_instance = None
-        new_forwarder_instance = None
+        if not stage_semaphore_tuple:
+            stage_semaphore_tuple = (contextlib.nullcontext(),) * PROVISIONING_STAGES
 
-        try:
-            # Create and start the container domain
-            new_container_instance = self.virtualization_interface.createContainer(
-                store=False
-            )
-            new_container_instance.setISOFilePath(self.container_iso_file_path)
+        with stage_semaphore_tuple[0]:
+            if abort_event and abort_event.is_set():
+                return
 
-            if (
-                self._execute_event_handler(
-                    EVENT_CONTAINER_CREATED,
-                    CONTEXT_NORMAL_PROCESS,
-                    data={
-                        "client_instance": client_instance,
-                        "container_instance": new_container_instance,
-                    }
-                    | kwargs,
+            new_container_instance = None
+
+            # Claim an already running container domain if possible, it is
+            # then considered as created and started by the handlers. Both
+            # the warm pool and the golden snapshot reserve its domain slot
+            if self.warm_pool_manager:
+                new_container_instance = self.warm_pool_manager.claimContainer()
+
+            # Otherwise, restore one from the golden snapshot if it is prepared
+            if not new_container_instance and self.golden_snapshot_manager:
+                new_container_instance = self.golden_snapshot_manager.claimContainer()
+
+            if new_container_instance:
+                resource_dict.update({"container_instance": new_container_instance})
+
+                if (
+                    self._execute_event_handler(
+                        EVENT_CONTAINER_DOMAIN_STARTED,
+                        CONTEXT_NORMAL_PROCESS,
+                        data={
+                            "client_instance": client_instance,
+                            "container_instance": new_container_instance,
+                        }
+                        | kwargs,
+                    )
+                    == -1
+                ):
+                    return
+
+            else:
+                # Create and start the container domain
+                new_container_instance = (
+                    self.virtualization_interface.createContainer(store=False)
                 )
-                == -1
-            ):
-                return
+
+                # The slot is released when the container is deleted
+                if not self.virtualization_interface.reserveDomainSlot(
+                    new_container_instance.getUUID()
+                ):
+                    return False
+
+                new_container_instance.setISOFilePath(self.container_iso_file_path)
+                resource_dict.update({"container_instance": new_container_instance})
+
+                if (
+                    self._execute_event_handler(
+                        EVENT_CONTAINER_CREATED,
+                        CONTEXT_NORMAL_PROCESS,
+                        data={
+                            "client_instance": client_instance,
+                            "container_instance": new_container_instance,
+                        }
+                        | kwargs,
+                    )
+                    == -1
+                ):
+                    return
 
             if not new_container_instance.isDomainRunning():
                 new_container_instance.startDomain()
@@ -372,10 +927,17 @@ class ServerInterface:
                 ):
                     return
 
+        with stage_semaphore_tuple[1]:
+            if abort_event and abort_event.is_set():
+                return
+
             # Create an endpoint shell on the container and administrate it
             new_endpoint_shell_instance = new_container_instance.createEndpointShell(
                 open_shell=False
             )
+            resource_dict.update(
+                {"endpoint_shell_instance": new_endpoint_shell_instance}
+            )
 
             if (
                 self._execute_event_handler(
@@ -434,6 +996,10 @@ class ServerInterface:
                 ):
                     return
 
+        with stage_semaphore_tuple[2]:
+            if abort_event and abort_event.is_set():
+                return
+
             # Create a new forwarder and start it
             new_forwarder_instance = self.port_forwarding_interface.createForwarder(
                 new_container_instance.getIP(),
@@ -441,6 +1007,7 @@ class ServerInterface:
                 22,
                 store=False,
             )
+            resource_dict.update({"forwarder_instance": new_forwarder_instance})
 
             if (
                 self._execute_event_handler(
@@ -473,19 +1040,118 @@ class ServerInterface:
                 ):
                     return
 
-            # Store new container environment informations
-            new_client_token = self._store_container(
-                new_container_instance, new_forwarder_instance
+        # Store new container environment informations
+        new_client_token = self._store_container(
+            new_container_instance, new_forwarder_instance
+        )
+
+        return {
+            "container_uuid": new_container_instance.getUUID(),
+            "client_token": new_client_token,
+            "container_iso_sha256": new_container_instance.makeISOFileChecksum(),
+            "container_username": new_container_username,
+            "container_password": new_container_password,
+            "container_listen_port": new_forwarder_instance.getServerOriginPort(),
+        }
+
+    # Stops and deletes the instances created by '_provision_container',
+    # whether the container was stored or not. The rollback is always
+    # completed, even if the client is closed in the meantime
+    def _rollback_container(self, resource_dict, client_instance=None, **kwargs):
+        new_forwarder_instance = resource_dict.get("forwarder_instance")
+        new_endpoint_shell_instance = resource_dict.get("endpoint_shell_instance")
+        new_container_instance = resource_dict.get("container_instance")
+
+        if new_forwarder_instance and new_forwarder_instance.isForwarding():
+            new_forwarder_instance.stopForward()
+
+            self._execute_event_handler(
+                EVENT_FORWARDER_STOPPED,
+                CONTEXT_ERROR,
+                data={
+                    "client_instance": client_instance,
+                    "forwarder_instance": new_forwarder_instance,
+                }
+                | kwargs,
             )
 
-            data_dict = {
-                "container_uuid": new_container_instance.getUUID(),
-                "client_token": new_client_token,
-                "container_iso_sha256": new_container_instance.makeISOFileChecksum(),
-                "container_username": new_container_username,
-                "container_password": new_container_password,
-                "container_listen_port": new_forwarder_instance.getServerOriginPort(),
-            }
+        # The port of a forwarder that was not stored yet is
+        # not released by '_delete_container'
+        if (
+            new_forwarder_instance
+            and not self.port_forwarding_interface.getStoredForwarder(
+                new_forwarder_instance.getContainerUUID()
+            )
+        ):
+            self.port_forwarding_interface.releaseForwarderPort(new_forwarder_instance)
+
+        if new_endpoint_shell_instance and not new_endpoint_shell_instance.isClosed():
+            new_endpoint_shell_instance.closeShell()
+
+            self._execute_event_handler(
+                EVENT_ENDPOINT_SHELL_CLOSED,
+                CONTEXT_ERROR,
+                data={
+                    "client_instance": client_instance,
+                    "endpoint_shell_instance": new_endpoint_shell_instance,
+                }
+                | kwargs,
+            )
+
+        if new_container_instance:
+            # The lock prevents the reaper from deleting the container
+            # when its domain is stopped below
+            with self.container_deletion_lock:
+                if new_container_instance.isDomainRunning():
+                    new_container_instance.stopDomain()
+
+                    self._execute_event_handler(
+                        EVENT_CONTAINER_DOMAIN_STOPPED,
+                        CONTEXT_ERROR,
+                        data={
+                            "client_instance": client_instance,
+                            "container_instance": new_container_instance,
+                        }
+                        | kwargs,
+                    )
+
+                self._delete_container(new_container_instance)
+
+    def _handle_create_request(
+        self, client_instance=None, passive_execution=False, **kwargs
+    ):
+        resource_dict = {}
+
+        try:
+            data_dict = self._provision_container(
+                resource_dict, client_instance=client_instance, **kwargs
+            )
+
+            if data_dict is False:
+                if not passive_execution and client_instance:
+                    if not client_instance.isClosed():
+                        client_instance.sendResponse(
+                            False,
+                            RESPONSE_MSG_UNAVAILABLE,
+                            reason=RUNNING_CONTAINER_DOMAINS_LIMIT_REASON,
+                        )
+
+                    return
+
+                return makeResponse(
+                    False,
+                    RESPONSE_MSG_UNAVAILABLE,
+                    reason=RUNNING_CONTAINER_DOMAINS_LIMIT_REASON,
+                )[1]
+
+            # An event handler aborted the provisioning, the instances created
+            # so far are rolled back so that their running domain slot is released
+            if not data_dict:
+                self._rollback_container(
+                    resource_dict, client_instance=client_instance, **kwargs
+                )
+
+                return
 
             if not passive_execution and client_instance:
                 if not client_instance.isClosed():
@@ -514,74 +1180,158 @@ class ServerInterface:
             ):
                 return
 
-            if new_forwarder_instance and new_forwarder_instance.isForwarding():
-                new_forwarder_instance.stopForward()
+            self._rollback_container(
+                resource_dict, client_instance=client_instance, **kwargs
+            )
 
+            # Chech if the error is due to a broken pipe caused by peer,
+            # no response will be sent if it is the case
+            if not passive_execution and client_instance:
                 if (
-                    self._execute_event_handler(
-                        EVENT_FORWARDER_STOPPED,
-                        CONTEXT_ERROR,
-                        data={
-                            "client_instance": client_instance,
-                            "forwarder_instance": new_forwarder_instance,
-                        }
-                        | kwargs,
-                    )
-                    == -1
+                    not client_instance.isClosed()
+                    and "Peer refused the packet" not in str(E)
                 ):
-                    return
+                    client_instance.sendResponse(False, RESPONSE_MSG_INTERNAL_ERROR)
 
-            if (
-                new_endpoint_shell_instance
-                and not new_endpoint_shell_instance.isClosed()
-            ):
-                new_endpoint_shell_instance.closeShell()
+            else:
+                return makeResponse(False, RESPONSE_MSG_INTERNAL_ERROR)[1]
 
-                if (
-                    self._execute_event_handler(
-                        EVENT_ENDPOINT_SHELL_CLOSED,
-                        CONTEXT_ERROR,
-                        data={
-                            "client_instance": client_instance,
-                            "endpoint_shell_instance": new_endpoint_shell_instance,
-                        }
-                        | kwargs,
+    # Provisions several containers concurrently, every one of them being
+    # rolled back if one fails, and returns their data in a single response
+    def _handle_batch_create_request(
+        self, client_instance=None, passive_execution=False, amount=None, **kwargs
+    ):
+        # The amount can also be passed as a keyword argument of 'executeRequestHandler'
+        if amount is None and not passive_execution:
+            amount = client_instance.getStoredRequest()["parameters"].get("amount")
+
+        if type(amount) is not int or not 1 <= amount <= self.max_batch_create_amount:
+            self._execute_event_handler(
+                EVENT_MALFORMED_REQUEST,
+                CONTEXT_ERROR,
+                data={"client_instance": client_instance} | kwargs,
+            )
+
+            reason = f"The containers amount must be between 1 and {self.max_batch_create_amount}"
+
+            if not passive_execution and client_instance:
+                if not client_instance.isClosed():
+                    client_instance.sendResponse(
+                        False, RESPONSE_MSG_BAD_REQ, reason=reason
                     )
-                    == -1
-                ):
-                    return
 
-            if new_container_instance:
-                if new_container_instance.isDomainRunning():
-                    new_container_instance.stopDomain()
+                return
+
+            else:
+                return makeResponse(False, RESPONSE_MSG_BAD_REQ, reason=reason)[1]
+
+        resource_dict_list = [{} for _ in range(amount)]
+        data_dict_list = [None] * amount
+        exception_list = []
+
+        # Set on the first failure, so that the other
+        # containers are not brought to the next stages
+        abort_event = threading.Event()
+        unavailable_event = threading.Event()
+
+        def provision_routine(index):
+            try:
+                data_dict_list[index] = self._provision_container(
+                    resource_dict_list[index],
+                    client_instance=client_instance,
+                    stage_semaphore_tuple=self.batch_create_stage_semaphore_tuple,
+                    abort_event=abort_event,
+                    **kwargs,
+                )
+
+                if data_dict_list[index] is False:
+                    unavailable_event.set()
+
+                if not data_dict_list[index]:
+                    abort_event.set()
 
-                    if (
-                        self._execute_event_handler(
-                            EVENT_CONTAINER_DOMAIN_STOPPED,
-                            CONTEXT_ERROR,
-                            data={
-                                "client_instance": client_instance,
-                                "container_instance": new_container_instance,
-                            }
-                            | kwargs,
+            except Exception as E:
+                exception_list.append(E)
+                abort_event.set()
+
+        provision_thread_list = [
+            threading.Thread(target=provision_routine, args=[index])
+            for index in range(amount)
+        ]
+
+        for provision_thread in provision_thread_list:
+            provision_thread.start()
+
+        for provision_thread in provision_thread_list:
+            provision_thread.join()
+
+        try:
+            if not abort_event.is_set():
+                data_dict = {"containers": data_dict_list}
+
+                if not passive_execution and client_instance:
+                    if not client_instance.isClosed():
+                        client_instance.sendResponse(
+                            True,
+                            RESPONSE_MSG_OK,
+                            data=data_dict,
                         )
-                        == -1
-                    ):
+
                         return
 
-                self._delete_container(new_container_instance)
+                else:
+                    return makeResponse(True, RESPONSE_MSG_OK, data=data_dict)[1]
 
-            # Chech if the error is due to a broken pipe caused by peer,
-            # no response will be sent if it is the case
+        except Exception as E:
+            exception_list.append(E)
+
+        for E in exception_list:
+            self._execute_event_handler(
+                EVENT_RUNTIME_ERROR,
+                CONTEXT_ERROR,
+                data={
+                    "exception_object": E,
+                    "traceback": self._format_traceback(E),
+                    "client_instance": client_instance,
+                }
+                | kwargs,
+            )
+
+        for resource_dict in resource_dict_list:
+            self._rollback_container(
+                resource_dict, client_instance=client_instance, **kwargs
+            )
+
+        # The whole amount of containers must fit in the running domain slots
+        if not exception_list and unavailable_event.is_set():
             if not passive_execution and client_instance:
-                if (
-                    not client_instance.isClosed()
-                    and "Peer refused the packet" not in str(E)
-                ):
-                    client_instance.sendResponse(False, RESPONSE_MSG_INTERNAL_ERROR)
+                if not client_instance.isClosed():
+                    client_instance.sendResponse(
+                        False,
+                        RESPONSE_MSG_UNAVAILABLE,
+                        reason=RUNNING_CONTAINER_DOMAINS_LIMIT_REASON,
+                    )
 
-            else:
-                return makeResponse(False, RESPONSE_MSG_INTERNAL_ERROR)[1]
+                return
+
+            return makeResponse(
+                False,
+                RESPONSE_MSG_UNAVAILABLE,
+                reason=RUNNING_CONTAINER_DOMAINS_LIMIT_REASON,
+            )[1]
+
+        # Aborted by a handler, or the client closed the connection
+        if not exception_list:
+            return
+
+        if not passive_execution and client_instance:
+            if not client_instance.isClosed() and not any(
+                "Peer refused the packet" in str(E) for E in exception_list
+            ):
+                client_instance.sendResponse(False, RESPONSE_MSG_INTERNAL_ERROR)
+
+        else:
+            return makeResponse(False, RESPONSE_MSG_INTERNAL_ERROR)[1]
 
     def _handle_destroy_request(
         self,
@@ -619,49 +1369,52 @@ class ServerInterface:
             else:
                 return makeResponse(False, RESPONSE_MSG_BAD_AUTH)[1]
 
-        container_instance = self.virtualization_interface.getStoredContainer(
-            request_container_uuid
-        )
+        # The lock prevents the reaper from deleting the container
+        # when its domain is stopped below
+        with self.container_deletion_lock:
+            container_instance = self.virtualization_interface.getStoredContainer(
+                request_container_uuid
+            )
 
-        if container_instance.isDomainRunning():
-            container_instance.stopDomain()
+            if container_instance.isDomainRunning():
+                container_instance.stopDomain()
 
-            if (
-                self._execute_event_handler(
-                    EVENT_CONTAINER_DOMAIN_STOPPED,
-                    CONTEXT_NORMAL_PROCESS,
-                    data={
-                        "client_instance": client_instance,
-                        "container_instance": container_instance,
-                    }
-                    | kwargs,
-                )
-                == -1
-            ):
-                return
+                if (
+                    self._execute_event_handler(
+                        EVENT_CONTAINER_DOMAIN_STOPPED,
+                        CONTEXT_NORMAL_PROCESS,
+                        data={
+                            "client_instance": client_instance,
+                            "container_instance": container_instance,
+                        }
+                        | kwargs,
+                    )
+                    == -1
+                ):
+                    return
 
-        forwarder_instance = self.port_forwarding_interface.getStoredForwarder(
-            container_instance.getUUID()
-        )
+            forwarder_instance = self.port_forwarding_interface.getStoredForwarder(
+                container_instance.getUUID()
+            )
 
-        if forwarder_instance and forwarder_instance.isForwarding():
-            forwarder_instance.stopForward()
+            if forwarder_instance and forwarder_instance.isForwarding():
+                forwarder_instance.stopForward()
 
-            if (
-                self._execute_event_handler(
-                    EVENT_FORWARDER_STOPPED,
-                    CONTEXT_NORMAL_PROCESS,
-                    data={
-                        "client_instance": client_instance,
-                        "forwarder_instance": forwarder_instance,
-                    }
-                    | kwargs,
-                )
-                == -1
-            ):
-                return
+                if (
+                    self._execute_event_handler(
+                        EVENT_FORWARDER_STOPPED,
+                        CONTEXT_NORMAL_PROCESS,
+                        data={
+                            "client_instance": client_instance,
+                            "forwarder_instance": forwarder_instance,
+                        }
+                        | kwargs,
+                    )
+                    == -1
+                ):
+                    return
 
-        self._delete_container(container_instance)
+            self._delete_container(container_instance)
 
         if not passive_execution and client_instance:
             client_instance.sendResponse(True, RESPONSE_MSG_OK)
@@ -672,7 +1425,7 @@ class ServerInterface:
     def _handle_stat_request(
         self, client_instance=None, passive_execution=False, **void_kwargs
     ):
-        _, _, uptime = self.getRuntimeStatistics()
+        _, _, uptime, _ = self.getRuntimeStatistics()
 
         runtime_statistics_dict = {
             "version": __version__,
@@ -697,6 +1450,56 @@ class ServerInterface:
                 recv_request_errors,
             ) = client_instance.recvRequest()
 
+        except Exception as E:
+            self._handle_client_error(client_instance, E)
+            return
+
+        self._handle_received_request(
+            client_instance,
+            is_recv_request_valid,
+            recv_request_content,
+            recv_request_errors,
+        )
+
+    def _handle_received_request(self, client_instance, *recv_request_tuple):
+        if self._process_received_request(client_instance, *recv_request_tuple):
+            self._park_kept_alive_client(client_instance)
+
+    # Executed in a worker once the next request of a parked connection is readable
+    def _handle_kept_alive_client(self, client_instance):
+        try:
+            recv_request_tuple = client_instance.recvRequest()
+
+        except (socket.timeout, ConnectionError):
+            # The peer has nothing more to send or is gone
+            self._close_kept_alive_client(client_instance)
+            return
+
+        except Exception as E:
+            self._handle_client_error(client_instance, E)
+            return
+
+        self._handle_received_request(client_instance, *recv_request_tuple)
+
+    # Returns True if the client instance is still open after the request
+    # handler execution, so that the next request can be received
+    def _process_received_request(
+        self,
+        client_instance,
+        is_recv_request_valid,
+        recv_request_content,
+        recv_request_errors,
+    ):
+        try:
+            if self.is_acceptor_worker:
+                self._handoff_client(
+                    client_instance,
+                    is_recv_request_valid,
+                    recv_request_content,
+                    recv_request_errors,
+                )
+                return
+
             if (
                 self._execute_event_handler(
                     EVENT_REQUEST,
@@ -771,43 +1574,285 @@ class ServerInterface:
                 client_instance=client_instance
             )
 
-            if not client_instance.isClosed():
-                client_instance.closeConnection()
+            return not client_instance.isClosed()
+
+        except Exception as E:
+            self._handle_client_error(client_instance, E)
+
+    def _start_kept_alive_client_parking(self):
+        self.keep_alive_selector = selectors.DefaultSelector()
+
+        threading.Thread(
+            target=self._kept_alive_client_parking_routine, daemon=True
+        ).start()
+
+    def _close_kept_alive_client(self, client_instance):
+        try:
+            client_instance.closeConnection()
+
+            self._execute_event_handler(
+                EVENT_CLIENT_CLOSED,
+                CONTEXT_HANDLE_END,
+                data={"client_instance": client_instance},
+            )
+
+        except Exception as E:
+            self._handle_client_error(client_instance, E)
+
+    # Waits for the next request of the client without holding the worker,
+    # or closes the connection if it cannot be kept alive anymore
+    def _park_kept_alive_client(self, client_instance):
+        if (
+            client_instance.isKeepAlive()
+            and client_instance.getReceivedRequestsAmount()
+            < self.max_keep_alive_requests
+        ):
+            with self.keep_alive_selector_lock:
+                if self.is_running and self.keep_alive_selector:
+                    self.keep_alive_selector.register(
+                        client_instance.getSocketDescriptor(),
+                        selectors.EVENT_READ,
+                        data=(
+                            client_instance,
+                            time.monotonic() + self.keep_alive_timeout,
+                        ),
+                    )
+                    return
+
+        self._close_kept_alive_client(client_instance)
+
+    def _unpark_kept_alive_client(self, client_socket):
+        with self.keep_alive_selector_lock:
+            self.keep_alive_selector.unregister(client_socket)
+
+    # Hands the parked connections over to the worker pool once their next
+    # request is readable, and closes the ones which stayed idle for too long
+    def _kept_alive_client_parking_routine(self):
+        while self.is_running:
+            try:
+                with self.keep_alive_selector_lock:
+                    selector_key_list = list(
+                        self.keep_alive_selector.get_map().values()
+                    )
+
+                # The connections parked during the selection expire after the
+                # ones already parked, and after the end of the selection
+                select_timeout = min(
+                    KEEP_ALIVE_POLLING_INTERVAL, self.keep_alive_timeout
+                )
+                actual_timestamp = time.monotonic()
+
+                for selector_key in selector_key_list:
+                    client_instance, expiry_timestamp = selector_key.data
+
+                    if expiry_timestamp <= actual_timestamp:
+                        self._unpark_kept_alive_client(selector_key.fileobj)
+                        self._close_kept_alive_client(client_instance)
+
+                    else:
+                        select_timeout = min(
+                            select_timeout, expiry_timestamp - actual_timestamp
+                        )
+
+                for selector_key, _ in self.keep_alive_selector.select(select_timeout):
+                    client_instance, _ = selector_key.data
+                    self._unpark_kept_alive_client(selector_key.fileobj)
+
+                    if not self.worker_pool.submitTask(
+                        self._handle_kept_alive_client, client_instance
+                    ) and not self.rejection_pool.submitTask(
+                        self._reject_overloaded_client,
+                        selector_key.fileobj,
+                        client_instance,
+                    ):
+                        self._close_kept_alive_client(client_instance)
+
+            except Exception as E:
+                self._execute_event_handler(
+                    EVENT_RUNTIME_ERROR,
+                    CONTEXT_ERROR,
+                    data={
+                        "exception_object": E,
+                        "traceback": self._format_traceback(E),
+                    },
+                )
+
+        with self.keep_alive_selector_lock:
+            selector_key_list = list(self.keep_alive_selector.get_map().values())
+
+            self.keep_alive_selector.close()
+            self.keep_alive_selector = None
+
+        for selector_key in selector_key_list:
+            self._close_kept_alive_client(selector_key.data[0])
+
+    # Executed in the worker pool threads, for the errors the tasks did not handle
+    def _handle_worker_pool_error(self, exception_object):
+        self._execute_event_handler(
+            EVENT_RUNTIME_ERROR,
+            CONTEXT_ERROR,
+            data={
+                "exception_object": exception_object,
+                "traceback": self._format_traceback(exception_object),
+            },
+        )
+
+    def _handle_client_error(self, client_instance, exception_object):
+        self._execute_event_handler(
+            EVENT_RUNTIME_ERROR,
+            CONTEXT_ERROR,
+            data={
+                "exception_object": exception_object,
+                "traceback": self._format_traceback(exception_object),
+                "client_instance": client_instance,
+            },
+        )
+
+        if not client_instance.isClosed():
+            # The error may come from the connection itself
+            try:
+                client_instance.sendResponse(
+                    False,
+                    RESPONSE_MSG_INTERNAL_ERROR,
+                )
+
+            except Exception:
+                pass
+
+            client_instance.closeConnection()
+
+            self._execute_event_handler(
+                EVENT_CLIENT_CLOSED,
+                CONTEXT_HANDLE_END,
+                data={"client_instance": client_instance},
+            )
+
+    def _handle_new_connection(self, new_client_socket):
+        new_client_instance = None
+
+        try:
+            new_client_instance = ClientInstance(
+                new_client_socket,
+                rsa_wrapper=self.rsa_wrapper.makeSessionWrapper(),
+                ecdh_key_provider=self.ecdh_key_provider,
+                session_ticket_manager=self.session_ticket_manager,
+                keep_alive=self.keep_alive_timeout > 0,
+                binary_encoding=self.enable_binary_encoding,
+            )
+
+            if (
+                self._execute_event_handler(
+                    EVENT_CLIENT_INITIALIZED,
+                    CONTEXT_NORMAL_PROCESS,
+                    data={"client_instance": new_client_instance},
+                )
+                == -1
+            ):
+                return
+
+            if new_client_instance.isClosed():
+                return
+
+        except Exception as E:
+            data = {
+                "exception_object": E,
+                "traceback": self._format_traceback(E),
+                "client_socket": new_client_socket,
+            }
+
+            if new_client_instance:
+                data.update({"client_instance": new_client_instance})
+
+            self._execute_event_handler(EVENT_RUNTIME_ERROR, CONTEXT_ERROR, data=data)
+
+            if new_client_instance and not new_client_instance.isClosed():
+                new_client_instance.sendResponse(False, RESPONSE_MSG_INTERNAL_ERROR)
+
+                new_client_instance.closeConnection()
 
                 self._execute_event_handler(
                     EVENT_CLIENT_CLOSED,
                     CONTEXT_HANDLE_END,
-                    data={"client_instance": client_instance},
+                    data={"client_instance": new_client_instance},
                 )
 
-        except Exception as E:
-            self._execute_event_handler(
-                EVENT_RUNTIME_ERROR,
-                CONTEXT_ERROR,
-                data={
-                    "exception_object": E,
-                    "traceback": self._format_traceback(E),
-                    "client_instance": client_instance,
-                },
+            if not isSocketClosed(new_client_socket):
+                new_client_socket.close()
+
+            return
+
+        self._handle_new_client(new_client_instance)
+
+    # Also wakes up the threads blocked on the socket
+    def _shutdown_client_socket(self, client_socket):
+        with contextlib.suppress(OSError):
+            client_socket.shutdown(socket.SHUT_RDWR)
+
+    # The key exchange and request reception are still needed to send an
+    # encrypted response. Since the socket timeout applies to each operation,
+    # the socket is shut down once the deadline is reached to bound the whole
+    # rejection, whatever the pace of the client
+    def _reject_overloaded_client(self, client_socket, kept_alive_client_instance=None):
+        deadline_timer = threading.Timer(
+            OVERLOAD_RESPONSE_TIMEOUT,
+            self._shutdown_client_socket,
+            args=(client_socket,),
+        )
+        deadline_timer.start()
+
+        try:
+            client_socket.settimeout(OVERLOAD_RESPONSE_TIMEOUT)
+
+            # The kept alive clients have already exchanged their keys
+            client_instance = (
+                kept_alive_client_instance
+                if kept_alive_client_instance
+                else ClientInstance(
+                    client_socket,
+                    rsa_wrapper=self.rsa_wrapper.makeSessionWrapper(),
+                    ecdh_key_provider=self.ecdh_key_provider,
+                    session_ticket_manager=self.session_ticket_manager,
+                )
             )
 
-            if not client_instance.isClosed():
+            with client_instance:
+                # The peer expects to send its request before reading any response
+                client_instance.recvRequest(store_request=False)
                 client_instance.sendResponse(
                     False,
-                    RESPONSE_MSG_INTERNAL_ERROR,
+                    RESPONSE_MSG_UNAVAILABLE,
+                    reason="The server is overloaded, retry later",
                 )
 
-                client_instance.closeConnection()
+        except Exception as E:
+            # Slow or gone clients are expected here, they are simply dropped
+            if not deadline_timer.finished.is_set() and not isinstance(E, OSError):
+                self._execute_event_handler(
+                    EVENT_RUNTIME_ERROR,
+                    CONTEXT_ERROR,
+                    data={
+                        "exception_object": E,
+                        "traceback": self._format_traceback(E),
+                        "client_socket": client_socket,
+                    },
+                )
+
+        finally:
+            deadline_timer.cancel()
 
+            if not isSocketClosed(client_socket):
+                client_socket.close()
+
+            if kept_alive_client_instance:
                 self._execute_event_handler(
                     EVENT_CLIENT_CLOSED,
                     CONTEXT_HANDLE_END,
-                    data={"client_instance": client_instance},
+                    data={"client_instance": kept_alive_client_instance},
                 )
 
     def _main_server_loop_routine(self):
         while self.is_running:
-            new_client_instance = None
+            new_client_socket = None
 
             try:
                 try:
@@ -836,55 +1881,166 @@ class ServerInterface:
                 if self.client_timeout:
                     new_client_socket.settimeout(self.client_timeout)
 
-                new_client_instance = ClientInstance(
-                    new_client_socket,
-                    rsa_wrapper=self.rsa_wrapper,
+                # The key exchange is done in the worker pool, or in the
+                # rejection pool if it is full, to not let slow clients
+                # hold the accept loop
+                if not self.worker_pool.submitTask(
+                    self._handle_new_connection, new_client_socket
+                ):
+                    if not self.rejection_pool.submitTask(
+                        self._reject_overloaded_client, new_client_socket
+                    ):
+                        self._shutdown_client_socket(new_client_socket)
+                        new_client_socket.close()
+
+            except Exception as E:
+                self._execute_event_handler(
+                    EVENT_RUNTIME_ERROR,
+                    CONTEXT_ERROR,
+                    data={
+                        "exception_object": E,
+                        "traceback": self._format_traceback(E),
+                        "client_socket": new_client_socket,
+                    },
                 )
 
-                if (
-                    self._execute_event_handler(
-                        EVENT_CLIENT_INITIALIZED,
-                        CONTEXT_NORMAL_PROCESS,
-                        data={"client_instance": new_client_instance},
-                    )
-                    == -1
-                ):
-                    return
+                if new_client_socket and not isSocketClosed(new_client_socket):
+                    new_client_socket.close()
 
-                if new_client_instance.isClosed():
-                    continue
+    # Accept, key exchange and request framing are executed as coroutines on
+    # the event loop, while request handlers (and the blocking libvirt, paramiko
+    # and socat calls they make) are offloaded to the worker pool
+    async def _async_main_server_loop_routine(self):
+        self.event_loop = asyncio.get_running_loop()
+        self.async_main_server_task = asyncio.current_task()
+        self.server_sock.setblocking(False)
 
-                threading.Thread(
-                    target=self._handle_new_client, args=[new_client_instance]
-                ).start()
+        client_task_set = set()
 
-            except Exception as E:
-                data = {
-                    "exception_object": E,
-                    "traceback": self._format_traceback(E),
-                    "client_socket": new_client_socket,
-                }
+        while self.is_running:
+            try:
+                new_client_socket, _ = await self.event_loop.sock_accept(
+                    self.server_sock
+                )
 
-                if new_client_instance:
-                    data.update({"client_instance": new_client_instance})
+            except (OSError, asyncio.CancelledError):
+                # If the server socket is closed in an external method,
+                # the task is cancelled or OSError is raised here
+                break
+
+            # Keep a reference on the task to avoid its garbage collection
+            new_client_task = self.event_loop.create_task(
+                self._async_handle_new_connection(new_client_socket)
+            )
+            client_task_set.add(new_client_task)
+            new_client_task.add_done_callback(client_task_set.discard)
+
+        for client_task in client_task_set:
+            client_task.cancel()
+
+        self.event_loop = None
+
+    async def _async_handle_new_connection(self, new_client_socket):
+        new_client_instance = None
 
+        try:
+            if (
                 self._execute_event_handler(
-                    EVENT_RUNTIME_ERROR, CONTEXT_ERROR, data=data
+                    EVENT_CONNECTION_ACCEPTED,
+                    CONTEXT_NORMAL_PROCESS,
+                    data={"client_socket": new_client_socket},
                 )
+                == -1
+            ):
+                return
 
-                if new_client_instance and not new_client_instance.isClosed():
-                    new_client_instance.sendResponse(False, RESPONSE_MSG_INTERNAL_ERROR)
+            if isSocketClosed(new_client_socket):
+                return
 
-                    new_client_instance.closeConnection()
+            new_client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            new_client_socket.settimeout(self.client_timeout)
+
+            new_client_instance = ClientInstance(
+                new_client_socket,
+                rsa_wrapper=self.rsa_wrapper.makeSessionWrapper(),
+                exchange_keys=False,
+                ecdh_key_provider=self.ecdh_key_provider,
+                session_ticket_manager=self.session_ticket_manager,
+                keep_alive=self.keep_alive_timeout > 0,
+                binary_encoding=self.enable_binary_encoding,
+            )
+            await new_client_instance.asyncExchangeKeys()
 
-                    self._execute_event_handler(
-                        EVENT_CLIENT_CLOSED,
-                        CONTEXT_HANDLE_END,
-                        data={"client_instance": new_client_instance},
+            if (
+                self._execute_event_handler(
+                    EVENT_CLIENT_INITIALIZED,
+                    CONTEXT_NORMAL_PROCESS,
+                    data={"client_instance": new_client_instance},
+                )
+                == -1
+            ):
+                return
+
+            if new_client_instance.isClosed():
+                return
+
+            recv_request_tuple = await new_client_instance.asyncRecvRequest()
+
+            if not self.worker_pool.submitTask(
+                self._handle_received_request,
+                new_client_instance,
+                *recv_request_tuple,
+            ):
+                await new_client_instance.asyncSendResponse(
+                    False,
+                    RESPONSE_MSG_UNAVAILABLE,
+                    reason="The server is overloaded, retry later",
+                )
+
+                new_client_instance.closeConnection()
+
+                self._execute_event_handler(
+                    EVENT_CLIENT_CLOSED,
+                    CONTEXT_HANDLE_END,
+                    data={"client_instance": new_client_instance},
+                )
+
+        except asyncio.CancelledError:
+            if not isSocketClosed(new_client_socket):
+                new_client_socket.close()
+
+        except Exception as E:
+            data = {
+                "exception_object": E,
+                "traceback": self._format_traceback(E),
+                "client_socket": new_client_socket,
+            }
+
+            if new_client_instance:
+                data.update({"client_instance": new_client_instance})
+
+            self._execute_event_handler(EVENT_RUNTIME_ERROR, CONTEXT_ERROR, data=data)
+
+            if new_client_instance and not new_client_instance.isClosed():
+                try:
+                    await new_client_instance.asyncSendResponse(
+                        False, RESPONSE_MSG_INTERNAL_ERROR
                     )
 
-                if not isSocketClosed(new_client_socket):
-                    new_client_socket.close()
+                except Exception:
+                    # The peer is likely gone, nothing more can be sent
+                    pass
+
+                new_client_instance.closeConnection()
+
+                self._execute_event_handler(
+                    EVENT_CLIENT_CLOSED,
+                    CONTEXT_HANDLE_END,
+                    data={"client_instance": new_client_instance},
+                )
+
+            if not isSocketClosed(new_client_socket):
+                new_client_socket.close()
 
     # Event decorators binding for event callback
     @property
@@ -1058,11 +2214,30 @@ class ServerInterface:
     def getRuntimePortForwardingInterface(self) -> PortForwardingInterface:
         return self.port_forwarding_interface
 
+    def getRuntimeWarmPoolManager(self) -> Union[None, WarmPoolManager]:
+        return self.warm_pool_manager
+
+    def getRuntimeGoldenSnapshotManager(self) -> Union[None, GoldenSnapshotManager]:
+        return self.golden_snapshot_manager
+
+    def getRuntimeDomainEventMonitor(self) -> Union[None, DomainEventMonitor]:
+        return self.domain_event_monitor
+
+    def getRuntimeRSAKeyPool(self) -> Union[None, RSAKeyPool]:
+        return self.rsa_key_pool
+
+    def getRuntimeSessionTicketManager(self) -> Union[None, SessionTicketManager]:
+        return self.session_ticket_manager
+
+    def getRuntimeRSAOperationPool(self) -> Union[None, RSAOperationPool]:
+        return self.rsa_operation_pool
+
     def getRuntimeStatistics(self) -> tuple:
         return (
             self.is_running,
             self.recorded_runtime_errors_counter,
             (int(time.time()) - self.start_timestamp) if self.is_running else 0,
+            self.worker_pool.getStatistics(),
         )
 
     def getRequestHandler(self, verb: str) -> Union[None, Callable]:
@@ -1092,6 +2267,16 @@ class ServerInterface:
     ) -> None:
         self.port_forwarding_interface = port_forwarding_interface
 
+    def setRuntimeWarmPoolManager(
+        self, warm_pool_manager: Union[None, WarmPoolManager]
+    ) -> None:
+        self.warm_pool_manager = warm_pool_manager
+
+    def setRuntimeGoldenSnapshotManager(
+        self, golden_snapshot_manager: Union[None, GoldenSnapshotManager]
+    ) -> None:
+        self.golden_snapshot_manager = golden_snapshot_manager
+
     def setRequestHandler(self, verb: str, routine: Callable) -> None:
         self.request_handler_dict.update({verb: routine})
 
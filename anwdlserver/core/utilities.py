@@ -10,10 +10,17 @@ please considerate this function when implementing a new experimental feature
 
 """
 
+from typing import Callable, Union
 from subprocess import Popen, PIPE
+import threading
 import socket
+import queue
 import re
 
+# Default parameters
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_MAX_PENDING_TASKS = 64
+
 
 def isPortBindable(port: int) -> bool:
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -55,3 +62,114 @@ def isInterfaceExists(interface_name: str) -> bool:
 def isUserExists(username: str) -> bool:
     with open("/etc/passwd", "r") as fd:
         return username in fd.read()
+
+
+# Fixed amount of threads executing tasks from a bounded pending queue
+class WorkerPool:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending_tasks: int = DEFAULT_MAX_PENDING_TASKS,
+        error_routine: Union[None, Callable] = None,
+    ):
+        self.max_workers = max_workers
+        self.task_queue = queue.Queue(maxsize=max_pending_tasks)
+
+        # Optional, called with the exception raised by a task
+        self.error_routine = error_routine
+
+        self.busy_workers_counter = 0
+        self.counter_lock = threading.Lock()
+        self.worker_thread_list = []
+        self.is_running = False
+
+    def _worker_routine(self):
+        while self.is_running:
+            try:
+                routine, args = self.task_queue.get(timeout=1)
+
+            except queue.Empty:
+                continue
+
+            with self.counter_lock:
+                self.busy_workers_counter += 1
+
+            # A failing task must not end the worker, nothing would replace it
+            try:
+                routine(*args)
+
+            except Exception as E:
+                if self.error_routine:
+                    try:
+                        self.error_routine(E)
+
+                    except Exception:
+                        pass
+
+            finally:
+                with self.counter_lock:
+                    self.busy_workers_counter -= 1
+
+                self.task_queue.task_done()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getMaxWorkers(self) -> int:
+        return self.max_workers
+
+    def getMaxPendingTasks(self) -> int:
+        return self.task_queue.maxsize
+
+    def getPendingTasksAmount(self) -> int:
+        return self.task_queue.qsize()
+
+    def getBusyWorkersAmount(self) -> int:
+        return self.busy_workers_counter
+
+    def getStatistics(self) -> tuple:
+        return (
+            self.getPendingTasksAmount(),
+            self.getBusyWorkersAmount(),
+            self.max_workers,
+        )
+
+    # Returns False if the pending queue is full, the caller
+    # is then responsible of the overload handling
+    def submitTask(self, routine: Callable, *args) -> bool:
+        if not self.is_running:
+            raise RuntimeError("Worker pool is not running")
+
+        try:
+            self.task_queue.put_nowait((routine, args))
+            return True
+
+        except queue.Full:
+            return False
+
+    def startPool(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Worker pool is already running")
+
+        self.is_running = True
+        self.worker_thread_list = [
+            threading.Thread(target=self._worker_routine)
+            for _ in range(self.max_workers)
+        ]
+
+        for worker_thread in self.worker_thread_list:
+            worker_thread.start()
+
+    def stopPool(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Worker pool is not running")
+
+        # Workers finish their actual task and exit on their next queue poll
+        self.is_running = False
+
+        for worker_thread in self.worker_thread_list:
+            # The pool can be stopped by one of its own tasks
+            if worker_thread is not threading.current_thread():
+                worker_thread.join()
+
+        self.worker_thread_list = []
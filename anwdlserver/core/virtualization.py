@@ -9,13 +9,16 @@ and container management features. It is based on the libvirt API.
 """
 
 from defusedxml.minidom import parseString
-from typing import Union
+from subprocess import Popen, PIPE
+from typing import Callable, Union
+import threading
 import paramiko
 import secrets
 import hashlib
 import libvirt
 import random
 import string
+import struct
 import uuid
 import json
 import time
@@ -39,14 +42,237 @@ DEFAULT_CONTAINER_VCPUS = 2
 DEFAULT_CONTAINER_CLIENT_SSH_PASSWORD_LENGTH = 120
 
 DEFAULT_CONTAINER_WAIT_AVAILABLE = True
+DEFAULT_TRANSIENT_DOMAIN = True
 DEFAULT_STORE_CONTAINER = True
 DEFAULT_STORE_CREDENTIALS = True
 DEFAULT_STOP_CONTAINER_DOMAIN = False
 DEFAULT_OPEN_SHELL = True
 
+DEFAULT_HYPERVISOR_CONNECTIONS = 2
+
+DEFAULT_WARM_POOL_SIZE = 1
+DEFAULT_WARM_POOL_REFILL_INTERVAL = 5
+
+DEFAULT_BASE_IMAGE_FILE_PATH = "/var/lib/anweddol/images/base.qcow2"
+DEFAULT_OVERLAY_DIRECTORY_PATH = "/var/lib/anweddol/overlays"
+DEFAULT_SPARE_OVERLAYS = 2
+DEFAULT_OVERLAY_MAINTENANCE_INTERVAL = 5
+
+DEFAULT_GOLDEN_SNAPSHOT_DIRECTORY_PATH = "/var/lib/anweddol/snapshots"
+DEFAULT_SPARE_SNAPSHOT_IMAGES = 1
+DEFAULT_GOLDEN_SNAPSHOT_MAINTENANCE_INTERVAL = 5
+DEFAULT_INTERFACE_DETACH_TIMEOUT = 10
+
+# Constants definition
+ISO_FILE_CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+IMAGE_MODE_ISO = "iso"
+IMAGE_MODE_OVERLAY = "overlay"
+
+QEMU_IMG_EXECUTABLE_PATH = "/usr/bin/qemu-img"
+SPARE_OVERLAY_FILE_PREFIX = "spare_"
+
+# Locally administered range used by libvirt for QEMU domains
+MAC_ADDRESS_PREFIX = "52:54:00"
+
+# Header of the libvirt QEMU driver save images : magic, version, data length,
+# running state, compression format and cookie offset, followed by the domain
+# XML description, the cookie and the QEMU migration stream
+SAVE_IMAGE_MAGIC = b"LibvirtQemudSave"
+SAVE_IMAGE_HEADER_STRUCT = struct.Struct("=16s5I60x")
+SAVE_IMAGE_FILE_EXTENSION = ".save"
+
+DNSMASQ_STATUS_FILE_PATH_FORMAT = "/var/lib/libvirt/dnsmasq/{}.status"
+
+# Namespace of the metadata element marking the container domains (see
+# 'DOMAIN_XML_TEMPLATE_FORMAT'), so that the domains of the hypervisor
+# which were not created by the server are never touched
+DOMAIN_METADATA_NAMESPACE_URI = "https://the-anweddol-project.github.io/xmlns/container"
+
+# Container domain XML description. The fields depending on the container
+# configuration are rendered once per configuration, the escaped ones
+# for every domain (see 'getDomainXMLTemplate')
+DOMAIN_XML_TEMPLATE_FORMAT = (
+    "<domain type='{domain_type}'>"
+    "<name>{{container_uuid}}</name>"
+    "<uuid>{{container_uuid}}</uuid>"
+    "<metadata>"
+    "<anweddol:container"
+    " xmlns:anweddol='https://the-anweddol-project.github.io/xmlns/container'/>"
+    "</metadata>"
+    "<memory unit='MiB'>{memory}</memory>"
+    "<vcpu placement='static'>{vcpus}</vcpu>"
+    "<os>"
+    "<type arch='x86_64' machine='pc'>hvm</type>"
+    "<boot dev='hd'/>"
+    "<boot dev='cdrom'/>"
+    "</os>"
+    "<features><acpi/><apic/><vmport state='off'/><vmcoreinfo state='off'/></features>"
+    "<clock offset='utc'>"
+    "<timer name='rtc' tickpolicy='catchup'/>"
+    "<timer name='pit' tickpolicy='delay'/>"
+    "<timer name='hpet' present='no'/>"
+    "</clock>"
+    "<pm><suspend-to-mem enabled='yes'/><suspend-to-disk enabled='yes'/></pm>"
+    "<on_reboot>destroy</on_reboot>"
+    "<on_crash>destroy</on_crash>"
+    "<devices>"
+    "{{disk_xml}}"
+    "<interface type='bridge'>"
+    "<mac address='{{mac_address}}'/>"
+    "<source bridge='{nat_interface_name}'/>"
+    "<model type='virtio'/>"
+    "</interface>"
+    "<memballoon model='virtio'>"
+    "<address type='pci' domain='0x0000' bus='0x00' slot='0x07' function='0x0'/>"
+    "</memballoon>"
+    "</devices>"
+    "</domain>"
+)
+OVERLAY_DISK_XML_FORMAT = (
+    "<disk type='file' device='disk'>"
+    "<driver name='qemu' type='qcow2'/>"
+    "<source file='{overlay_file_path}'/>"
+    "<target dev='vda' bus='virtio'/>"
+    "</disk>"
+)
+ISO_DISK_XML_FORMAT = (
+    "<disk type='file' device='cdrom'>"
+    "<driver name='qemu' type='raw'/>"
+    "<source file='{iso_file_path}'/>"
+    "<target dev='hda' bus='ide'/>"
+    "<address type='drive' controller='0' bus='0' target='0' unit='0'/>"
+    "</disk>"
+)
+
+# Interval between two checks of a dnsmasq status file while
+# container domains are waiting for their lease, exprimed in seconds
+DHCP_LEASE_POLLING_INTERVAL = 0.1
+
+# Interval between two checks of a domain description while its
+# network interface is being unplugged, exprimed in seconds
+INTERFACE_DETACH_POLLING_INTERVAL = 0.1
+
+# Interval between two connection attempts to the SSH server of
+# a domain waiting to be endpoint-ready, exprimed in seconds
+ENDPOINT_READY_POLLING_INTERVAL = 1
+
+# ISO file checksums shared by every container instance of the process,
+# keyed by the file path, size, modification time and inode so that a
+# replaced or modified ISO file is hashed again
+iso_file_checksum_cache_dict = {}
+iso_file_checksum_cache_lock = threading.Lock()
+
+# One lease watcher per NAT interface, shared by every container instance
+dhcp_lease_watcher_dict = {}
+dhcp_lease_watcher_dict_lock = threading.Lock()
+
+# Rendered domain XML templates, keyed by container configuration
+domain_xml_template_dict = {}
+
+# The libvirt default event loop implementation can only be registered
+# once per process, and before opening the monitored connections
+is_libvirt_event_implementation_registered = False
+libvirt_event_implementation_lock = threading.Lock()
+
+
+def getISOFileChecksum(iso_file_path: str) -> str:
+    iso_file_path = os.path.abspath(iso_file_path)
+    iso_file_stat = os.stat(iso_file_path)
+    cache_key = (
+        iso_file_path,
+        iso_file_stat.st_size,
+        iso_file_stat.st_mtime_ns,
+        iso_file_stat.st_ino,
+    )
+
+    # The lock is held while hashing, so that concurrent requests
+    # wait for the first computation instead of hashing the file again
+    with iso_file_checksum_cache_lock:
+        checksum = iso_file_checksum_cache_dict.get(cache_key)
+
+        if checksum:
+            return checksum
+
+        hasher = hashlib.sha256()
+        chunk_buffer = bytearray(ISO_FILE_CHECKSUM_CHUNK_SIZE)
+        chunk_view = memoryview(chunk_buffer)
+
+        with open(iso_file_path, "rb", buffering=0) as fd:
+            while read_size := fd.readinto(chunk_buffer):
+                hasher.update(chunk_view[:read_size])
+
+        checksum = hasher.hexdigest()
+
+        # Only the actual version of each file is kept
+        for stored_cache_key in list(iso_file_checksum_cache_dict.keys()):
+            if stored_cache_key[0] == iso_file_path:
+                iso_file_checksum_cache_dict.pop(stored_cache_key)
+
+        iso_file_checksum_cache_dict.update({cache_key: checksum})
+
+        return checksum
+
+
+def makeMACAddress() -> str:
+    return MAC_ADDRESS_PREFIX + "".join(
+        f":{byte:02x}" for byte in secrets.token_bytes(3)
+    )
+
+
+# Checks the container metadata of a domain persistent definition
+def isContainerDomain(domain: libvirt.virDomain) -> bool:
+    try:
+        domain.metadata(
+            libvirt.VIR_DOMAIN_METADATA_ELEMENT,
+            DOMAIN_METADATA_NAMESPACE_URI,
+            libvirt.VIR_DOMAIN_AFFECT_CONFIG,
+        )
+        return True
+
+    except libvirt.libvirtError as E:
+        if E.get_error_code() == libvirt.VIR_ERR_NO_DOMAIN_METADATA:
+            return False
+
+        raise E
+
+
+# Returns the domain XML description of a container configuration,
+# with the 'container_uuid', 'mac_address' and 'disk_xml' fields left
+def getDomainXMLTemplate(
+    domain_type: str = DEFAULT_DOMAIN_TYPE,
+    memory: int = DEFAULT_CONTAINER_MEMORY,
+    vcpus: int = DEFAULT_CONTAINER_VCPUS,
+    nat_interface_name: str = DEFAULT_NAT_INTERFACE_NAME,
+) -> str:
+    template_key = (domain_type, memory, vcpus, nat_interface_name)
+    domain_xml_template = domain_xml_template_dict.get(template_key)
+
+    if not domain_xml_template:
+        domain_xml_template = DOMAIN_XML_TEMPLATE_FORMAT.format(
+            domain_type=domain_type,
+            memory=memory,
+            vcpus=vcpus,
+            nat_interface_name=nat_interface_name,
+        )
+        domain_xml_template_dict.update({template_key: domain_xml_template})
+
+    return domain_xml_template
+
 
 # Represents an established SSH tunnel between the server and a container domain
 class EndpointShellInstance:
+    __slots__ = (
+        "container_ip",
+        "stored_client_ssh_uername",
+        "stored_client_ssh_password",
+        "endpoint_username",
+        "endpoint_password",
+        "endpoint_listen_port",
+        "ssh_client",
+        "is_closed",
+    )
+
     def __init__(
         self,
         container_ip: str = None,
@@ -184,8 +410,484 @@ class EndpointShellInstance:
         self.is_closed = True
 
 
+# Keeps an in-memory MAC -> IP index of the DHCP leases given by the
+# libvirt dnsmasq instance of a NAT interface. The status file is only
+# parsed again when it changes, and a single thread watches it on behalf
+# of every container domain waiting for its lease
+class DHCPLeaseWatcher:
+    def __init__(
+        self,
+        nat_interface_name: str = DEFAULT_NAT_INTERFACE_NAME,
+        polling_interval: float = DHCP_LEASE_POLLING_INTERVAL,
+    ):
+        self.nat_interface_name = nat_interface_name
+        self.status_file_path = DNSMASQ_STATUS_FILE_PATH_FORMAT.format(
+            nat_interface_name
+        )
+        self.polling_interval = polling_interval
+
+        self.lease_ip_dict = {}
+        self.status_file_signature = None
+
+        self.lease_condition = threading.Condition()
+        self.waiters_counter = 0
+        self.watch_thread = None
+
+    # Must be called with the lease condition acquired
+    def _refresh_lease_index(self):
+        try:
+            status_file_stat = os.stat(self.status_file_path)
+            status_file_signature = (
+                status_file_stat.st_ino,
+                status_file_stat.st_size,
+                status_file_stat.st_mtime_ns,
+            )
+
+        except FileNotFoundError:
+            status_file_signature = None
+
+        if status_file_signature == self.status_file_signature:
+            return False
+
+        lease_ip_dict = {}
+
+        if status_file_signature:
+            with open(self.status_file_path, "r") as fd:
+                status_content = fd.read()
+
+            try:
+                for lease_info in json.loads(status_content or "[]"):
+                    lease_ip_dict.update(
+                        {lease_info["mac-address"]: lease_info.get("ip-address")}
+                    )
+
+            # The file is being written, it will be read on the next check
+            except ValueError:
+                return False
+
+        self.lease_ip_dict = lease_ip_dict
+        self.status_file_signature = status_file_signature
+
+        return True
+
+    def _watch_routine(self):
+        with self.lease_condition:
+            while self.waiters_counter:
+                if self._refresh_lease_index():
+                    self.lease_condition.notify_all()
+
+                self.lease_condition.wait(timeout=self.polling_interval)
+
+            self.watch_thread = None
+
+    def getNATInterfaceName(self) -> str:
+        return self.nat_interface_name
+
+    def getStatusFilePath(self) -> str:
+        return self.status_file_path
+
+    def getIP(self, mac_address: str) -> Union[None, str]:
+        with self.lease_condition:
+            self._refresh_lease_index()
+
+            return self.lease_ip_dict.get(mac_address)
+
+    def waitIP(
+        self, mac_address: str, timeout: Union[None, float] = None
+    ) -> Union[None, str]:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.lease_condition:
+            self._refresh_lease_index()
+
+            self.waiters_counter += 1
+
+            if not self.watch_thread:
+                self.watch_thread = threading.Thread(
+                    target=self._watch_routine, daemon=True
+                )
+                self.watch_thread.start()
+
+            try:
+                while True:
+                    lease_ip = self.lease_ip_dict.get(mac_address)
+
+                    if lease_ip:
+                        return lease_ip
+
+                    if deadline is None:
+                        self.lease_condition.wait()
+                        continue
+
+                    remaining_time = deadline - time.monotonic()
+
+                    if remaining_time <= 0:
+                        return None
+
+                    self.lease_condition.wait(timeout=remaining_time)
+
+            finally:
+                self.waiters_counter -= 1
+
+
+def getDHCPLeaseWatcher(nat_interface_name: str) -> DHCPLeaseWatcher:
+    with dhcp_lease_watcher_dict_lock:
+        dhcp_lease_watcher = dhcp_lease_watcher_dict.get(nat_interface_name)
+
+        if not dhcp_lease_watcher:
+            dhcp_lease_watcher = DHCPLeaseWatcher(nat_interface_name)
+            dhcp_lease_watcher_dict.update({nat_interface_name: dhcp_lease_watcher})
+
+        return dhcp_lease_watcher
+
+
+# Persistent hypervisor connections shared between container instances.
+# libvirt connections are thread-safe, so they are handed out in turn
+class HypervisorConnectionPool:
+    def __init__(
+        self,
+        driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI,
+        max_connections: int = DEFAULT_HYPERVISOR_CONNECTIONS,
+    ):
+        if max_connections < 1:
+            raise ValueError("The connections amount must be greater than 0")
+
+        self.driver_uri = driver_uri
+        self.max_connections = max_connections
+
+        # Connections are opened on first use
+        self.connection_list = [None] * max_connections
+        self.connection_list_lock = threading.Lock()
+        self.next_connection_index = 0
+        self.reconnections_counter = 0
+        self.is_closed = False
+
+    def __del__(self):
+        if not self.is_closed:
+            self.closePool()
+
+    def isClosed(self) -> bool:
+        return self.is_closed
+
+    def getDriverURI(self) -> str:
+        return self.driver_uri
+
+    def getMaxConnections(self) -> int:
+        return self.max_connections
+
+    def getReconnectionsAmount(self) -> int:
+        return self.reconnections_counter
+
+    def getConnection(self) -> libvirt.virConnect:
+        with self.connection_list_lock:
+            if self.is_closed:
+                raise RuntimeError("Hypervisor connection pool is closed")
+
+            connection_index = self.next_connection_index
+            self.next_connection_index = (connection_index + 1) % self.max_connections
+
+            hypervisor_connection = self.connection_list[connection_index]
+
+            if hypervisor_connection is not None:
+                if hypervisor_connection.isAlive():
+                    return hypervisor_connection
+
+                # The connection died (libvirtd restart, broken socket ...)
+                self.reconnections_counter += 1
+
+                try:
+                    hypervisor_connection.close()
+
+                except libvirt.libvirtError:
+                    pass
+
+            hypervisor_connection = libvirt.open(self.driver_uri)
+            self.connection_list[connection_index] = hypervisor_connection
+
+            return hypervisor_connection
+
+    def closePool(self) -> None:
+        with self.connection_list_lock:
+            if self.is_closed:
+                raise RuntimeError("Hypervisor connection pool is already closed")
+
+            for hypervisor_connection in self.connection_list:
+                if hypervisor_connection is None:
+                    continue
+
+                try:
+                    hypervisor_connection.close()
+
+                except libvirt.libvirtError:
+                    pass
+
+            self.connection_list = [None] * self.max_connections
+            self.is_closed = True
+
+
+# Prepares a qcow2 base image out of the container ISO file once, and hands
+# thin copy-on-write overlays of it over to the container domains. Overlays
+# are created and deleted on a background thread, so that claiming one only
+# renames a spare overlay file
+class OverlayImageManager:
+    def __init__(
+        self,
+        iso_file_path: str,
+        base_image_file_path: str = DEFAULT_BASE_IMAGE_FILE_PATH,
+        overlay_directory_path: str = DEFAULT_OVERLAY_DIRECTORY_PATH,
+        spare_overlays: int = DEFAULT_SPARE_OVERLAYS,
+        maintenance_interval: int = DEFAULT_OVERLAY_MAINTENANCE_INTERVAL,
+    ):
+        if spare_overlays < 0:
+            raise ValueError("The spare overlays amount must be positive")
+
+        self.iso_file_path = os.path.abspath(iso_file_path)
+        self.base_image_file_path = os.path.abspath(base_image_file_path)
+        self.overlay_directory_path = os.path.abspath(overlay_directory_path)
+        self.spare_overlays = spare_overlays
+        self.maintenance_interval = maintenance_interval
+
+        self.spare_overlay_path_list = []
+        self.released_overlay_path_list = []
+        self.overlay_path_list_lock = threading.Lock()
+        self.maintenance_event = threading.Event()
+        self.maintenance_thread = None
+        self.is_running = False
+
+        self.hits_counter = 0
+        self.misses_counter = 0
+        self.deleted_overlays_counter = 0
+        self.errors_counter = 0
+        self.last_exception = None
+
+    def __del__(self):
+        if self.is_running:
+            self.stopManager()
+
+    def _execute_qemu_img(self, argument_list):
+        process = Popen(
+            [QEMU_IMG_EXECUTABLE_PATH] + argument_list,
+            stdout=PIPE,
+            stderr=PIPE,
+            shell=False,
+        )
+        _, _stderr = process.communicate()
+
+        if process.returncode != 0:
+            raise RuntimeError(
+                f"Failed to execute qemu-img (stderr='{_stderr.decode().rstrip()}')"
+            )
+
+    def _delete_overlay(self, overlay_file_path):
+        try:
+            os.remove(overlay_file_path)
+
+        except FileNotFoundError:
+            pass
+
+        self.deleted_overlays_counter += 1
+
+    def _maintenance_routine(self):
+        while self.is_running:
+            try:
+                with self.overlay_path_list_lock:
+                    released_overlay_path_list = self.released_overlay_path_list
+                    self.released_overlay_path_list = []
+
+                for overlay_file_path in released_overlay_path_list:
+                    self._delete_overlay(overlay_file_path)
+
+                while self.is_running:
+                    with self.overlay_path_list_lock:
+                        if len(self.spare_overlay_path_list) >= self.spare_overlays:
+                            break
+
+                    new_overlay_file_path = os.path.join(
+                        self.overlay_directory_path,
+                        f"{SPARE_OVERLAY_FILE_PREFIX}{uuid.uuid4().hex}.qcow2",
+                    )
+                    self.createOverlay(new_overlay_file_path)
+
+                    with self.overlay_path_list_lock:
+                        self.spare_overlay_path_list.append(new_overlay_file_path)
+
+            except Exception as E:
+                self.errors_counter += 1
+                self.last_exception = E
+
+            # Woken up when an overlay is claimed or released
+            self.maintenance_event.wait(timeout=self.maintenance_interval)
+            self.maintenance_event.clear()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getISOFilePath(self) -> str:
+        return self.iso_file_path
+
+    def getBaseImageFilePath(self) -> str:
+        return self.base_image_file_path
+
+    def getOverlayDirectoryPath(self) -> str:
+        return self.overlay_directory_path
+
+    def getSpareOverlaysAmount(self) -> int:
+        with self.overlay_path_list_lock:
+            return len(self.spare_overlay_path_list)
+
+    def getLastException(self) -> Union[None, Exception]:
+        return self.last_exception
+
+    def getStatistics(self) -> tuple:
+        return (
+            self.getSpareOverlaysAmount(),
+            self.hits_counter,
+            self.misses_counter,
+            self.deleted_overlays_counter,
+            self.errors_counter,
+        )
+
+    # An existing base image is kept as is, so that an image with the
+    # container OS installed on it can be provided instead of the ISO file
+    def prepareBaseImage(self) -> bool:
+        if os.path.exists(self.base_image_file_path):
+            return False
+
+        os.makedirs(os.path.dirname(self.base_image_file_path), exist_ok=True)
+
+        # Converted aside, so that an interrupted conversion is never used
+        temporary_file_path = self.base_image_file_path + ".tmp"
+
+        self._execute_qemu_img(
+            [
+                "convert",
+                "-f",
+                "raw",
+                "-O",
+                "qcow2",
+                self.iso_file_path,
+                temporary_file_path,
+            ]
+        )
+        os.replace(temporary_file_path, self.base_image_file_path)
+
+        return True
+
+    # Overlays are based on the base image, unless another overlay is
+    # specified so that its content is shared by the new overlay
+    def createOverlay(
+        self, overlay_file_path: str, backing_file_path: str = None
+    ) -> None:
+        self._execute_qemu_img(
+            [
+                "create",
+                "-f",
+                "qcow2",
+                "-F",
+                "qcow2",
+                "-b",
+                backing_file_path if backing_file_path else self.base_image_file_path,
+                overlay_file_path,
+            ]
+        )
+
+    def claimOverlay(self, container_uuid: str) -> str:
+        overlay_file_path = os.path.join(
+            self.overlay_directory_path, f"{container_uuid}.qcow2"
+        )
+
+        with self.overlay_path_list_lock:
+            spare_overlay_file_path = (
+                self.spare_overlay_path_list.pop(0)
+                if self.spare_overlay_path_list
+                else None
+            )
+
+            if spare_overlay_file_path:
+                self.hits_counter += 1
+
+            else:
+                self.misses_counter += 1
+
+        if spare_overlay_file_path:
+            os.rename(spare_overlay_file_path, overlay_file_path)
+
+        else:
+            self.createOverlay(overlay_file_path)
+
+        self.maintenance_event.set()
+
+        return overlay_file_path
+
+    def releaseOverlay(self, overlay_file_path: str) -> None:
+        if not self.is_running:
+            self._delete_overlay(overlay_file_path)
+            return
+
+        with self.overlay_path_list_lock:
+            self.released_overlay_path_list.append(overlay_file_path)
+
+        self.maintenance_event.set()
+
+    def startManager(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Overlay image manager is already running")
+
+        if not os.path.exists(self.base_image_file_path):
+            raise RuntimeError("Base image is not prepared")
+
+        os.makedirs(self.overlay_directory_path, exist_ok=True)
+
+        # Spare overlays left over by a previous process are not tracked
+        for file_name in os.listdir(self.overlay_directory_path):
+            if file_name.startswith(SPARE_OVERLAY_FILE_PREFIX):
+                os.remove(os.path.join(self.overlay_directory_path, file_name))
+
+        self.is_running = True
+
+        self.maintenance_thread = threading.Thread(
+            target=self._maintenance_routine, daemon=True
+        )
+        self.maintenance_thread.start()
+
+    def stopManager(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Overlay image manager is not running")
+
+        self.is_running = False
+        self.maintenance_event.set()
+
+        # An overlay can be being created, wait for it to be handled
+        self.maintenance_thread.join()
+        self.maintenance_thread = None
+
+        with self.overlay_path_list_lock:
+            for overlay_file_path in (
+                self.spare_overlay_path_list + self.released_overlay_path_list
+            ):
+                self._delete_overlay(overlay_file_path)
+
+            self.spare_overlay_path_list = []
+            self.released_overlay_path_list = []
+
+
 # Represents a container and its management functionnalities
 class ContainerInstance:
+    __slots__ = (
+        "iso_file_path",
+        "uuid",
+        "nat_interface_name",
+        "memory",
+        "vcpus",
+        "hypervisor_connection_pool",
+        "overlay_image_manager",
+        "overlay_file_path",
+        "transient_domain",
+        "domain_descriptor",
+        "domain_metadata_dict",
+        "boot_duration",
+    )
+
     def __init__(
         self,
         iso_file_path: str = None,
@@ -193,24 +895,97 @@ class ContainerInstance:
         nat_interface_name: str = DEFAULT_NAT_INTERFACE_NAME,
         memory: int = DEFAULT_CONTAINER_MEMORY,
         vcpus: int = DEFAULT_CONTAINER_VCPUS,
+        hypervisor_connection_pool: HypervisorConnectionPool = None,
+        overlay_image_manager: OverlayImageManager = None,
+        transient_domain: bool = DEFAULT_TRANSIENT_DOMAIN,
     ):
         self.iso_file_path = os.path.abspath(iso_file_path) if iso_file_path else None
         self.uuid = container_uuid if container_uuid else str(uuid.uuid4())
         self.nat_interface_name = nat_interface_name
         self.memory = memory
         self.vcpus = vcpus
+        self.hypervisor_connection_pool = hypervisor_connection_pool
+
+        # Optional, the domain boots the ISO file as a cdrom without it
+        self.overlay_image_manager = overlay_image_manager
+        self.overlay_file_path = None
+
+        # A transient domain leaves no definition behind once it is stopped
+        self.transient_domain = transient_domain
 
         self.domain_descriptor = None
+        self.boot_duration = None
+
+        # The MAC address and IP of the domain, looked up once and
+        # cleared whenever the domain is started, restored or stopped
+        self.domain_metadata_dict = {}
 
     def __del__(self):
         if self.isDomainRunning():
             self.stopDomain()
 
+    def _get_domain_descriptor(self):
+        # A domain descriptor becomes unusable when its connection dies,
+        # it is then looked up again on a live connection of the pool
+        if (
+            self.hypervisor_connection_pool
+            and self.domain_descriptor is not None
+            and not self.domain_descriptor.connect().isAlive()
+        ):
+            self.domain_descriptor = (
+                self.hypervisor_connection_pool.getConnection().lookupByUUIDString(
+                    self.uuid
+                )
+            )
+
+        return self.domain_descriptor
+
+    def _open_hypervisor_connection(self, driver_uri):
+        # Borrow a persistent connection from the pool if it targets the
+        # same hypervisor, otherwise open a dedicated one for this call
+        is_pooled_connection = (
+            self.hypervisor_connection_pool is not None
+            and self.hypervisor_connection_pool.getDriverURI() == driver_uri
+        )
+        hypervisor_connection = (
+            self.hypervisor_connection_pool.getConnection()
+            if is_pooled_connection
+            else libvirt.open(driver_uri)
+        )
+
+        return (hypervisor_connection, is_pooled_connection)
+
+    def _wait_domain_ip(self, wait_max_tryout):
+        # Woken up as soon as the lease of the domain appears,
+        # 'wait_max_tryout' is the amount of seconds to wait for it
+        container_ip = getDHCPLeaseWatcher(self.nat_interface_name).waitIP(
+            self.getMAC(),
+            timeout=wait_max_tryout if wait_max_tryout != -1 else None,
+        )
+
+        if not container_ip:
+            raise TimeoutError(
+                "Maximum try amount was reached while trying to get container domain IP"
+            )
+
+        self.domain_metadata_dict.update({"ip": container_ip})
+
     def isDomainRunning(self) -> bool:
         if self.domain_descriptor is None:
             return False
 
-        return self.domain_descriptor.isActive()
+        try:
+            return self._get_domain_descriptor().isActive()
+
+        except libvirt.libvirtError as E:
+            # A stopped transient domain does not exist anymore
+            if E.get_error_code() == libvirt.VIR_ERR_NO_DOMAIN:
+                return False
+
+            raise E
+
+    def isTransientDomain(self) -> bool:
+        return self.transient_domain
 
     def getNATInterfaceName(self) -> str:
         return self.nat_interface_name
@@ -228,32 +1003,35 @@ class ContainerInstance:
         if self.domain_descriptor is None:
             raise RuntimeError("Container domain is not created")
 
-        # Get the container MAC address
-        container_domain_xml = parseString(self.domain_descriptor.XMLDesc(0))
-        return container_domain_xml.getElementsByTagName("mac")[0].getAttribute(
-            "address"
-        )
+        mac_address = self.domain_metadata_dict.get("mac")
+
+        if not mac_address:
+            # Get the container MAC address
+            container_domain_xml = parseString(self._get_domain_descriptor().XMLDesc(0))
+            mac_element = container_domain_xml.getElementsByTagName("mac")[0]
+            mac_address = mac_element.getAttribute("address")
+
+            self.domain_metadata_dict.update({"mac": mac_address})
+
+        return mac_address
 
     def getIP(self) -> Union[None, str]:
         if self.domain_descriptor is None:
             raise RuntimeError("Container domain is not created")
 
-        container_mac_address = self.getMAC()
+        container_ip = self.domain_metadata_dict.get("ip")
 
-        # Get the content of the dnsmasq interface file to get its IP
-        with open(
-            f"/var/lib/libvirt/dnsmasq/{self.nat_interface_name}.status", "r"
-        ) as fd:
-            status_content = fd.read()
-
-        if container_mac_address not in status_content:
-            return
+        # The lease of a MAC address keeps its IP, so it is only
+        # looked up until the domain obtained one
+        if not container_ip:
+            container_ip = getDHCPLeaseWatcher(self.nat_interface_name).getIP(
+                self.getMAC()
+            )
 
-        for container_net_info in json.loads(status_content):
-            if container_net_info["mac-address"] != container_mac_address:
-                continue
+            if container_ip:
+                self.domain_metadata_dict.update({"ip": container_ip})
 
-            return container_net_info.get("ip-address")
+        return container_ip
 
     def getMemory(self) -> int:
         return self.memory
@@ -261,8 +1039,23 @@ class ContainerInstance:
     def getVCPUs(self) -> int:
         return self.vcpus
 
+    def getHypervisorConnectionPool(self) -> Union[None, HypervisorConnectionPool]:
+        return self.hypervisor_connection_pool
+
+    def getOverlayImageManager(self) -> Union[None, OverlayImageManager]:
+        return self.overlay_image_manager
+
+    def getOverlayFilePath(self) -> Union[None, str]:
+        return self.overlay_file_path
+
+    # Amount of seconds between the domain start and its IP
+    # lease, or None if the domain was started without waiting
+    def getBootDuration(self) -> Union[None, float]:
+        return self.boot_duration
+
     def setDomainDescriptor(self, domain_descriptor: libvirt.virDomain) -> None:
         self.domain_descriptor = domain_descriptor
+        self.domain_metadata_dict = {}
 
     def setISOFilePath(self, iso_file_path: str) -> None:
         self.iso_file_path = os.path.abspath(iso_file_path)
@@ -275,17 +1068,37 @@ class ContainerInstance:
 
     def setNATInterfaceName(self, nat_interface_name: str) -> None:
         self.nat_interface_name = nat_interface_name
+        self.domain_metadata_dict.pop("ip", None)
+
+    def setHypervisorConnectionPool(
+        self, hypervisor_connection_pool: HypervisorConnectionPool
+    ) -> None:
+        self.hypervisor_connection_pool = hypervisor_connection_pool
+
+    def setOverlayImageManager(
+        self, overlay_image_manager: Union[None, OverlayImageManager]
+    ) -> None:
+        self.overlay_image_manager = overlay_image_manager
+
+    def setOverlayFilePath(self, overlay_file_path: Union[None, str]) -> None:
+        self.overlay_file_path = overlay_file_path
+
+    def setTransientDomain(self, transient_domain: bool) -> None:
+        self.transient_domain = transient_domain
+
+    def releaseOverlay(self) -> None:
+        if self.isDomainRunning():
+            raise RuntimeError("Container domain is running")
+
+        if self.overlay_file_path:
+            self.overlay_image_manager.releaseOverlay(self.overlay_file_path)
+            self.overlay_file_path = None
 
     def makeISOFileChecksum(self) -> str:
         if not self.iso_file_path:
             raise RuntimeError("ISO file path is not set")
 
-        hasher = hashlib.sha256()
-
-        with open(self.iso_file_path, "rb") as fd:
-            hasher.update(fd.read())
-
-        return hasher.hexdigest()
+        return getISOFileChecksum(self.iso_file_path)
 
     def createEndpointShell(
         self,
@@ -315,115 +1128,255 @@ class ContainerInstance:
         if self.isDomainRunning():
             raise RuntimeError("Container domain is already running")
 
-        if not self.iso_file_path:
+        if not self.iso_file_path and not self.overlay_image_manager:
             raise ValueError("Container domain ISO file path is not set")
 
-        hypervisor_connection = libvirt.open(driver_uri)
+        hypervisor_connection, is_pooled_connection = self._open_hypervisor_connection(
+            driver_uri
+        )
 
         try:
-            new_domain_xml = f"""
-    			<domain type='{domain_type}'>
-    				<name>{self.uuid}</name>
-    				<memory unit='MiB'>{self.memory}</memory>
-    				<vcpu placement='static'>{self.vcpus}</vcpu>
-    				<uuid>{self.uuid}</uuid>
-    				<os>
-    					<type arch='x86_64' machine='pc'>hvm</type>
-    					<boot dev='hd'/>
-    					<boot dev='cdrom'/>
-    				</os>
-    				<features>
-    					<acpi/>
-    					<apic/>
-    					<vmport state='off'/>
-                        <vmcoreinfo state='off'/>
-    				</features>
-    				<clock offset='utc'>
-    					<timer name='rtc' tickpolicy='catchup'/>
-    					<timer name='pit' tickpolicy='delay'/>
-    					<timer name='hpet' present='no'/>
-    				</clock>
-    				<pm>
-    					<suspend-to-mem enabled='yes'/>
-    					<suspend-to-disk enabled='yes'/>
-    				</pm>
-                    <on_reboot>destroy</on_reboot>
-                    <on_crash>destroy</on_crash>
-    				<devices>
-    					<disk type='file' device='cdrom'>
-    						<driver name='qemu' type='raw'/>
-    						<source file='{self.iso_file_path}'/>
-    						<target dev='hda' bus='ide'/>
-    						<address type='drive' controller='0' bus='0' target='0' unit='0'/>
-    					</disk>
-    					<interface type='bridge'>
-    				        <start mode='onboot'/>
-    				        <source bridge='{self.nat_interface_name}'/> 
-    				        <model type='virtio'/>
-    				    </interface>
-                        <memballoon model='virtio'>
-    						<address type='pci' domain='0x0000' bus='0x00' slot='0x07' function='0x0'/>
-    					</memballoon>
-    				</devices>
-    			</domain>"""
-
-            self.domain_descriptor = hypervisor_connection.defineXML(new_domain_xml)
-            self.domain_descriptor.create()
+            # The domain boots from its own overlay of the base image, the
+            # writes are then never applied on the base image itself
+            if self.overlay_image_manager:
+                if not self.overlay_file_path:
+                    self.overlay_file_path = self.overlay_image_manager.claimOverlay(
+                        self.uuid
+                    )
 
-            if wait_available:
-                tryout_counter = wait_max_tryout
+                disk_xml = OVERLAY_DISK_XML_FORMAT.format(
+                    overlay_file_path=self.overlay_file_path
+                )
 
-                while tryout_counter != 0:
-                    if self.getIP():
-                        break
+            else:
+                disk_xml = ISO_DISK_XML_FORMAT.format(iso_file_path=self.iso_file_path)
 
-                    time.sleep(1)
+            # The MAC address is assigned here rather than by libvirt,
+            # so it is known without reading the domain description back
+            mac_address = makeMACAddress()
+            new_domain_xml = getDomainXMLTemplate(
+                domain_type, self.memory, self.vcpus, self.nat_interface_name
+            ).format(
+                container_uuid=self.uuid, mac_address=mac_address, disk_xml=disk_xml
+            )
 
-                    if wait_max_tryout == -1:
-                        continue
+            boot_start_time = time.monotonic()
 
-                    tryout_counter -= 1
+            self.domain_metadata_dict = {"mac": mac_address}
 
-                if tryout_counter == 0 and wait_max_tryout != -1:
-                    raise TimeoutError(
-                        "Maximum try amount was reached while trying to get container domain IP"
-                    )
+            if self.transient_domain:
+                self.domain_descriptor = hypervisor_connection.createXML(
+                    new_domain_xml, 0
+                )
 
-            hypervisor_connection.close()
+            else:
+                self.domain_descriptor = hypervisor_connection.defineXML(new_domain_xml)
+                self.domain_descriptor.create()
+
+            if wait_available:
+                self._wait_domain_ip(wait_max_tryout)
+                self.boot_duration = time.monotonic() - boot_start_time
 
         except Exception as E:
-            hypervisor_connection.close()
+            # The overlay is kept by a running domain, which is stopped by the caller
+            if self.overlay_file_path and not self.isDomainRunning():
+                self.releaseOverlay()
+
             raise E
 
-    def stopDomain(self) -> None:
+        finally:
+            if not is_pooled_connection:
+                hypervisor_connection.close()
+
+    # The saved domain keeps its overlay, since the memory image refers to it
+    def saveDomain(self, save_image_file_path: str) -> None:
         if not self.isDomainRunning():
             raise RuntimeError("Container domain is not running")
 
-        self.domain_descriptor.destroy()
+        self._get_domain_descriptor().save(save_image_file_path)
 
+    # The domain is restored under the UUID stored in the memory image,
+    # which must be the UUID of this container instance
+    def restoreDomain(
+        self,
+        save_image_file_path: str,
+        wait_available: bool = DEFAULT_CONTAINER_WAIT_AVAILABLE,
+        wait_max_tryout: int = DEFAULT_CONTAINER_MAX_TRYOUT,
+        driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI,
+    ) -> None:
+        if self.isDomainRunning():
+            raise RuntimeError("Container domain is already running")
 
-class VirtualizationInterface:
-    def __init__(self):
-        self.stored_container_instance_dict = {}
+        hypervisor_connection, is_pooled_connection = self._open_hypervisor_connection(
+            driver_uri
+        )
 
-    def __del__(self):
-        container_deletion_list = []
+        try:
+            boot_start_time = time.monotonic()
+
+            hypervisor_connection.restore(save_image_file_path)
+            self.domain_descriptor = hypervisor_connection.lookupByUUIDString(self.uuid)
+
+            # Memory images are saved without network interface, the plugged
+            # one gets a new MAC address which makes the guest request a lease
+            mac_address = makeMACAddress()
+
+            self.domain_metadata_dict = {"mac": mac_address}
+            self.domain_descriptor.attachDeviceFlags(
+                f"""<interface type='bridge'>
+                    <mac address='{mac_address}'/>
+                    <source bridge='{self.nat_interface_name}'/>
+                    <model type='virtio'/>
+                </interface>""",
+                libvirt.VIR_DOMAIN_AFFECT_LIVE,
+            )
 
-        for (
-            stored_container_uuid,
-            stored_container_instance,
-        ) in self.stored_container_instance_dict.items():
-            if stored_container_instance.isDomainRunning():
-                stored_container_instance.stopDomain()
+            if wait_available:
+                self._wait_domain_ip(wait_max_tryout)
+                self.boot_duration = time.monotonic() - boot_start_time
 
-            container_deletion_list.append(stored_container_uuid)
+        except Exception as E:
+            if self.overlay_file_path and not self.isDomainRunning():
+                self.releaseOverlay()
 
-        for stored_container_uuid in container_deletion_list:
-            self.deleteStoredContainer(stored_container_uuid)
+            raise E
 
-    def getStoredContainersAmount(self) -> int:
+        finally:
+            if not is_pooled_connection:
+                hypervisor_connection.close()
+
+    # Unplugs the network interfaces of the domain, so that its memory image
+    # can be restored several times without sharing their MAC address
+    def detachInterfaces(
+        self, timeout: Union[None, float] = DEFAULT_INTERFACE_DETACH_TIMEOUT
+    ) -> None:
+        if not self.isDomainRunning():
+            raise RuntimeError("Container domain is not running")
+
+        domain_descriptor = self._get_domain_descriptor()
+        self.domain_metadata_dict = {}
+
+        for interface_element in parseString(
+            domain_descriptor.XMLDesc(0)
+        ).getElementsByTagName("interface"):
+            domain_descriptor.detachDeviceFlags(
+                interface_element.toxml(), libvirt.VIR_DOMAIN_AFFECT_LIVE
+            )
+
+        # The guest acknowledges the unplug asynchronously
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while parseString(domain_descriptor.XMLDesc(0)).getElementsByTagName(
+            "interface"
+        ):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    "Container domain network interfaces were not detached in time"
+                )
+
+            time.sleep(INTERFACE_DETACH_POLLING_INTERVAL)
+
+    def stopDomain(self) -> None:
+        if not self.isDomainRunning():
+            raise RuntimeError("Container domain is not running")
+
+        self._get_domain_descriptor().destroy()
+        self.domain_metadata_dict = {}
+
+        if self.overlay_file_path:
+            self.releaseOverlay()
+
+
+class VirtualizationInterface:
+    def __init__(
+        self,
+        driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI,
+        max_hypervisor_connections: int = DEFAULT_HYPERVISOR_CONNECTIONS,
+        runtime_overlay_image_manager: Union[None, OverlayImageManager] = None,
+        transient_domains: bool = DEFAULT_TRANSIENT_DOMAIN,
+        max_running_container_domains: Union[None, int] = None,
+    ):
+        self.stored_container_instance_dict = {}
+
+        # UUID of the containers whose domain is running or being started, be
+        # they stored, pooled or being provisioned. A slot is reserved before a
+        # domain is started, so that their amount never exceeds the maximum
+        self.max_running_container_domains = max_running_container_domains
+        self.domain_slot_uuid_set = set()
+        self.domain_slot_lock = threading.Lock()
+
+        # Optional, the created containers boot the ISO file without it
+        self.overlay_image_manager = runtime_overlay_image_manager
+        self.transient_domains = transient_domains
+
+        # Shared by every container instance created by this interface
+        self.hypervisor_connection_pool = HypervisorConnectionPool(
+            driver_uri=driver_uri, max_connections=max_hypervisor_connections
+        )
+
+    def __del__(self):
+        container_deletion_list = []
+
+        for (
+            stored_container_uuid,
+            stored_container_instance,
+        ) in self.stored_container_instance_dict.items():
+            if stored_container_instance.isDomainRunning():
+                stored_container_instance.stopDomain()
+
+            container_deletion_list.append(stored_container_uuid)
+
+        for stored_container_uuid in container_deletion_list:
+            self.deleteStoredContainer(stored_container_uuid)
+
+    def getHypervisorConnectionPool(self) -> HypervisorConnectionPool:
+        return self.hypervisor_connection_pool
+
+    def getRuntimeOverlayImageManager(self) -> Union[None, OverlayImageManager]:
+        return self.overlay_image_manager
+
+    def isTransientDomains(self) -> bool:
+        return self.transient_domains
+
+    def getStoredContainersAmount(self) -> int:
         return len(self.listStoredContainers())
 
+    def getMaxRunningContainerDomains(self) -> Union[None, int]:
+        return self.max_running_container_domains
+
+    def getReservedDomainSlotsAmount(self) -> int:
+        with self.domain_slot_lock:
+            return len(self.domain_slot_uuid_set)
+
+    # Returns None if the amount of running container domains is not bounded
+    def getAvailableDomainSlotsAmount(self) -> Union[None, int]:
+        if self.max_running_container_domains is None:
+            return None
+
+        with self.domain_slot_lock:
+            return max(
+                0, self.max_running_container_domains - len(self.domain_slot_uuid_set)
+            )
+
+    # Returns False if every slot is already reserved
+    def reserveDomainSlot(self, container_uuid: str) -> bool:
+        with self.domain_slot_lock:
+            if container_uuid in self.domain_slot_uuid_set:
+                return True
+
+            if (
+                self.max_running_container_domains is not None
+                and len(self.domain_slot_uuid_set) >= self.max_running_container_domains
+            ):
+                return False
+
+            self.domain_slot_uuid_set.add(container_uuid)
+            return True
+
+    def releaseDomainSlot(self, container_uuid: str) -> None:
+        with self.domain_slot_lock:
+            self.domain_slot_uuid_set.discard(container_uuid)
+
     def listStoredContainers(self) -> list:
         return self.stored_container_instance_dict.keys()
 
@@ -441,7 +1394,11 @@ class VirtualizationInterface:
     def createContainer(
         self, store: bool = DEFAULT_STORE_CONTAINER
     ) -> ContainerInstance:
-        new_container_interface = ContainerInstance()
+        new_container_interface = ContainerInstance(
+            hypervisor_connection_pool=self.hypervisor_connection_pool,
+            overlay_image_manager=self.overlay_image_manager,
+            transient_domain=self.transient_domains,
+        )
 
         if store:
             self.storeContainer(new_container_interface)
@@ -459,4 +1416,779 @@ class VirtualizationInterface:
             if container_instance and container_instance.isDomainRunning():
                 container_instance.stopDomain()
 
-        self.stored_container_instance_dict.pop(container_uuid, None)
+        container_instance = self.stored_container_instance_dict.pop(
+            container_uuid, None
+        )
+
+        # Also released for the containers that were never stored
+        self.releaseDomainSlot(container_uuid)
+
+        # The overlay of a domain which stopped by itself is still kept
+        if container_instance and not container_instance.isDomainRunning():
+            container_instance.releaseOverlay()
+
+    # The inactive persistent domains carrying the container metadata are
+    # definitions left behind by previous runs. Returns the amount of undefined
+    # domains. It is called before the server starts, so a dedicated
+    # connection is used instead of opening a pooled one
+    def undefineLeftoverDomains(self) -> int:
+        hypervisor_connection = libvirt.open(
+            self.hypervisor_connection_pool.getDriverURI()
+        )
+        stored_container_uuid_set = set(self.listStoredContainers())
+
+        try:
+            leftover_domain_list = [
+                domain
+                for domain in hypervisor_connection.listAllDomains(
+                    libvirt.VIR_CONNECT_LIST_DOMAINS_INACTIVE
+                    | libvirt.VIR_CONNECT_LIST_DOMAINS_PERSISTENT
+                )
+                if domain.name() == domain.UUIDString()
+                and domain.UUIDString() not in stored_container_uuid_set
+                and isContainerDomain(domain)
+            ]
+
+            for domain in leftover_domain_list:
+                domain.undefine()
+
+        finally:
+            hypervisor_connection.close()
+
+        return len(leftover_domain_list)
+
+
+# Keeps container domains booted and endpoint-ready in the background,
+# so that they can be claimed instantly instead of being cold-booted
+class WarmPoolManager:
+    def __init__(
+        self,
+        iso_file_path: str,
+        runtime_virtualization_interface: VirtualizationInterface,
+        pool_size: int = DEFAULT_WARM_POOL_SIZE,
+        nat_interface_name: str = DEFAULT_NAT_INTERFACE_NAME,
+        memory: int = DEFAULT_CONTAINER_MEMORY,
+        vcpus: int = DEFAULT_CONTAINER_VCPUS,
+        wait_max_tryout: int = DEFAULT_CONTAINER_MAX_TRYOUT,
+        driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI,
+        domain_type: str = DEFAULT_DOMAIN_TYPE,
+        refill_interval: int = DEFAULT_WARM_POOL_REFILL_INTERVAL,
+    ):
+        if pool_size < 1:
+            raise ValueError("The pool size must be greater than 0")
+
+        self.iso_file_path = iso_file_path
+        self.virtualization_interface = runtime_virtualization_interface
+        self.pool_size = pool_size
+        self.nat_interface_name = nat_interface_name
+        self.memory = memory
+        self.vcpus = vcpus
+        self.wait_max_tryout = wait_max_tryout
+        self.driver_uri = driver_uri
+        self.domain_type = domain_type
+        self.refill_interval = refill_interval
+
+        self.ready_container_instance_list = []
+        self.ready_container_instance_list_lock = threading.Lock()
+        self.refill_event = threading.Event()
+        self.refill_thread = None
+        self.is_running = False
+
+        self.hits_counter = 0
+        self.misses_counter = 0
+        self.boot_errors_counter = 0
+        self.last_boot_exception = None
+
+    def __del__(self):
+        if self.is_running:
+            self.stopPool()
+
+    def _is_refill_allowed(self):
+        with self.ready_container_instance_list_lock:
+            return len(self.ready_container_instance_list) < self.pool_size
+
+    def _release_container(self, container_instance):
+        if container_instance.isDomainRunning():
+            container_instance.stopDomain()
+
+        # The overlay of a domain which stopped by itself is still kept
+        else:
+            container_instance.releaseOverlay()
+
+        self.virtualization_interface.releaseDomainSlot(container_instance.getUUID())
+
+    # Pooled domains hold a running domain slot, since they use the same
+    # resources as the ones handed over to clients. Returns None if every
+    # slot is already reserved
+    def _boot_container(self):
+        new_container_instance = self.virtualization_interface.createContainer(
+            store=False
+        )
+
+        if not self.virtualization_interface.reserveDomainSlot(
+            new_container_instance.getUUID()
+        ):
+            return None
+
+        new_container_instance.setISOFilePath(self.iso_file_path)
+        new_container_instance.setNATInterfaceName(self.nat_interface_name)
+        new_container_instance.setMemory(self.memory)
+        new_container_instance.setVCPUs(self.vcpus)
+
+        try:
+            new_container_instance.startDomain(
+                wait_available=True,
+                wait_max_tryout=self.wait_max_tryout,
+                driver_uri=self.driver_uri,
+                domain_type=self.domain_type,
+            )
+
+        except Exception as E:
+            self._release_container(new_container_instance)
+
+            raise E
+
+        return new_container_instance
+
+    def _discard_stopped_containers(self):
+        with self.ready_container_instance_list_lock:
+            stopped_container_instance_list = [
+                container_instance
+                for container_instance in self.ready_container_instance_list
+                if not container_instance.isDomainRunning()
+            ]
+
+            for container_instance in stopped_container_instance_list:
+                self.ready_container_instance_list.remove(container_instance)
+                self._release_container(container_instance)
+
+    def _refill_routine(self):
+        while self.is_running:
+            try:
+                self._discard_stopped_containers()
+
+                while self.is_running and self._is_refill_allowed():
+                    new_container_instance = self._boot_container()
+
+                    if not new_container_instance:
+                        break
+
+                    with self.ready_container_instance_list_lock:
+                        if self.is_running:
+                            self.ready_container_instance_list.append(
+                                new_container_instance
+                            )
+                            continue
+
+                    # The pool was stopped during the boot
+                    self._release_container(new_container_instance)
+
+            except Exception as E:
+                self.boot_errors_counter += 1
+                self.last_boot_exception = E
+
+            # Woken up when a container is claimed, or periodically to
+            # check the pooled domains and the running domain slots
+            self.refill_event.wait(timeout=self.refill_interval)
+            self.refill_event.clear()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getPoolSize(self) -> int:
+        return self.pool_size
+
+    def getReadyContainersAmount(self) -> int:
+        with self.ready_container_instance_list_lock:
+            return len(self.ready_container_instance_list)
+
+    def getLastBootException(self) -> Union[None, Exception]:
+        return self.last_boot_exception
+
+    def getStatistics(self) -> tuple:
+        return (
+            self.getReadyContainersAmount(),
+            self.hits_counter,
+            self.misses_counter,
+            self.boot_errors_counter,
+        )
+
+    def setPoolSize(self, pool_size: int) -> None:
+        if pool_size < 1:
+            raise ValueError("The pool size must be greater than 0")
+
+        self.pool_size = pool_size
+        self.refill_event.set()
+
+    # The claimed container keeps its running domain slot, which
+    # is released once it is deleted from the virtualization interface
+    def claimContainer(self) -> Union[None, ContainerInstance]:
+        if not self.is_running:
+            raise RuntimeError("Warm pool is not running")
+
+        claimed_container_instance = None
+
+        with self.ready_container_instance_list_lock:
+            while self.ready_container_instance_list:
+                container_instance = self.ready_container_instance_list.pop(0)
+
+                if container_instance.isDomainRunning():
+                    claimed_container_instance = container_instance
+                    break
+
+                self._release_container(container_instance)
+
+            if claimed_container_instance:
+                self.hits_counter += 1
+
+            else:
+                self.misses_counter += 1
+
+        self.refill_event.set()
+
+        return claimed_container_instance
+
+    def startPool(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Warm pool is already running")
+
+        self.is_running = True
+
+        self.refill_thread = threading.Thread(target=self._refill_routine, daemon=True)
+        self.refill_thread.start()
+
+    def stopPool(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Warm pool is not running")
+
+        self.is_running = False
+        self.refill_event.set()
+
+        # A domain can be booting, wait for it to be handled
+        self.refill_thread.join()
+        self.refill_thread = None
+
+        with self.ready_container_instance_list_lock:
+            for container_instance in self.ready_container_instance_list:
+                self._release_container(container_instance)
+
+            self.ready_container_instance_list = []
+
+
+# Boots a reference container domain once, brings it to the endpoint-ready
+# state and saves its memory. Copies of this golden snapshot, patched with a
+# new UUID, are then restored instead of booting new container domains
+class GoldenSnapshotManager:
+    def __init__(
+        self,
+        iso_file_path: str,
+        runtime_virtualization_interface: VirtualizationInterface,
+        snapshot_directory_path: str = DEFAULT_GOLDEN_SNAPSHOT_DIRECTORY_PATH,
+        spare_images: int = DEFAULT_SPARE_SNAPSHOT_IMAGES,
+        nat_interface_name: str = DEFAULT_NAT_INTERFACE_NAME,
+        memory: int = DEFAULT_CONTAINER_MEMORY,
+        vcpus: int = DEFAULT_CONTAINER_VCPUS,
+        wait_max_tryout: int = DEFAULT_CONTAINER_MAX_TRYOUT,
+        driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI,
+        domain_type: str = DEFAULT_DOMAIN_TYPE,
+        endpoint_username: str = DEFAULT_CONTAINER_ENDPOINT_USERNAME,
+        endpoint_password: str = DEFAULT_CONTAINER_ENDPOINT_PASSWORD,
+        endpoint_listen_port: int = DEFAULT_CONTAINER_ENDPOINT_LISTEN_PORT,
+        maintenance_interval: int = DEFAULT_GOLDEN_SNAPSHOT_MAINTENANCE_INTERVAL,
+    ):
+        if spare_images < 0:
+            raise ValueError("The spare images amount must be positive")
+
+        self.iso_file_path = iso_file_path
+        self.virtualization_interface = runtime_virtualization_interface
+        self.snapshot_directory_path = os.path.abspath(snapshot_directory_path)
+        self.spare_images = spare_images
+        self.nat_interface_name = nat_interface_name
+        self.memory = memory
+        self.vcpus = vcpus
+        self.wait_max_tryout = wait_max_tryout
+        self.driver_uri = driver_uri
+        self.domain_type = domain_type
+        self.endpoint_username = endpoint_username
+        self.endpoint_password = endpoint_password
+        self.endpoint_listen_port = endpoint_listen_port
+        self.maintenance_interval = maintenance_interval
+
+        # The reference container instance is kept, since the
+        # overlays of the restored domains are based on its own
+        self.golden_container_instance = None
+        self.golden_image_file_path = None
+
+        # Spare images are stored as (container UUID, image file path, overlay file path)
+        self.spare_image_tuple_list = []
+        self.released_image_file_path_list = []
+        self.image_list_lock = threading.Lock()
+        self.maintenance_event = threading.Event()
+        self.maintenance_thread = None
+        self.is_running = False
+
+        self.hits_counter = 0
+        self.misses_counter = 0
+        self.errors_counter = 0
+        self.last_exception = None
+
+    def __del__(self):
+        if self.is_running:
+            self.stopManager()
+
+    def _delete_image(self, image_file_path):
+        try:
+            os.remove(image_file_path)
+
+        except FileNotFoundError:
+            pass
+
+    def _wait_endpoint_ready(self, container_instance):
+        # The SSH server of the guest starts some time after the lease
+        deadline = (
+            time.monotonic() + self.wait_max_tryout
+            if self.wait_max_tryout != -1
+            else None
+        )
+
+        while True:
+            try:
+                container_instance.createEndpointShell(
+                    endpoint_username=self.endpoint_username,
+                    endpoint_password=self.endpoint_password,
+                    endpoint_listen_port=self.endpoint_listen_port,
+                    open_shell=True,
+                ).closeShell()
+                return
+
+            except Exception as E:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"Maximum try amount was reached while waiting for the container endpoint ({E})"
+                    )
+
+            time.sleep(ENDPOINT_READY_POLLING_INTERVAL)
+
+    def _prepare_golden_snapshot(self):
+        golden_container_instance = self.virtualization_interface.createContainer(
+            store=False
+        )
+        golden_container_instance.setISOFilePath(self.iso_file_path)
+        golden_container_instance.setNATInterfaceName(self.nat_interface_name)
+        golden_container_instance.setMemory(self.memory)
+        golden_container_instance.setVCPUs(self.vcpus)
+
+        golden_image_file_path = os.path.join(
+            self.snapshot_directory_path,
+            golden_container_instance.getUUID() + SAVE_IMAGE_FILE_EXTENSION,
+        )
+
+        try:
+            golden_container_instance.startDomain(
+                wait_available=True,
+                wait_max_tryout=self.wait_max_tryout,
+                driver_uri=self.driver_uri,
+                domain_type=self.domain_type,
+            )
+
+            self._wait_endpoint_ready(golden_container_instance)
+            golden_container_instance.detachInterfaces()
+            golden_container_instance.saveDomain(golden_image_file_path)
+
+        except Exception as E:
+            if golden_container_instance.isDomainRunning():
+                golden_container_instance.stopDomain()
+
+            else:
+                golden_container_instance.releaseOverlay()
+
+            self._delete_image(golden_image_file_path)
+
+            raise E
+
+        self.golden_container_instance = golden_container_instance
+        self.golden_image_file_path = golden_image_file_path
+
+    # The UUID of the golden domain is its name, its UUID and the name of its
+    # overlay file in the domain XML description. Since the new UUID has the
+    # same length, the XML description is patched without changing the header
+    def _copy_golden_image(self, container_uuid, image_file_path):
+        with open(self.golden_image_file_path, "rb", buffering=0) as source_fd:
+            header = source_fd.read(SAVE_IMAGE_HEADER_STRUCT.size)
+            (
+                magic,
+                _,
+                data_length,
+                _,
+                compression_format,
+                _,
+            ) = SAVE_IMAGE_HEADER_STRUCT.unpack(header)
+
+            if magic != SAVE_IMAGE_MAGIC:
+                raise ValueError("Golden snapshot is not a libvirt save image")
+
+            if compression_format:
+                raise ValueError("Compressed save images are not supported")
+
+            data = source_fd.read(data_length).replace(
+                self.golden_container_instance.getUUID().encode(),
+                container_uuid.encode(),
+            )
+
+            with open(image_file_path, "wb", buffering=0) as destination_fd:
+                destination_fd.write(header + data)
+
+                # The memory image is copied by the kernel, which
+                # can share the data blocks on filesystems supporting it
+                offset = SAVE_IMAGE_HEADER_STRUCT.size + data_length
+                image_size = os.fstat(source_fd.fileno()).st_size
+
+                while offset < image_size:
+                    offset += os.copy_file_range(
+                        source_fd.fileno(),
+                        destination_fd.fileno(),
+                        image_size - offset,
+                        offset_src=offset,
+                        offset_dst=offset,
+                    )
+
+    def _make_spare_image(self):
+        container_uuid = str(uuid.uuid4())
+        image_file_path = os.path.join(
+            self.snapshot_directory_path, container_uuid + SAVE_IMAGE_FILE_EXTENSION
+        )
+        overlay_file_path = None
+
+        # The disk of the golden domain is shared through a new overlay,
+        # the memory image then refers to it with the new UUID
+        golden_overlay_file_path = self.golden_container_instance.getOverlayFilePath()
+
+        if golden_overlay_file_path:
+            overlay_file_path = golden_overlay_file_path.replace(
+                self.golden_container_instance.getUUID(), container_uuid
+            )
+            self.golden_container_instance.getOverlayImageManager().createOverlay(
+                overlay_file_path, backing_file_path=golden_overlay_file_path
+            )
+
+        try:
+            self._copy_golden_image(container_uuid, image_file_path)
+
+        except Exception as E:
+            self._delete_image(image_file_path)
+
+            if overlay_file_path:
+                self.golden_container_instance.getOverlayImageManager().releaseOverlay(
+                    overlay_file_path
+                )
+
+            raise E
+
+        return (container_uuid, image_file_path, overlay_file_path)
+
+    def _restore_container(self, container_uuid, image_file_path, overlay_file_path):
+        new_container_instance = ContainerInstance(
+            iso_file_path=self.iso_file_path,
+            container_uuid=container_uuid,
+            nat_interface_name=self.nat_interface_name,
+            memory=self.memory,
+            vcpus=self.vcpus,
+            hypervisor_connection_pool=self.virtualization_interface.getHypervisorConnectionPool(),
+            overlay_image_manager=self.golden_container_instance.getOverlayImageManager(),
+        )
+        new_container_instance.setOverlayFilePath(overlay_file_path)
+
+        try:
+            new_container_instance.restoreDomain(
+                image_file_path,
+                wait_available=True,
+                wait_max_tryout=self.wait_max_tryout,
+                driver_uri=self.driver_uri,
+            )
+
+        except Exception as E:
+            if new_container_instance.isDomainRunning():
+                new_container_instance.stopDomain()
+
+            raise E
+
+        return new_container_instance
+
+    def _maintenance_routine(self):
+        while self.is_running:
+            try:
+                with self.image_list_lock:
+                    released_image_file_path_list = self.released_image_file_path_list
+                    self.released_image_file_path_list = []
+
+                for image_file_path in released_image_file_path_list:
+                    self._delete_image(image_file_path)
+
+                if not self.golden_image_file_path:
+                    self._prepare_golden_snapshot()
+
+                while self.is_running:
+                    with self.image_list_lock:
+                        if len(self.spare_image_tuple_list) >= self.spare_images:
+                            break
+
+                    spare_image_tuple = self._make_spare_image()
+
+                    # Deleted by stopManager if the manager was stopped meanwhile
+                    with self.image_list_lock:
+                        self.spare_image_tuple_list.append(spare_image_tuple)
+
+            except Exception as E:
+                self.errors_counter += 1
+                self.last_exception = E
+
+            # Woken up when an image is claimed, or periodically
+            # to retry preparing the golden snapshot after an error
+            self.maintenance_event.wait(timeout=self.maintenance_interval)
+            self.maintenance_event.clear()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def isGoldenSnapshotPrepared(self) -> bool:
+        return self.golden_image_file_path is not None
+
+    def getSnapshotDirectoryPath(self) -> str:
+        return self.snapshot_directory_path
+
+    def getGoldenImageFilePath(self) -> Union[None, str]:
+        return self.golden_image_file_path
+
+    def getSpareImagesAmount(self) -> int:
+        with self.image_list_lock:
+            return len(self.spare_image_tuple_list)
+
+    def getLastException(self) -> Union[None, Exception]:
+        return self.last_exception
+
+    def getStatistics(self) -> tuple:
+        return (
+            self.getSpareImagesAmount(),
+            self.hits_counter,
+            self.misses_counter,
+            self.errors_counter,
+        )
+
+    # Returns None if the golden snapshot is not prepared yet or if the
+    # restoration failed, the container domain must then be cold-booted
+    def claimContainer(self) -> Union[None, ContainerInstance]:
+        if not self.is_running:
+            raise RuntimeError("Golden snapshot manager is not running")
+
+        with self.image_list_lock:
+            spare_image_tuple = (
+                self.spare_image_tuple_list.pop(0)
+                if self.spare_image_tuple_list
+                else None
+            )
+
+            if spare_image_tuple:
+                self.hits_counter += 1
+
+            else:
+                self.misses_counter += 1
+
+        try:
+            if not spare_image_tuple:
+                if not self.golden_image_file_path:
+                    return None
+
+                spare_image_tuple = self._make_spare_image()
+
+            # The restored domain needs a running domain slot, the
+            # image is kept for a later claim if none is available
+            if not self.virtualization_interface.reserveDomainSlot(
+                spare_image_tuple[0]
+            ):
+                with self.image_list_lock:
+                    if self.is_running:
+                        self.spare_image_tuple_list.insert(0, spare_image_tuple)
+                        spare_image_tuple = None
+
+                return None
+
+            try:
+                return self._restore_container(*spare_image_tuple)
+
+            except Exception as E:
+                self.virtualization_interface.releaseDomainSlot(spare_image_tuple[0])
+
+                raise E
+
+        except Exception as E:
+            self.errors_counter += 1
+            self.last_exception = E
+
+            return None
+
+        finally:
+            # The memory image is not needed anymore once restored
+            if spare_image_tuple:
+                with self.image_list_lock:
+                    self.released_image_file_path_list.append(spare_image_tuple[1])
+
+            self.maintenance_event.set()
+
+    def startManager(self) -> None:
+        if self.is_running:
+            raise RuntimeError("Golden snapshot manager is already running")
+
+        os.makedirs(self.snapshot_directory_path, exist_ok=True)
+
+        # Images left over by a previous process refer to deleted overlays
+        for file_name in os.listdir(self.snapshot_directory_path):
+            if file_name.endswith(SAVE_IMAGE_FILE_EXTENSION):
+                os.remove(os.path.join(self.snapshot_directory_path, file_name))
+
+        self.is_running = True
+
+        self.maintenance_thread = threading.Thread(
+            target=self._maintenance_routine, daemon=True
+        )
+        self.maintenance_thread.start()
+
+    def stopManager(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Golden snapshot manager is not running")
+
+        self.is_running = False
+        self.maintenance_event.set()
+
+        # The golden snapshot or an image can be being prepared, wait for it
+        self.maintenance_thread.join()
+        self.maintenance_thread = None
+
+        with self.image_list_lock:
+            for _, image_file_path, overlay_file_path in self.spare_image_tuple_list:
+                self._delete_image(image_file_path)
+
+                if overlay_file_path:
+                    self.golden_container_instance.getOverlayImageManager().releaseOverlay(
+                        overlay_file_path
+                    )
+
+            for image_file_path in self.released_image_file_path_list:
+                self._delete_image(image_file_path)
+
+            self.spare_image_tuple_list = []
+            self.released_image_file_path_list = []
+
+        if self.golden_image_file_path:
+            self._delete_image(self.golden_image_file_path)
+            self.golden_image_file_path = None
+
+        if self.golden_container_instance:
+            self.golden_container_instance.releaseOverlay()
+            self.golden_container_instance = None
+
+
+# Dispatches the libvirt domain lifecycle events, received on a
+# dedicated event loop thread, to the registered routines
+class DomainEventMonitor:
+    def __init__(self, driver_uri: str = DEFAULT_LIBVIRT_DRIVER_URI):
+        self.driver_uri = driver_uri
+
+        self.hypervisor_connection = None
+        self.lifecycle_callback_id = None
+        self.event_loop_thread = None
+        self.is_running = False
+
+        self.lifecycle_event_routine_list = []
+
+    def __del__(self):
+        if self.is_running:
+            self.stopMonitor()
+
+    def _lifecycle_event_callback(self, connection, domain, event, detail, opaque):
+        domain_uuid = domain.UUIDString()
+
+        # This is executed on the event loop thread, so the
+        # routines must not block for a long time
+        for routine in self.lifecycle_event_routine_list:
+            try:
+                routine(domain_uuid, event, detail)
+
+            except Exception:
+                pass
+
+    def _event_loop_routine(self):
+        while self.is_running:
+            libvirt.virEventRunDefaultImpl()
+
+    def isRunning(self) -> bool:
+        return self.is_running
+
+    def getDriverURI(self) -> str:
+        return self.driver_uri
+
+    def addLifecycleEventRoutine(self, routine: Callable) -> None:
+        self.lifecycle_event_routine_list.append(routine)
+
+    def removeLifecycleEventRoutine(self, routine: Callable) -> None:
+        self.lifecycle_event_routine_list.remove(routine)
+
+    def startMonitor(self) -> None:
+        global is_libvirt_event_implementation_registered
+
+        if self.is_running:
+            raise RuntimeError("Domain event monitor is already running")
+
+        with libvirt_event_implementation_lock:
+            if not is_libvirt_event_implementation_registered:
+                libvirt.virEventRegisterDefaultImpl()
+                is_libvirt_event_implementation_registered = True
+
+        self.hypervisor_connection = libvirt.open(self.driver_uri)
+
+        try:
+            self.lifecycle_callback_id = (
+                self.hypervisor_connection.domainEventRegisterAny(
+                    None,
+                    libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE,
+                    self._lifecycle_event_callback,
+                    None,
+                )
+            )
+
+        except Exception as E:
+            self.hypervisor_connection.close()
+            self.hypervisor_connection = None
+            raise E
+
+        self.is_running = True
+
+        self.event_loop_thread = threading.Thread(
+            target=self._event_loop_routine, daemon=True
+        )
+        self.event_loop_thread.start()
+
+    def stopMonitor(self) -> None:
+        if not self.is_running:
+            raise RuntimeError("Domain event monitor is not running")
+
+        self.is_running = False
+
+        try:
+            self.hypervisor_connection.domainEventDeregisterAny(
+                self.lifecycle_callback_id
+            )
+            self.hypervisor_connection.close()
+
+        finally:
+            self.hypervisor_connection = None
+            self.lifecycle_callback_id = None
+
+            # Wake the event loop up with an immediate timeout,
+            # so that it notices that the monitor is stopped
+            def wake_up_callback(timer_id, opaque):
+                libvirt.virEventRemoveTimeout(timer_id)
+
+            libvirt.virEventAddTimeout(0, wake_up_callback, None)
+
+            self.event_loop_thread.join()
+            self.event_loop_thread = None
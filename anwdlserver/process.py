@@ -24,11 +24,29 @@ from .core.server import (
     RESPONSE_MSG_REFUSED_REQ,
     REQUEST_VERB_STAT,
     REQUEST_VERB_CREATE,
+    REQUEST_VERB_BATCHCREATE,
     EVENT_CONTAINER_DOMAIN_STARTED,
 )
+from .core.virtualization import (
+    VirtualizationInterface,
+    WarmPoolManager,
+    GoldenSnapshotManager,
+    DomainEventMonitor,
+    OverlayImageManager,
+    IMAGE_MODE_OVERLAY,
+    getDomainXMLTemplate,
+)
+from .core.port_forwarding import (
+    PortForwardingInterface,
+    SocatForwardingBackend,
+    SelectorForwardingBackend,
+    NftablesForwardingBackend,
+    FORWARDING_BACKEND_SELECTOR,
+    FORWARDING_BACKEND_NFTABLES,
+)
 from .core.sanitization import makeResponse
 from .web.server import WebServerInterface
-from .core.crypto import RSAWrapper
+from .core.crypto import RSAWrapper, RSAKeyPool
 
 from .tools.access_token import AccessTokenManager
 from .utilities import createFileRecursively
@@ -59,10 +77,14 @@ class AnweddolServerCLIServerProcess:
         disable_logging=False,
     ):
         self.enable_traceback_on_log = enable_traceback_on_log
-        self.actual_running_container_domains_counter = 0
         self.config_content = config_content
         self.access_token_manager = None
         self.runtime_rsa_wrapper = None
+        self.runtime_rsa_key_pool = None
+        self.runtime_warm_pool_manager = None
+        self.runtime_golden_snapshot_manager = None
+        self.runtime_domain_event_monitor = None
+        self.runtime_overlay_image_manager = None
         self.server_interface = None
         self.log_manager = None
         self.is_running = False
@@ -92,6 +114,9 @@ class AnweddolServerCLIServerProcess:
             if self.access_token_manager:
                 self.access_token_manager.closeDatabase()
 
+            if self.runtime_rsa_key_pool and self.runtime_rsa_key_pool.isRunning():
+                self.runtime_rsa_key_pool.stopPool()
+
             raise E
 
     def _initialize(self):
@@ -121,36 +146,178 @@ class AnweddolServerCLIServerProcess:
                 "private_rsa_key_file_path"
             )
 
-            if not self.config_content["server"].get("enable_onetime_rsa_keys"):
+            enable_onetime_rsa_keys = self.config_content["server"].get(
+                "enable_onetime_rsa_keys"
+            )
+
+            # The key pair is generated in another process while
+            # the rest of the server is being initialized
+            if enable_onetime_rsa_keys or not os.path.exists(private_key_path):
+                self._log(LOG_INFO, "Generating instance RSA key pair ...")
+
+                self.runtime_rsa_key_pool = RSAKeyPool(pool_size=1)
+                self.runtime_rsa_key_pool.startPool()
+
+            else:
                 self._log(LOG_INFO, "Loading instance RSA key pair ...")
 
-                if not os.path.exists(private_key_path):
-                    createFileRecursively(private_key_path)
+                self.runtime_rsa_wrapper = RSAWrapper(generate_key_pair=False)
 
-                    self.runtime_rsa_wrapper = RSAWrapper()
+                with open(private_key_path, "r") as fd:
+                    self.runtime_rsa_wrapper.setPrivateKey(
+                        fd.read().encode(),
+                        derivate_public_key=not os.path.exists(public_key_path),
+                    )
 
+                if not os.path.exists(public_key_path):
                     with open(public_key_path, "w") as fd:
                         fd.write(self.runtime_rsa_wrapper.getPublicKey().decode())
 
-                    with open(private_key_path, "w") as fd:
-                        fd.write(self.runtime_rsa_wrapper.getPrivateKey().decode())
-
                 else:
-                    self.runtime_rsa_wrapper = RSAWrapper(generate_key_pair=False)
+                    with open(public_key_path, "r") as fd:
+                        self.runtime_rsa_wrapper.setPublicKey(fd.read().encode())
 
-                    with open(private_key_path, "r") as fd:
-                        self.runtime_rsa_wrapper.setPrivateKey(
-                            fd.read().encode(),
-                            derivate_public_key=not os.path.exists(public_key_path),
-                        )
+        if self.config_content["container"].get("image_mode") == IMAGE_MODE_OVERLAY:
+            self.runtime_overlay_image_manager = OverlayImageManager(
+                container_iso_file_path,
+                base_image_file_path=self.config_content["container"].get(
+                    "base_image_file_path"
+                ),
+                overlay_directory_path=self.config_content["container"].get(
+                    "overlay_directory_path"
+                ),
+                spare_overlays=self.config_content["container"].get("spare_overlays"),
+            )
+
+            if not os.path.exists(
+                self.runtime_overlay_image_manager.getBaseImageFilePath()
+            ):
+                self._log(LOG_INFO, "Preparing container base image ...")
+                self.runtime_overlay_image_manager.prepareBaseImage()
+
+            # Started by the server, once the acceptor workers are forked
+
+        runtime_virtualization_interface = VirtualizationInterface(
+            max_hypervisor_connections=self.config_content["container"].get(
+                "max_hypervisor_connections"
+            ),
+            runtime_overlay_image_manager=self.runtime_overlay_image_manager,
+            transient_domains=self.config_content["container"].get(
+                "enable_transient_domains"
+            ),
+            max_running_container_domains=self.config_content["container"].get(
+                "max_allowed_running_container_domains"
+            ),
+        )
 
-                    if not os.path.exists(public_key_path):
-                        with open(public_key_path, "w") as fd:
-                            fd.write(self.runtime_rsa_wrapper.getPublicKey().decode())
+        if self.config_content["container"].get("undefine_leftover_domains"):
+            self._log(LOG_INFO, "Undefining leftover container domains ...")
 
-                    else:
-                        with open(public_key_path, "r") as fd:
-                            self.runtime_rsa_wrapper.setPublicKey(fd.read().encode())
+            undefined_domains_amount = (
+                runtime_virtualization_interface.undefineLeftoverDomains()
+            )
+
+            if undefined_domains_amount:
+                self._log(
+                    LOG_INFO,
+                    f"{undefined_domains_amount} leftover container domain definition(s) undefined",
+                )
+
+        # Rendered once, the container domains only fill their own fields in
+        getDomainXMLTemplate(
+            domain_type=self.config_content["container"].get("domain_type"),
+            memory=self.config_content["container"].get("container_memory"),
+            vcpus=self.config_content["container"].get("container_vcpus"),
+            nat_interface_name=self.config_content["container"].get(
+                "nat_interface_name"
+            ),
+        )
+
+        if self.config_content["container"].get("warm_pool_size"):
+            self._log(LOG_INFO, "Initializing container warm pool ...")
+
+            self.runtime_warm_pool_manager = WarmPoolManager(
+                container_iso_file_path,
+                runtime_virtualization_interface,
+                pool_size=self.config_content["container"].get("warm_pool_size"),
+                nat_interface_name=self.config_content["container"].get(
+                    "nat_interface_name"
+                ),
+                memory=self.config_content["container"].get("container_memory"),
+                vcpus=self.config_content["container"].get("container_vcpus"),
+                wait_max_tryout=self.config_content["container"].get(
+                    "wait_max_tryout"
+                ),
+                domain_type=self.config_content["container"].get("domain_type"),
+            )
+
+        if self.config_content["container"].get("enable_golden_snapshot"):
+            self._log(LOG_INFO, "Initializing container golden snapshot ...")
+
+            self.runtime_golden_snapshot_manager = GoldenSnapshotManager(
+                container_iso_file_path,
+                runtime_virtualization_interface,
+                snapshot_directory_path=self.config_content["container"].get(
+                    "golden_snapshot_directory_path"
+                ),
+                spare_images=self.config_content["container"].get(
+                    "spare_golden_snapshot_images"
+                ),
+                nat_interface_name=self.config_content["container"].get(
+                    "nat_interface_name"
+                ),
+                memory=self.config_content["container"].get("container_memory"),
+                vcpus=self.config_content["container"].get("container_vcpus"),
+                wait_max_tryout=self.config_content["container"].get(
+                    "wait_max_tryout"
+                ),
+                domain_type=self.config_content["container"].get("domain_type"),
+                endpoint_username=self.config_content["container"].get(
+                    "endpoint_username"
+                ),
+                endpoint_password=self.config_content["container"].get(
+                    "endpoint_password"
+                ),
+                endpoint_listen_port=self.config_content["container"].get(
+                    "endpoint_listen_port"
+                ),
+            )
+
+        forwarding_backend_name = self.config_content["port_forwarding"].get(
+            "forwarding_backend"
+        )
+
+        if forwarding_backend_name == FORWARDING_BACKEND_SELECTOR:
+            forwarding_backend = SelectorForwardingBackend()
+
+        elif forwarding_backend_name == FORWARDING_BACKEND_NFTABLES:
+            self._log(LOG_INFO, "Initializing forwarding rules ...")
+
+            forwarding_backend = NftablesForwardingBackend()
+            forwarding_backend.initializeRules()
+
+        else:
+            forwarding_backend = SocatForwardingBackend()
+
+        min_port, max_port = self.config_content["port_forwarding"].get("port_range")
+        runtime_port_forwarding_interface = PortForwardingInterface(
+            forwardable_port_range=range(min_port, max_port),
+            forwarding_backend=forwarding_backend,
+        )
+
+        if self.config_content["container"].get("enable_domain_event_monitor"):
+            self.runtime_domain_event_monitor = DomainEventMonitor()
+
+        if self.runtime_rsa_key_pool and not enable_onetime_rsa_keys:
+            self.runtime_rsa_wrapper = self.runtime_rsa_key_pool.getRSAWrapper()
+
+            createFileRecursively(private_key_path)
+
+            with open(public_key_path, "w") as fd:
+                fd.write(self.runtime_rsa_wrapper.getPublicKey().decode())
+
+            with open(private_key_path, "w") as fd:
+                fd.write(self.runtime_rsa_wrapper.getPrivateKey().decode())
 
         self._log(LOG_INFO, "Initializing server interface ...")
 
@@ -160,9 +327,57 @@ class AnweddolServerCLIServerProcess:
                 bind_address=bind_address,
                 listen_port=listen_port,
                 client_timeout=timeout,
+                runtime_virtualization_interface=runtime_virtualization_interface,
+                runtime_port_forwarding_interface=runtime_port_forwarding_interface,
                 runtime_rsa_wrapper=self.runtime_rsa_wrapper,
+                enable_asyncio_engine=self.config_content["server"].get(
+                    "enable_asyncio_engine"
+                ),
+                max_workers=self.config_content["server"].get("max_workers"),
+                max_pending_clients=self.config_content["server"].get(
+                    "max_pending_clients"
+                ),
+                listen_backlog=self.config_content["server"].get("listen_backlog"),
+                acceptor_workers=self.config_content["server"].get(
+                    "acceptor_workers"
+                ),
+                runtime_warm_pool_manager=self.runtime_warm_pool_manager,
+                runtime_domain_event_monitor=self.runtime_domain_event_monitor,
+                runtime_golden_snapshot_manager=self.runtime_golden_snapshot_manager,
+                runtime_rsa_key_pool=self.runtime_rsa_key_pool,
+                keep_alive_timeout=self.config_content["server"].get(
+                    "keep_alive_timeout"
+                ),
+                max_keep_alive_requests=self.config_content["server"].get(
+                    "max_keep_alive_requests"
+                ),
+                rsa_operation_workers=self.config_content["server"].get(
+                    "rsa_operation_workers"
+                ),
+                max_pending_rsa_operations=self.config_content["server"].get(
+                    "max_pending_rsa_operations"
+                ),
+                enable_binary_encoding=self.config_content["server"].get(
+                    "enable_binary_encoding"
+                ),
+                max_batch_create_amount=self.config_content["server"].get(
+                    "max_batch_create_amount"
+                ),
+                batch_create_stage_workers=self.config_content["server"].get(
+                    "batch_create_stage_workers"
+                ),
             )
 
+            # The instance key pair is drawn once, the pool is not needed anymore
+            if self.runtime_rsa_key_pool:
+                _, _, _, _, wait_time = self.runtime_rsa_key_pool.getStatistics()
+                self.runtime_rsa_key_pool.stopPool()
+
+                self._log(
+                    LOG_INFO,
+                    f"Instance RSA key pair generated ({wait_time:.2f}s spent waiting for it)",
+                )
+
         else:
             enable_ssl = self.config_content["web_server"].get("enable_ssl")
             ssl_pem_private_key_file_path = self.config_content["web_server"].get(
@@ -175,9 +390,20 @@ class AnweddolServerCLIServerProcess:
             self.server_interface = WebServerInterface(
                 container_iso_file_path,
                 listen_port=listen_port,
+                runtime_virtualization_interface=runtime_virtualization_interface,
+                runtime_port_forwarding_interface=runtime_port_forwarding_interface,
                 enable_ssl=enable_ssl,
                 ssl_pem_private_key_file_path=ssl_pem_private_key_file_path,
                 ssl_pem_certificate_file_path=ssl_pem_certificate_file_path,
+                runtime_warm_pool_manager=self.runtime_warm_pool_manager,
+                runtime_domain_event_monitor=self.runtime_domain_event_monitor,
+                runtime_golden_snapshot_manager=self.runtime_golden_snapshot_manager,
+                max_batch_create_amount=self.config_content["server"].get(
+                    "max_batch_create_amount"
+                ),
+                batch_create_stage_workers=self.config_content["server"].get(
+                    "batch_create_stage_workers"
+                ),
             )
 
         if self.config_content["access_token"].get("enabled"):
@@ -192,19 +418,16 @@ class AnweddolServerCLIServerProcess:
         self._log(LOG_INFO, "Binding handlers routine ...")
 
         def handle_stat_request(**kwargs):
-            _, _, uptime = self.server_interface.getRuntimeStatistics()
-            max_allowed_running_container_domains = self.config_content[
-                "container"
-            ].get("max_allowed_running_container_domains")
+            _, _, uptime, _ = self.server_interface.getRuntimeStatistics()
+            available_container_domains_amount = (
+                self._get_available_container_domains_amount()
+            )
 
             response_data = {
                 "version": __version__,
                 "uptime": uptime,
-                "available": (
-                    max_allowed_running_container_domains
-                    - self.actual_running_container_domains_counter
-                )
-                if max_allowed_running_container_domains
+                "available": available_container_domains_amount
+                if available_container_domains_amount is not None
                 else "nolimit",
             }
 
@@ -217,9 +440,6 @@ class AnweddolServerCLIServerProcess:
                     RESPONSE_MSG_OK,
                     data=response_data,
                 )
-                client_instance.closeConnection()
-
-                self._log(LOG_INFO, f"(client ID {client_id}) Connection closed")
 
             else:
                 client_id = self._make_client_id(
@@ -295,8 +515,6 @@ class AnweddolServerCLIServerProcess:
                     else "unspec"
                 )
 
-            self.actual_running_container_domains_counter += 1
-
             self._log(
                 LOG_INFO,
                 f"(client ID {client_id}) Container {container_uuid} domain is running",
@@ -306,6 +524,14 @@ class AnweddolServerCLIServerProcess:
                 f"(client ID {client_id}) Container IP : {container_ip}",
             )
 
+            boot_duration = data.get("container_instance").getBootDuration()
+
+            if boot_duration is not None:
+                self._log(
+                    LOG_INFO,
+                    f"(client ID {client_id}) Container {container_uuid} domain booted in {boot_duration:.2f}s",
+                )
+
         @self.server_interface.on_container_created
         def handle_container_creation(context, data):
             container_instance = data.get("container_instance")
@@ -326,7 +552,7 @@ class AnweddolServerCLIServerProcess:
                 LOG_INFO,
                 "(client ID {}) Actual running container domains amount : {} / {}".format(
                     client_id,
-                    self.actual_running_container_domains_counter,
+                    self.server_interface.getRuntimeVirtualizationInterface().getReservedDomainSlotsAmount(),
                     max_allowed_running_container_domains,
                 ),
             )
@@ -464,12 +690,23 @@ class AnweddolServerCLIServerProcess:
                     f"(client ID {client_id}) Access authentication success",
                 )
 
+            # A BATCHCREATE request is refused if its whole amount does not fit
+            requested_container_domains = (
+                client_request.get("parameters", {}).get("amount") or 1
+                if request_verb == REQUEST_VERB_BATCHCREATE
+                else 1
+            )
+
+            # The server refuses the requests which do not fit in the running
+            # domain slots anyway, they are only refused earlier here
+            available_container_domains_amount = (
+                self._get_available_container_domains_amount()
+            )
+
             if (
-                request_verb == REQUEST_VERB_CREATE
-                and self.actual_running_container_domains_counter
-                >= self.config_content["container"].get(
-                    "max_allowed_running_container_domains"
-                )
+                request_verb in (REQUEST_VERB_CREATE, REQUEST_VERB_BATCHCREATE)
+                and available_container_domains_amount is not None
+                and requested_container_domains > available_container_domains_amount
             ):
                 self._log(
                     LOG_WARN,
@@ -498,6 +735,81 @@ class AnweddolServerCLIServerProcess:
         def handle_server_stopped(context, data):
             self._log(LOG_INFO, "Server is stopped")
 
+            if self.runtime_warm_pool_manager:
+                (
+                    _,
+                    hits,
+                    misses,
+                    boot_errors,
+                ) = self.runtime_warm_pool_manager.getStatistics()
+
+                self._log(
+                    LOG_INFO,
+                    f"Container warm pool : {hits} hit(s), {misses} miss(es), {boot_errors} boot error(s)",
+                )
+
+            if self.runtime_golden_snapshot_manager:
+                (
+                    _,
+                    hits,
+                    misses,
+                    errors,
+                ) = self.runtime_golden_snapshot_manager.getStatistics()
+
+                self._log(
+                    LOG_INFO,
+                    f"Container golden snapshot : {hits} hit(s), {misses} miss(es), {errors} error(s)",
+                )
+
+            if self.runtime_overlay_image_manager:
+                (
+                    _,
+                    hits,
+                    misses,
+                    deleted,
+                    errors,
+                ) = self.runtime_overlay_image_manager.getStatistics()
+
+                self._log(
+                    LOG_INFO,
+                    f"Container overlays : {hits} hit(s), {misses} miss(es), {deleted} deleted, {errors} error(s)",
+                )
+
+            if self.server_type == SERVER_TYPE_CLASSIC:
+                session_ticket_manager = (
+                    self.server_interface.getRuntimeSessionTicketManager()
+                )
+
+                if session_ticket_manager:
+                    (
+                        issued,
+                        redeemed,
+                        refused,
+                        _,
+                    ) = session_ticket_manager.getStatistics()
+
+                    self._log(
+                        LOG_INFO,
+                        f"Session tickets : {issued} issued, {redeemed} redeemed, {refused} refused",
+                    )
+
+                rsa_operation_pool = self.server_interface.getRuntimeRSAOperationPool()
+
+                if rsa_operation_pool:
+                    (
+                        _,
+                        pooled,
+                        inline,
+                        _,
+                        average_latency,
+                        max_latency,
+                    ) = rsa_operation_pool.getStatistics()
+
+                    self._log(
+                        LOG_INFO,
+                        f"RSA operations : {pooled} pooled, {inline} inline, {average_latency * 1000:.1f} ms average latency, {max_latency * 1000:.1f} ms max latency",
+                    )
+
             if self.config_content["access_token"].get("enabled"):
                 self.access_token_manager.closeDatabase()
 
@@ -505,6 +817,15 @@ class AnweddolServerCLIServerProcess:
         def notify_started(context, data):
             self._log(LOG_INFO, "Server is started")
 
+            # Started once the acceptor workers are forked, so that
+            # they do not inherit it
+            if (
+                self.config_content["log_rotation"].get("enabled")
+                and self.log_manager
+            ):
+                self.is_running = True
+                threading.Thread(target=self._log_rotation_routine).start()
+
         @self.server_interface.on_endpoint_shell_created
         def handle_endpoint_shell_creation(context, data):
             client_id = (
@@ -569,9 +890,6 @@ class AnweddolServerCLIServerProcess:
                     else "unspec"
                 )
 
-            if self.actual_running_container_domains_counter > 0:
-                self.actual_running_container_domains_counter -= 1
-
             self._log(
                 LOG_INFO,
                 f"(client ID {client_id}) Container {container_uuid} domain was stopped",
@@ -651,6 +969,22 @@ class AnweddolServerCLIServerProcess:
 
         return IP_FILTER_ALLOWED
 
+    # Pooled domains hold a running domain slot, but can still be handed
+    # over to clients. Returns None if their amount is not bounded
+    def _get_available_container_domains_amount(self):
+        available_domain_slots_amount = (
+            self.server_interface.getRuntimeVirtualizationInterface().getAvailableDomainSlotsAmount()
+        )
+
+        if available_domain_slots_amount is None:
+            return None
+
+        return available_domain_slots_amount + (
+            self.runtime_warm_pool_manager.getReadyContainersAmount()
+            if self.runtime_warm_pool_manager
+            else 0
+        )
+
     def _make_client_id(self, client_ip):
         return hashlib.sha256(client_ip.encode(), usedforsecurity=False).hexdigest()[:7]
 
@@ -694,10 +1028,6 @@ class AnweddolServerCLIServerProcess:
         signal.signal(signal.SIGTERM, self.stopProcess)
         signal.signal(signal.SIGINT, self.stopProcess)
 
-        if self.config_content["log_rotation"].get("enabled") and self.log_manager:
-            self.is_running = True
-            threading.Thread(target=self._log_rotation_routine).start()
-
         self.server_interface.startServer()
 
     # signal_no and stack_frame are dummy arguments for signal handler execution
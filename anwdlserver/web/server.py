@@ -30,16 +30,23 @@ from ..core.server import (
     EVENT_REQUEST,
     EVENT_UNHANDLED_VERB,
     EVENT_MALFORMED_REQUEST,
-    EVENT_CONTAINER_DOMAIN_STOPPED,
     CONTEXT_NORMAL_PROCESS,
     CONTEXT_ERROR,
     REQUEST_VERB_CREATE,
+    REQUEST_VERB_BATCHCREATE,
     REQUEST_VERB_DESTROY,
     REQUEST_VERB_STAT,
     RESPONSE_MSG_BAD_REQ,
     RESPONSE_MSG_INTERNAL_ERROR,
+    DEFAULT_MAX_BATCH_CREATE_AMOUNT,
+    DEFAULT_BATCH_CREATE_STAGE_WORKERS,
+)
+from ..core.virtualization import (
+    VirtualizationInterface,
+    WarmPoolManager,
+    GoldenSnapshotManager,
+    DomainEventMonitor,
 )
-from ..core.virtualization import VirtualizationInterface
 from ..core.database import DatabaseInterface
 from ..core.port_forwarding import PortForwardingInterface
 from ..core.sanitization import makeResponse, verifyRequestContent
@@ -65,6 +72,11 @@ class WebServerInterface(ServerInterface, resource.Resource):
         ssl_pem_private_key_file_path: str = None,
         ssl_pem_certificate_file_path: str = None,
         stop_on_shutdown_signal: bool = DEFAULT_STOP_ON_SHUTDOWN_SIGNAL,
+        runtime_warm_pool_manager: WarmPoolManager = None,
+        runtime_domain_event_monitor: DomainEventMonitor = None,
+        runtime_golden_snapshot_manager: GoldenSnapshotManager = None,
+        max_batch_create_amount: int = DEFAULT_MAX_BATCH_CREATE_AMOUNT,
+        batch_create_stage_workers: int = DEFAULT_BATCH_CREATE_STAGE_WORKERS,
     ):
         super().__init__(
             runtime_container_iso_file_path=runtime_container_iso_file_path,
@@ -76,6 +88,11 @@ class WebServerInterface(ServerInterface, resource.Resource):
             runtime_port_forwarding_interface=runtime_port_forwarding_interface,
             runtime_rsa_wrapper=None,
             passive_mode=True,
+            runtime_warm_pool_manager=runtime_warm_pool_manager,
+            runtime_domain_event_monitor=runtime_domain_event_monitor,
+            runtime_golden_snapshot_manager=runtime_golden_snapshot_manager,
+            max_batch_create_amount=max_batch_create_amount,
+            batch_create_stage_workers=batch_create_stage_workers,
         )
 
         self.listen_port = listen_port
@@ -88,6 +105,7 @@ class WebServerInterface(ServerInterface, resource.Resource):
         self.request_handler_dict = {
             "": self._handle_home_from_http,  # If no verb is specified, return home data
             REQUEST_VERB_CREATE: self._handle_create_request_from_http,
+            REQUEST_VERB_BATCHCREATE: self._handle_batch_create_request_from_http,
             REQUEST_VERB_STAT: self._handle_stat_request_from_http,
             REQUEST_VERB_DESTROY: self._handle_destroy_request_from_http,
         }
@@ -142,6 +160,15 @@ class WebServerInterface(ServerInterface, resource.Resource):
         # Errors are already handled inside _handle_create_request
         return self._handle_create_request(passive_execution=True, **kwargs)
 
+    def _handle_batch_create_request_from_http(self, request_dict, **kwargs):
+        # Errors are already handled inside _handle_batch_create_request
+        return self._handle_batch_create_request(
+            passive_execution=True,
+            amount=request_dict["parameters"].get("amount"),
+            request_dict=request_dict,
+            **kwargs,
+        )
+
     def _handle_destroy_request_from_http(self, request_dict, **kwargs):
         try:
             if (
@@ -234,32 +261,32 @@ class WebServerInterface(ServerInterface, resource.Resource):
                 request.finish()
 
             except Exception as E:
-                container_uuid = result["data"].get("container_uuid")
-
-                if container_uuid:
-                    container_instance = (
-                        self.virtualization_interface.getStoredContainer(container_uuid)
+                # A BATCHCREATE response holds the credentials of every container
+                is_batch_response = "containers" in result["data"]
+                container_dict_list = result["data"].get("containers", [result["data"]])
+
+                for container_dict in container_dict_list:
+                    container_uuid = container_dict.get("container_uuid")
+
+                    if not container_uuid:
+                        continue
+
+                    # The forwarder of a stored container is also stored
+                    self._rollback_container(
+                        {
+                            "container_instance": self.virtualization_interface.getStoredContainer(
+                                container_uuid
+                            ),
+                            "forwarder_instance": self.port_forwarding_interface.getStoredForwarder(
+                                container_uuid
+                            ),
+                        },
+                        verb=REQUEST_VERB_BATCHCREATE
+                        if is_batch_response
+                        else REQUEST_VERB_CREATE,
+                        request_object=request,
                     )
 
-                    if container_instance.isDomainRunning():
-                        container_instance.stopDomain()
-
-                        if (
-                            self._execute_event_handler(
-                                EVENT_CONTAINER_DOMAIN_STOPPED,
-                                CONTEXT_ERROR,
-                                data={
-                                    "verb": REQUEST_VERB_CREATE,
-                                    "request_object": request,
-                                    "container_instance": container_instance,
-                                },
-                            )
-                            == -1
-                        ):
-                            return
-
-                    self._delete_container(container_instance)
-
                 self._handle_error(E, data={"request_object": request})
 
         def err(failure):
@@ -298,9 +325,18 @@ class WebServerInterface(ServerInterface, resource.Resource):
             self.start_timestamp = int(time.time())
             self.is_running = True
 
+            self._start_overlay_image_manager()
+
+            if self.warm_pool_manager:
+                self.warm_pool_manager.startPool()
+
+            if self.golden_snapshot_manager:
+                self.golden_snapshot_manager.startManager()
+
             threading.Thread(
-                target=self._delete_container_on_domain_shutdown_routine
+                target=self._make_iso_file_checksum_routine, daemon=True
             ).start()
+            self._start_container_reaper()
 
             self._execute_event_handler(EVENT_SERVER_STARTED, CONTEXT_NORMAL_PROCESS)
 
@@ -310,10 +346,22 @@ class WebServerInterface(ServerInterface, resource.Resource):
 
     def _stop_server(self, die_on_error=False):
         try:
+            if self.warm_pool_manager and self.warm_pool_manager.isRunning():
+                self.warm_pool_manager.stopPool()
+
+            if (
+                self.golden_snapshot_manager
+                and self.golden_snapshot_manager.isRunning()
+            ):
+                self.golden_snapshot_manager.stopManager()
+
             self._delete_all_containers()
             self.database_interface.closeDatabase()
 
+            self._stop_overlay_image_manager()
+
             self.is_running = False
+            self._stop_container_reaper()
 
             # reactor.running is set to True during startup to during shutdown,
             # which can lead to ReactorNotRunning raised if not timed properly.
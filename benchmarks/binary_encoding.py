@@ -0,0 +1,124 @@
+"""
+Copyright 2023 The Anweddol project
+See the LICENSE file for licensing informations
+---
+
+This script compares the size and the encoding / decoding time of
+sample requests and responses in the binary encoding and in JSON.
+
+Usage : python benchmarks/binary_encoding.py [--repeat N]
+
+"""
+
+import argparse
+import timeit
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anwdlserver.core.encoding import encodePayload, decodePayload
+
+SAMPLE_CONTAINER_UUID = "12345678-1234-1234-1234-123456789abc"
+SAMPLE_CLIENT_TOKEN = "Xq3-_" * 51
+
+# (Label, sample payload), as sent on the wire
+SAMPLE_PAYLOAD_LIST = [
+    (
+        "STAT request",
+        {"verb": "STAT", "parameters": {}},
+    ),
+    (
+        "DESTROY request",
+        {
+            "verb": "DESTROY",
+            "parameters": {
+                "container_uuid": SAMPLE_CONTAINER_UUID,
+                "client_token": SAMPLE_CLIENT_TOKEN,
+            },
+        },
+    ),
+    (
+        "STAT response",
+        {
+            "success": True,
+            "message": "OK",
+            "data": {"uptime": 3600, "version": "4.1.4", "available": 6},
+        },
+    ),
+    (
+        "CREATE response",
+        {
+            "success": True,
+            "message": "OK",
+            "data": {
+                "container_uuid": SAMPLE_CONTAINER_UUID,
+                "client_token": SAMPLE_CLIENT_TOKEN,
+                "container_iso_sha256": "0123456789abcdef" * 4,
+                "container_username": "user_12345",
+                "container_password": "abcDEF123456",
+                "container_listen_port": 10022,
+            },
+        },
+    ),
+]
+
+
+# JSON payloads are sent as UTF-8 bytes
+def encode_json_payload(content):
+    return json.dumps(content).encode()
+
+
+def get_call_time(routine, repeat):
+    call_amount = max(1, int(0.2 / timeit.timeit(routine, number=1)))
+
+    return min(timeit.repeat(routine, number=call_amount, repeat=repeat)) / call_amount
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Compare the binary encoding of the payloads with JSON"
+    )
+    argument_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="amount of measures to keep the best of (default: 5)",
+    )
+    arguments = argument_parser.parse_args()
+
+    print(
+        f"{'Payload':<18}{'Bytes':>14}{'Encode us':>18}{'Decode us':>18}"
+        f"\n{'':<18}{'JSON / binary':>14}{'JSON / binary':>18}{'JSON / binary':>18}"
+    )
+
+    for label, content in SAMPLE_PAYLOAD_LIST:
+        json_payload = encode_json_payload(content)
+        binary_payload = encodePayload(content)
+
+        if (
+            json.loads(json_payload) != content
+            or decodePayload(binary_payload) != content
+        ):
+            raise RuntimeError(f"The {label} does not survive a round trip")
+
+        json_encode_time, binary_encode_time, json_decode_time, binary_decode_time = (
+            get_call_time(routine, arguments.repeat) * 1e6
+            for routine in (
+                lambda: encode_json_payload(content),
+                lambda: encodePayload(content),
+                lambda: json.loads(json_payload),
+                lambda: decodePayload(binary_payload),
+            )
+        )
+
+        print(
+            f"{label:<18}{len(json_payload):>7} / {len(binary_payload):<4}"
+            f"{json_encode_time:>9.1f} / {binary_encode_time:<6.1f}"
+            f"{json_decode_time:>9.1f} / {binary_decode_time:<6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Copyright 2023 The Anweddol project
+See the LICENSE file for licensing informations
+---
+
+This script measures the key exchange rate of each protocol version
+over local TCP connections, along with the server CPU time it takes.
+
+Usage : python benchmarks/handshake_rates.py [--connections N]
+
+"""
+
+import argparse
+import threading
+import socket
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anwdlserver.core.client import ClientInstance
+from anwdlserver.core.crypto import (
+    RSAWrapper,
+    ECDHKeyProvider,
+    SessionTicketManager,
+)
+
+# (Label, protocol version, resume the previous session)
+BENCHMARK_CASE_LIST = [
+    ("Version 1", 1, False),
+    ("Version 2", 2, False),
+    ("Version 3", 3, False),
+    ("Version 3 resumed", 3, True),
+]
+
+
+def run_benchmark_case(
+    listen_sock,
+    server_rsa_wrapper,
+    client_rsa_wrapper,
+    ecdh_key_provider,
+    session_ticket_manager,
+    protocol_version,
+    resume_session,
+    connections,
+):
+    server_cpu_time_list = []
+
+    def server_routine():
+        for _ in range(connections):
+            client_sock, _ = listen_sock.accept()
+            client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            start_cpu_time = time.thread_time()
+            client_instance = ClientInstance(
+                client_sock,
+                rsa_wrapper=server_rsa_wrapper.makeSessionWrapper(),
+                ecdh_key_provider=ecdh_key_provider,
+                session_ticket_manager=session_ticket_manager,
+            )
+            server_cpu_time_list.append(time.thread_time() - start_cpu_time)
+
+            client_instance.closeConnection()
+
+    server_thread = threading.Thread(target=server_routine)
+    server_thread.start()
+
+    session_ticket = None
+    start_time = time.perf_counter()
+
+    for _ in range(connections):
+        client_sock = socket.create_connection(listen_sock.getsockname())
+        client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        client_instance = ClientInstance(
+            client_sock,
+            rsa_wrapper=client_rsa_wrapper.makeSessionWrapper(),
+            exchange_keys=False,
+            protocol_version=protocol_version,
+        )
+
+        if resume_session and session_ticket:
+            client_instance.setSessionTicket(*session_ticket)
+
+        client_instance.exchangeKeys(receive_first=False)
+        session_ticket = client_instance.getSessionTicket()
+
+        client_instance.closeConnection()
+
+    server_thread.join()
+
+    return (time.perf_counter() - start_time, sum(server_cpu_time_list))
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Measure the key exchange rate of each protocol version"
+    )
+    argument_parser.add_argument(
+        "--connections",
+        type=int,
+        default=200,
+        help="amount of connections per protocol version (default: 200)",
+    )
+    arguments = argument_parser.parse_args()
+
+    server_rsa_wrapper = RSAWrapper()
+    client_rsa_wrapper = RSAWrapper()
+    ecdh_key_provider = ECDHKeyProvider(server_rsa_wrapper)
+    session_ticket_manager = SessionTicketManager()
+
+    listen_sock = socket.create_server(("127.0.0.1", 0), backlog=socket.SOMAXCONN)
+
+    print(
+        f"{'Protocol':<20}{'Handshakes/s':>14}{'Server CPU ms':>16}"
+        f"{'Handshakes/s per core':>24}"
+    )
+
+    with listen_sock:
+        for label, protocol_version, resume_session in BENCHMARK_CASE_LIST:
+            wall_time, server_cpu_time = run_benchmark_case(
+                listen_sock,
+                server_rsa_wrapper,
+                client_rsa_wrapper,
+                ecdh_key_provider,
+                session_ticket_manager,
+                protocol_version,
+                resume_session,
+                arguments.connections,
+            )
+
+            print(
+                f"{label:<20}{arguments.connections / wall_time:>14.0f}"
+                f"{server_cpu_time / arguments.connections * 1000:>16.2f}"
+                f"{arguments.connections / server_cpu_time:>24.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Copyright 2023 The Anweddol project
+See the LICENSE file for licensing informations
+---
+
+This script compares the time taken by the compiled validation schemes
+with the cerberus validation of the same schemes, on sample requests
+and responses.
+
+Usage : python benchmarks/validation.py [--repeat N]
+
+"""
+
+import argparse
+import timeit
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cerberus
+
+from anwdlserver.core.sanitization import (
+    REQUEST_VERIFICATION_SCHEME,
+    RESPONSE_VERIFICATION_SCHEME,
+    verifyRequestContent,
+    makeResponse,
+)
+
+SAMPLE_CONTAINER_UUID = "12345678-1234-1234-1234-123456789abc"
+SAMPLE_CLIENT_TOKEN = "a" * 255
+
+# (Label, sample request) and (label, sample response data)
+SAMPLE_REQUEST_LIST = [
+    (
+        "STAT request",
+        {"verb": "STAT", "parameters": {}},
+    ),
+    (
+        "BATCHCREATE request",
+        {"verb": "BATCHCREATE", "parameters": {"amount": 4}},
+    ),
+    (
+        "DESTROY request",
+        {
+            "verb": "DESTROY",
+            "parameters": {
+                "container_uuid": SAMPLE_CONTAINER_UUID,
+                "client_token": SAMPLE_CLIENT_TOKEN,
+            },
+        },
+    ),
+]
+SAMPLE_RESPONSE_LIST = [
+    (
+        "STAT response",
+        {"uptime": 5, "version": "4.1.4"},
+    ),
+    (
+        "CREATE response",
+        {
+            "container_uuid": SAMPLE_CONTAINER_UUID,
+            "client_token": SAMPLE_CLIENT_TOKEN,
+            "container_iso_sha256": "b" * 64,
+            "container_username": "user_12345",
+            "container_password": "abcDEF123",
+            "container_listen_port": 10022,
+        },
+    ),
+]
+
+
+# The validation as it was made before the schemes were compiled
+def verify_content_with_cerberus(scheme, content_dict):
+    validator = cerberus.Validator()
+    validator.allow_unknown = True
+
+    return (
+        validator.validate(content_dict, scheme),
+        validator.document if validator.document else None,
+        validator.errors if validator.errors else None,
+    )
+
+
+def get_call_time(routine, repeat):
+    # The first call is excluded, so that lazy initializations are not measured
+    routine()
+
+    call_amount = max(1, int(0.2 / timeit.timeit(routine, number=1)))
+
+    return min(timeit.repeat(routine, number=call_amount, repeat=repeat)) / call_amount
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Compare the compiled validation schemes with cerberus"
+    )
+    argument_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="amount of measures to keep the best of (default: 5)",
+    )
+    arguments = argument_parser.parse_args()
+
+    benchmark_case_list = [
+        (
+            label,
+            lambda request_dict=request_dict: verify_content_with_cerberus(
+                REQUEST_VERIFICATION_SCHEME, request_dict
+            ),
+            lambda request_dict=request_dict: verifyRequestContent(request_dict),
+        )
+        for label, request_dict in SAMPLE_REQUEST_LIST
+    ] + [
+        (
+            label,
+            lambda data=data: verify_content_with_cerberus(
+                RESPONSE_VERIFICATION_SCHEME,
+                {"success": True, "message": "OK", "data": data},
+            ),
+            lambda data=data: makeResponse(True, "OK", data=data),
+        )
+        for label, data in SAMPLE_RESPONSE_LIST
+    ]
+
+    print(f"{'Document':<22}{'Cerberus us':>14}{'Compiled us':>14}{'Speedup':>10}")
+
+    for label, cerberus_routine, compiled_routine in benchmark_case_list:
+        if cerberus_routine() != compiled_routine():
+            raise RuntimeError(f"Validation results differ on the {label}")
+
+        cerberus_call_time = get_call_time(cerberus_routine, arguments.repeat)
+        compiled_call_time = get_call_time(compiled_routine, arguments.repeat)
+
+        print(
+            f"{label:<22}{cerberus_call_time * 1e6:>14.1f}"
+            f"{compiled_call_time * 1e6:>14.1f}"
+            f"{cerberus_call_time / compiled_call_time:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
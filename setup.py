@@ -100,7 +100,7 @@ setup(
         "anwdlserver.web",
     ],
     install_requires=[
-        "cryptography",
+        "cryptography>=39.0.0",
         "paramiko",
         "python-daemon",
         "cerberus",